@@ -6,3 +6,6 @@ default_app_config = 'mozillians.api.ApiConfig'
 
 class ApiConfig(AppConfig):
     name = 'mozillians.api'
+
+    def ready(self):
+        import mozillians.api.signals # noqa
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from mozillians.api.models import APIv2App
+
+
+class APIv2AppAdmin(admin.ModelAdmin):
+    list_display = ['name', 'owner', 'privacy_level', 'enabled', 'last_used']
+    list_filter = ['enabled', 'privacy_level']
+    readonly_fields = ['created', 'last_used']
+    raw_id_fields = ['owner']
+    search_fields = ['name', 'owner__user__username']
+
+
+admin.site.register(APIv2App, APIv2AppAdmin)
@@ -0,0 +1,9 @@
+from cronjobs import register
+
+from mozillians.api.v2.keys import flush_usage
+
+
+@register
+def flush_api_key_usage():
+    """Write the last usage of API keys recorded in memcached to the database."""
+    flush_usage()
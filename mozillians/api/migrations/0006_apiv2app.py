@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import mozillians.users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0046_auto_20200923_0630'),
+        ('api', '0005_auto_20200923_0645'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIv2App',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField()),
+                ('url', models.URLField(blank=True, default=b'', max_length=300)),
+                ('key', models.CharField(blank=True, default=b'', help_text=b'Leave this field empty to generate a new API key.', max_length=255, unique=True)),
+                ('privacy_level', mozillians.users.models.PrivacyField(choices=[(3, 'Mozillians'), (4, 'Public'), (1, 'Private')], default=4)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('last_used', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='apps', to='users.UserProfile')),
+            ],
+            options={
+                'verbose_name': 'APIv2 App',
+                'verbose_name_plural': 'APIv2 Apps',
+            },
+        ),
+    ]
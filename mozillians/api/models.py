@@ -0,0 +1,33 @@
+import uuid
+
+from django.db import models
+
+from mozillians.users.managers import PRIVACY_CHOICES_WITH_PRIVATE, PUBLIC
+from mozillians.users.models import PrivacyField
+
+
+class APIv2App(models.Model):
+    """An API v2 key and the privacy level of the data it can read."""
+    enabled = models.BooleanField(default=False)
+    name = models.CharField(max_length=100, unique=True)
+    description = models.TextField()
+    url = models.URLField(max_length=300, blank=True, default='')
+    owner = models.ForeignKey('users.UserProfile', related_name='apps')
+    key = models.CharField(max_length=255, blank=True, default='', unique=True,
+                           help_text='Leave this field empty to generate a new API key.')
+    privacy_level = PrivacyField(choices=PRIVACY_CHOICES_WITH_PRIVATE, default=PUBLIC)
+    created = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'APIv2 App'
+        verbose_name_plural = 'APIv2 Apps'
+
+    def __unicode__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        """Generate an API key when the key field is empty."""
+        if not self.key:
+            self.key = uuid.uuid4().hex
+        return super(APIv2App, self).save(*args, **kwargs)
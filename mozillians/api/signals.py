@@ -0,0 +1,94 @@
+from django.db.models import signals
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from mozillians.api.models import APIv2App
+from mozillians.api.v2.cache import invalidate_api_cache, object_namespace
+from mozillians.api.v2.keys import invalidate_app
+from mozillians.groups.models import Group, GroupMembership, Skill
+from mozillians.users.models import ExternalAccount, IdpProfile, Language, UserProfile
+
+
+def invalidate_profiles(*pks):
+    """Expire the cached profile lists and the profiles ``pks``."""
+    invalidate_api_cache('users', *[object_namespace('users', pk) for pk in pks])
+
+
+def touch_profile(pk):
+    """Mark the profile ``pk`` as updated after a change to its details.
+
+    The API serves the last update of profiles as their Last-Modified
+    value, which has to cover the rows listed in them too.
+    """
+    UserProfile.objects.filter(pk=pk).update(last_updated=now())
+
+
+@receiver(signals.post_save, sender=UserProfile, dispatch_uid='api_profile_changed_sig')
+@receiver(signals.post_delete, sender=UserProfile, dispatch_uid='api_profile_deleted_sig')
+def profile_changed_sig(sender, instance, **kwargs):
+    invalidate_profiles(instance.pk)
+    # Group member lists show the profile as well.
+    group_ids = GroupMembership.objects.filter(userprofile=instance).values_list('group_id',
+                                                                                 flat=True)
+    invalidate_api_cache(*[object_namespace('groups', pk) for pk in group_ids])
+
+
+@receiver(signals.post_save, sender=Group, dispatch_uid='api_group_changed_sig')
+@receiver(signals.post_delete, sender=Group, dispatch_uid='api_group_deleted_sig')
+def group_changed_sig(sender, instance, **kwargs):
+    invalidate_api_cache('groups', object_namespace('groups', instance.pk))
+    # Profiles show the names of their groups.
+    invalidate_profiles(*GroupMembership.objects.filter(group=instance)
+                        .values_list('userprofile_id', flat=True))
+
+
+@receiver(signals.post_save, sender=Skill, dispatch_uid='api_skill_changed_sig')
+@receiver(signals.post_delete, sender=Skill, dispatch_uid='api_skill_deleted_sig')
+def skill_changed_sig(sender, instance, **kwargs):
+    invalidate_api_cache('skills', object_namespace('skills', instance.pk))
+
+
+@receiver(signals.post_save, sender=GroupMembership, dispatch_uid='api_membership_changed_sig')
+@receiver(signals.post_delete, sender=GroupMembership,
+          dispatch_uid='api_membership_deleted_sig')
+def membership_changed_sig(sender, instance, **kwargs):
+    invalidate_api_cache('groups', object_namespace('groups', instance.group_id))
+    invalidate_profiles(instance.userprofile_id)
+    touch_profile(instance.userprofile_id)
+
+
+@receiver(signals.post_save, sender=ExternalAccount, dispatch_uid='api_account_changed_sig')
+@receiver(signals.post_delete, sender=ExternalAccount, dispatch_uid='api_account_deleted_sig')
+def account_changed_sig(sender, instance, **kwargs):
+    invalidate_profiles(instance.user_id)
+    touch_profile(instance.user_id)
+
+
+@receiver(signals.post_save, sender=IdpProfile, dispatch_uid='api_identity_changed_sig')
+@receiver(signals.post_delete, sender=IdpProfile, dispatch_uid='api_identity_deleted_sig')
+def identity_changed_sig(sender, instance, **kwargs):
+    invalidate_profiles(instance.profile_id)
+    touch_profile(instance.profile_id)
+
+
+@receiver(signals.post_save, sender=Language, dispatch_uid='api_language_changed_sig')
+@receiver(signals.post_delete, sender=Language, dispatch_uid='api_language_deleted_sig')
+def language_changed_sig(sender, instance, **kwargs):
+    invalidate_profiles(instance.userprofile_id)
+    touch_profile(instance.userprofile_id)
+
+
+@receiver(signals.pre_save, sender=APIv2App, dispatch_uid='api_key_saving_sig')
+def api_key_saving_sig(sender, instance, raw=False, **kwargs):
+    # Remember the stored key and owner, a save can rotate the key or
+    # hand the app over and their cached lookups have to go as well.
+    instance._stored_key_owner = None
+    if instance.pk and not raw:
+        instance._stored_key_owner = (APIv2App.objects.filter(pk=instance.pk)
+                                      .values_list('key', 'owner_id').first())
+
+
+@receiver(signals.post_save, sender=APIv2App, dispatch_uid='api_key_changed_sig')
+@receiver(signals.post_delete, sender=APIv2App, dispatch_uid='api_key_deleted_sig')
+def api_key_changed_sig(sender, instance, **kwargs):
+    invalidate_app(instance, getattr(instance, '_stored_key_owner', None))
@@ -0,0 +1,167 @@
+from datetime import datetime
+
+from django.core.cache import cache
+from django.test.utils import override_settings
+from django.utils.http import http_date
+from django.utils.timezone import utc
+
+from nose.tools import eq_, ok_
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from mozillians.api.v2.cache import (VERSION_KEY, cache_response, get_versions,
+                                     invalidate_api_cache)
+from mozillians.api.v2.viewsets import CachedReadOnlyModelViewSet
+from mozillians.common.tests import TestCase
+from mozillians.groups.models import GroupMembership
+from mozillians.groups.tests import GroupFactory
+from mozillians.users.managers import MOZILLIANS, PUBLIC
+from mozillians.users.models import Language, UserProfile
+from mozillians.users.tests import UserFactory
+
+
+class DummyViewSet(CachedReadOnlyModelViewSet):
+    cache_namespaces = ('groups',)
+    permission_classes = ()
+    privacy_level = PUBLIC
+    last_modified = datetime(2020, 1, 1, tzinfo=utc)
+    calls = 0
+
+    def initial(self, request, *args, **kwargs):
+        super(DummyViewSet, self).initial(request, *args, **kwargs)
+        request.privacy_level = self.privacy_level
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        DummyViewSet.calls += 1
+        return Response({'level': request.privacy_level})
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        DummyViewSet.calls += 1
+        return Response({'pk': kwargs['pk']})
+
+    def get_last_modified(self, **kwargs):
+        return self.last_modified
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CacheResponseTests(TestCase):
+    def setUp(self):
+        DummyViewSet.calls = 0
+        self.factory = APIRequestFactory()
+        invalidate_api_cache('groups')
+
+    def _get(self, privacy_level=PUBLIC, **headers):
+        view = DummyViewSet.as_view({'get': 'list'}, privacy_level=privacy_level)
+        return view(self.factory.get('/groups/', {'name': 'foo'}, **headers))
+
+    def _get_detail(self, pk):
+        view = DummyViewSet.as_view({'get': 'retrieve'})
+        return view(self.factory.get('/groups/{0}/'.format(pk)), pk=pk)
+
+    def test_cached(self):
+        response = self._get()
+        eq_(response.status_code, 200)
+        ok_(response['ETag'].startswith('"'))
+        eq_(response['Last-Modified'], 'Wed, 01 Jan 2020 00:00:00 GMT')
+        eq_(self._get().data, {'level': PUBLIC})
+        eq_(DummyViewSet.calls, 1)
+
+    def test_without_last_modified(self):
+        view = DummyViewSet.as_view({'get': 'list'}, last_modified=None)
+        response = view(self.factory.get('/groups/'))
+        ok_(response['ETag'])
+        ok_(not response.has_header('Last-Modified'))
+
+    def test_keyed_by_privacy_level(self):
+        self._get()
+        eq_(self._get(privacy_level=MOZILLIANS).data, {'level': MOZILLIANS})
+        eq_(DummyViewSet.calls, 2)
+
+    def test_invalidation(self):
+        self._get()
+        invalidate_api_cache('users')
+        self._get()
+        eq_(DummyViewSet.calls, 1)
+        invalidate_api_cache('groups')
+        self._get()
+        eq_(DummyViewSet.calls, 2)
+
+    def test_detail_invalidation(self):
+        self._get()
+        self._get_detail(1)
+        self._get_detail(2)
+        invalidate_api_cache('groups', 'groups:1')
+        eq_(self._get_detail(1).data, {'pk': 1})
+        eq_(self._get_detail(2).data, {'pk': 2})
+        eq_(DummyViewSet.calls, 4)
+        self._get()
+        eq_(DummyViewSet.calls, 5)
+
+    def test_if_none_match(self):
+        etag = self._get()['ETag']
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        eq_(response.status_code, 304)
+        eq_(response['ETag'], etag)
+        eq_(DummyViewSet.calls, 1)
+        eq_(self._get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_if_modified_since(self):
+        last_modified = self._get()['Last-Modified']
+        response = self._get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        eq_(response.status_code, 304)
+        eq_(DummyViewSet.calls, 1)
+
+    def test_if_modified_since_cache_miss(self):
+        last_modified = self._get()['Last-Modified']
+        # Responses missing from the cache are computed before comparing.
+        response = self._get(privacy_level=MOZILLIANS, HTTP_IF_MODIFIED_SINCE=last_modified)
+        eq_(response.status_code, 304)
+        eq_(DummyViewSet.calls, 2)
+
+    def test_modified(self):
+        response = self._get(HTTP_IF_MODIFIED_SINCE=http_date(0))
+        eq_(response.status_code, 200)
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class InvalidationSignalTests(TestCase):
+    def setUp(self):
+        self.profile = UserFactory.create().userprofile
+        self.other = UserFactory.create().userprofile
+        self.group = GroupFactory.create()
+        self.group.add_member(self.profile)
+        self.namespaces = ['users', 'users:{0}'.format(self.profile.pk),
+                           'users:{0}'.format(self.other.pk), 'groups',
+                           'groups:{0}'.format(self.group.pk)]
+
+    def _expired(self, action):
+        cache.set_many(dict((VERSION_KEY.format(namespace), 0)
+                            for namespace in self.namespaces), timeout=None)
+        action()
+        return [namespace for namespace, version
+                in zip(self.namespaces, get_versions(self.namespaces)) if version]
+
+    def test_profile_saved(self):
+        eq_(self._expired(self.profile.save),
+            ['users', 'users:{0}'.format(self.profile.pk), 'groups:{0}'.format(self.group.pk)])
+
+    def test_group_saved(self):
+        eq_(self._expired(self.group.save),
+            ['users', 'users:{0}'.format(self.profile.pk), 'groups',
+             'groups:{0}'.format(self.group.pk)])
+
+    def test_membership_saved(self):
+        membership = GroupMembership.objects.get(group=self.group, userprofile=self.profile)
+        eq_(self._expired(membership.save),
+            ['users', 'users:{0}'.format(self.profile.pk), 'groups',
+             'groups:{0}'.format(self.group.pk)])
+
+    def test_language_added(self):
+        last_updated = UserProfile.objects.get(pk=self.profile.pk).last_updated
+        eq_(self._expired(lambda: Language.objects.create(userprofile=self.profile, code='en')),
+            ['users', 'users:{0}'.format(self.profile.pk)])
+        ok_(UserProfile.objects.get(pk=self.profile.pk).last_updated > last_updated)
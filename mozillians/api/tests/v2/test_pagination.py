@@ -0,0 +1,98 @@
+import base64
+import json
+
+from nose.tools import eq_, ok_
+from rest_framework import serializers
+from rest_framework.filters import OrderingFilter
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import ReadOnlyModelViewSet
+
+from mozillians.api.v2.pagination import KeysetPagination
+from mozillians.common.tests import TestCase
+from mozillians.groups.models import Group
+from mozillians.groups.tests import GroupFactory
+
+
+class DummySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'functional_area')
+
+
+class DummyViewSet(ReadOnlyModelViewSet):
+    queryset = Group.objects.all()
+    serializer_class = DummySerializer
+    pagination_class = KeysetPagination
+    filter_backends = (OrderingFilter,)
+    ordering = 'name'
+    ordering_fields = ('name', 'functional_area')
+    permission_classes = ()
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        for i in range(10):
+            GroupFactory.create(name='group {0:02d}'.format(i), functional_area=bool(i % 2))
+
+    def _get(self, url):
+        return DummyViewSet.as_view({'get': 'list'})(self.factory.get(url))
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            data = self._get(url).data
+            ids += [group['id'] for group in data['results']]
+            url = data['next']
+        return ids
+
+    def test_walk(self):
+        eq_(self._walk('/groups/?limit=3'),
+            list(Group.objects.order_by('name').values_list('id', flat=True)))
+
+    def test_walk_with_ties(self):
+        eq_(self._walk('/groups/?limit=3&ordering=-functional_area'),
+            list(Group.objects.order_by('-functional_area', 'pk').values_list('id', flat=True)))
+
+    def test_previous(self):
+        first = self._get('/groups/?limit=3')
+        second = self._get(first.data['next'])
+        eq_(self._get(second.data['previous']).data['results'], first.data['results'])
+        eq_(first.data['previous'], None)
+
+    def test_insert_between_pages(self):
+        first = self._get('/groups/?limit=3')
+        GroupFactory.create(name='group 00a')
+        eq_(self._get(first.data['next']).data['results'][0]['name'], 'group 03')
+
+    def test_page_cost(self):
+        url = self._get('/groups/?limit=3').data['next']
+        url = self._get(url).data['next']
+        with self.assertNumQueries(1):
+            ok_(self._get(url).data['results'])
+
+    def test_offset(self):
+        response = self._get('/groups/?limit=3&offset=3')
+        eq_(response.data['count'], 10)
+        eq_(response.data['results'][0]['name'], 'group 03')
+
+    def test_count(self):
+        ok_('count' not in self._get('/groups/?limit=3').data)
+        response = self._get('/groups/?limit=3&count=true')
+        eq_(response.data['count'], 10)
+        eq_(self._get(response.data['next']).data['count'], 10)
+
+    def test_max_page_size(self):
+        for i in range(100):
+            GroupFactory.create()
+        eq_(len(self._get('/groups/?limit=500').data['results']), 100)
+
+    def test_invalid_cursor(self):
+        eq_(self._get('/groups/?cursor=foo').status_code, 404)
+
+    def test_invalid_cursor_values(self):
+        for cursor in ([False, ['group 01']], ['yes', ['group 01', 1]],
+                       [False, [{'name': 'group 01'}, 1]], [False, ['group 01', None]],
+                       [False, ['group 01', 'foo']]):
+            encoded = base64.urlsafe_b64encode(json.dumps(cursor))
+            eq_(self._get('/groups/?cursor={0}'.format(encoded)).status_code, 404)
@@ -1,19 +1,31 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.test.client import RequestFactory
+from django.test.utils import override_settings
 from django.utils.timezone import now
 
 from mock import patch
-from nose.tools import ok_
+from nose.tools import eq_, ok_
 
 from mozillians.api.models import APIv2App
 from mozillians.api.tests import APIv2AppFactory
+from mozillians.api.v2 import keys
 from mozillians.api.v2.permissions import MozilliansPermission
 from mozillians.common.tests import TestCase
 from mozillians.users.tests import UserFactory
 
 
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
 class MozilliansPermissionTests(TestCase):
 
+    def setUp(self):
+        cache.clear()
+        keys._local_apps.clear()
+        keys._local_touched.clear()
+
     def test_has_permission_valid_key(self):
         class DummyClass(object):
             pass
@@ -22,16 +34,18 @@ class MozilliansPermissionTests(TestCase):
 
         user = UserFactory.create()
         app = APIv2AppFactory.create(owner=user.userprofile)
+        APIv2App.objects.filter(id=app.id).update(last_used=timestamp - timedelta(days=1))
         request_factory = RequestFactory()
         request = request_factory.get('/', data={'api-key': app.key})
         request.user = AnonymousUser()
         mozillians_permission = MozilliansPermission()
 
-        with patch('mozillians.api.v2.permissions.now') as now_mock:
-            now_mock.return_value = timestamp
-            ok_(mozillians_permission.has_permission(request, view))
+        ok_(mozillians_permission.has_permission(request, view))
+        eq_(request.privacy_level, app.privacy_level)
+        ok_(APIv2App.objects.filter(id=app.id, last_used__lt=timestamp).exists())
 
-        ok_(APIv2App.objects.filter(id=app.id, last_used=timestamp).exists())
+        eq_(keys.flush_usage(), 1)
+        ok_(APIv2App.objects.filter(id=app.id, last_used__gte=timestamp).exists())
 
     def test_has_permission_no_key(self):
         request = RequestFactory().request()
@@ -58,7 +72,85 @@ class MozilliansPermissionTests(TestCase):
         request.user = user
         mozillians_permission = MozilliansPermission()
 
-        with patch('mozillians.api.v2.permissions.now') as now_mock:
-            now_mock.return_value = timestamp
-            ok_(mozillians_permission.has_permission(request, view))
-        ok_(APIv2App.objects.filter(id=app.id, last_used=timestamp).exists())
+        ok_(mozillians_permission.has_permission(request, view))
+        keys.flush_usage()
+        ok_(APIv2App.objects.filter(id=app.id, last_used__gte=timestamp).exists())
+
+    def test_has_permission_cached(self):
+        app = APIv2AppFactory.create(owner=UserFactory.create().userprofile)
+        request = RequestFactory().get('/', data={'api-key': app.key})
+        request.user = AnonymousUser()
+        mozillians_permission = MozilliansPermission()
+        ok_(mozillians_permission.has_permission(request, '/'))
+
+        with self.assertNumQueries(0):
+            ok_(mozillians_permission.has_permission(request, '/'))
+
+    def test_has_permission_disabled_key(self):
+        app = APIv2AppFactory.create(owner=UserFactory.create().userprofile)
+        request = RequestFactory().get('/', data={'api-key': app.key})
+        request.user = AnonymousUser()
+        mozillians_permission = MozilliansPermission()
+        ok_(mozillians_permission.has_permission(request, '/'))
+
+        app.enabled = False
+        app.save()
+        ok_(not mozillians_permission.has_permission(request, '/'))
+
+    def test_has_permission_rotated_key(self):
+        app = APIv2AppFactory.create(owner=UserFactory.create().userprofile)
+        old_key = app.key
+        request = RequestFactory().get('/', data={'api-key': old_key})
+        request.user = AnonymousUser()
+        mozillians_permission = MozilliansPermission()
+        ok_(mozillians_permission.has_permission(request, '/'))
+
+        app.key = ''
+        app.save()
+        ok_(app.key != old_key)
+        ok_(not mozillians_permission.has_permission(request, '/'))
+
+    def test_has_permission_assigned_key_new_owner(self):
+        old_owner = UserFactory.create()
+        app = APIv2AppFactory.create(owner=old_owner.userprofile)
+        request = RequestFactory().get('/')
+        request.user = old_owner
+        mozillians_permission = MozilliansPermission()
+        ok_(mozillians_permission.has_permission(request, '/'))
+
+        app.owner = UserFactory.create().userprofile
+        app.save()
+        ok_(not mozillians_permission.has_permission(request, '/'))
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class UsageTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        keys._local_touched.clear()
+
+    def test_record_usage_throttled(self):
+        with patch('mozillians.api.v2.keys.cache') as cache_mock:
+            keys.record_usage(1)
+            keys.record_usage(1)
+        eq_(cache_mock.set.call_count, 1)
+
+    def test_flush_usage_nothing_recorded(self):
+        APIv2AppFactory.create(owner=UserFactory.create().userprofile)
+        with self.assertNumQueries(1):
+            eq_(keys.flush_usage(), 0)
+
+    def test_flush_usage_batched(self):
+        apps = [APIv2AppFactory.create(owner=UserFactory.create().userprofile)
+                for i in range(3)]
+        timestamp = now()
+        APIv2App.objects.update(last_used=timestamp - timedelta(days=1))
+        keys.record_usage(apps[0].id)
+        keys.record_usage(apps[1].id)
+
+        with self.assertNumQueries(2):
+            eq_(keys.flush_usage(), 2)
+        eq_(APIv2App.objects.get(last_used__lt=timestamp), apps[2])
+        eq_(keys.flush_usage(), 0)
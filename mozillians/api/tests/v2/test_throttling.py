@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from mock import Mock, patch
+from nose.tools import eq_, ok_
+
+from mozillians.api.v2 import throttling
+from mozillians.api.v2.throttling import APIKeyRateThrottle, consume, get_rate
+from mozillians.common.tests import TestCase
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@patch('mozillians.api.v2.throttling.time.time')
+class ConsumeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_burst(self, time_mock):
+        time_mock.return_value = 1000
+        results = [consume('bucket', 3, 60) for i in range(4)]
+        eq_([result.allowed for result in results], [True, True, True, False])
+        eq_([result.remaining for result in results], [2, 1, 0, 0])
+        eq_(results[2].reset, 1060)
+        eq_(results[3].wait, 20)
+
+    def test_refill(self, time_mock):
+        time_mock.return_value = 1000
+        for i in range(3):
+            consume('bucket', 3, 60)
+        time_mock.return_value = 1020
+        ok_(consume('bucket', 3, 60).allowed)
+        ok_(not consume('bucket', 3, 60).allowed)
+
+    def test_denied_requests_keep_tokens(self, time_mock):
+        time_mock.return_value = 1000
+        for i in range(10):
+            consume('bucket', 3, 60)
+        time_mock.return_value = 1020
+        ok_(consume('bucket', 3, 60).allowed)
+
+    def test_full_bucket_does_not_overflow(self, time_mock):
+        time_mock.return_value = 1000
+        consume('bucket', 3, 60)
+        time_mock.return_value = 2000
+        results = [consume('bucket', 3, 60) for i in range(4)]
+        eq_([result.allowed for result in results], [True, True, True, False])
+
+    def test_expired_counter(self, time_mock):
+        time_mock.return_value = 1000
+        for i in range(3):
+            consume('bucket', 3, 60)
+        cache.clear()
+        ok_(consume('bucket', 3, 60).allowed)
+
+
+@override_settings(API_THROTTLE_RATES={1: '100/hour', 3: '10/min', 4: None},
+                   API_THROTTLE_APP_RATES={7: '5/s', 8: None})
+class GetRateTests(TestCase):
+
+    def test_privacy_level(self):
+        eq_(get_rate(1, 1), (100, 3600))
+        eq_(get_rate(1, 3), (10, 60))
+        eq_(get_rate(1, 4), None)
+
+    def test_app(self):
+        eq_(get_rate(7, 4), (5, 1))
+        eq_(get_rate(8, 3), None)
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    API_THROTTLE_RATES={4: '2/min'}, API_THROTTLE_APP_RATES={})
+class APIKeyRateThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_throttle(self):
+        throttle = APIKeyRateThrottle()
+        request = Mock(api_app_id=1, privacy_level=4)
+        ok_(throttle.allow_request(request, None))
+        ok_(throttle.allow_request(request, None))
+        ok_(not throttle.allow_request(request, None))
+        eq_(request.rate_limit.remaining, 0)
+        ok_(0 < throttle.wait() <= 30)
+
+    def test_apps_have_their_own_buckets(self):
+        throttle = APIKeyRateThrottle()
+        for i in range(2):
+            throttle.allow_request(Mock(api_app_id=1, privacy_level=4), None)
+        ok_(throttle.allow_request(Mock(api_app_id=2, privacy_level=4), None))
+        ok_(cache.get(throttling.THROTTLE_CACHE_KEY.format(2)))
+
+    def test_unlimited(self):
+        throttle = APIKeyRateThrottle()
+        request = Mock(api_app_id=1, privacy_level=3)
+        for i in range(5):
+            ok_(throttle.allow_request(request, None))
+
+    def test_headers(self):
+        response = {}
+        throttling.patch_rate_limit_headers(response, consume('bucket', 2, 60))
+        eq_(response['X-RateLimit-Limit'], '2')
+        eq_(response['X-RateLimit-Remaining'], '1')
@@ -0,0 +1,20 @@
+from nose.tools import eq_
+
+from mozillians.api.tests import APIv2AppFactory
+from mozillians.common.tests import TestCase
+from mozillians.users.managers import PUBLIC
+from mozillians.users.tests import UserFactory
+
+
+class APIv2URLsTests(TestCase):
+
+    def test_users_endpoint(self):
+        user = UserFactory.create(userprofile={'privacy_full_name': PUBLIC})
+        app = APIv2AppFactory.create(owner=user.userprofile)
+        response = self.client.get('/api/v2/users/', {'api-key': app.key})
+        eq_(response.status_code, 200)
+        eq_(response.data['results'][0]['username'], user.username)
+
+    def test_no_key(self):
+        response = self.client.get('/api/v2/users/')
+        eq_(response.status_code, 403)
@@ -0,0 +1,98 @@
+"""Server side response cache for the API v2 viewsets.
+
+Responses are cached per viewset, privacy level and absolute URL, which
+includes the query parameters. Each response depends on one or more
+namespaces whose version is part of the cache key. List responses depend
+on the namespaces of their viewset, detail responses on the namespaces of
+their object only, see object_namespace(). The mozillians.api signals
+invalidate the namespaces of the changed objects.
+"""
+import calendar
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.encoding import force_bytes
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+VERSION_KEY = 'api:v2:version:{0}'
+RESPONSE_KEY = 'api:v2:response:{0}'
+
+
+def object_namespace(namespace, pk):
+    """Return the namespace of the object ``pk`` in ``namespace``."""
+    return '{0}:{1}'.format(namespace, pk)
+
+
+def invalidate_api_cache(*namespaces):
+    """Expire the cached responses depending on ``namespaces``."""
+    now = time.time()
+    cache.set_many(dict((VERSION_KEY.format(namespace), now) for namespace in namespaces),
+                   timeout=None)
+
+
+def get_versions(namespaces):
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Versions lost from the cache restart at the current time.
+            cache.add(key, time.time(), timeout=None)
+            versions[key] = cache.get(key, time.time())
+    return [versions[key] for key in keys]
+
+
+def cache_response(func):
+    """Cache the responses of a viewset list or retrieve method.
+
+    Responses carry a strong ETag computed from their data and, when the
+    viewset knows it, a Last-Modified value taken from the data. Both are
+    stored with the response, so conditional requests are only answered
+    with a 304 once the response was computed for the current versions.
+    """
+    @wraps(func)
+    def wrapper(self, request, *args, **kwargs):
+        # Overrides calling the cached method of their parent are cached once.
+        if not isinstance(request, Request) or getattr(request, '_api_cache_seen', False):
+            return func(self, request, *args, **kwargs)
+        request._api_cache_seen = True
+
+        versions = get_versions(self.get_cache_namespaces(**kwargs))
+        key = RESPONSE_KEY.format(hashlib.md5(force_bytes(json.dumps([
+            type(self).__name__, request.privacy_level, request.build_absolute_uri(), versions
+        ]))).hexdigest())
+
+        entry = cache.get(key)
+        if entry is None:
+            response = func(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = json.dumps(response.data, cls=JSONEncoder, sort_keys=True)
+            last_modified = self.get_last_modified(**kwargs)
+            entry = {
+                'data': response.data,
+                'etag': quote_etag(hashlib.md5(force_bytes(content)).hexdigest()),
+                'last_modified': (calendar.timegm(last_modified.utctimetuple())
+                                  if last_modified else None),
+            }
+            cache.set(key, entry, settings.API_CACHE_TIMEOUT)
+        else:
+            response = Response(entry['data'])
+
+        response['ETag'] = entry['etag']
+        if entry['last_modified']:
+            response['Last-Modified'] = http_date(entry['last_modified'])
+        # Clients may keep responses but have to revalidate them.
+        patch_cache_control(response, private=True, no_cache=True, max_age=0)
+        return get_conditional_response(request, etag=entry['etag'],
+                                        last_modified=entry['last_modified'],
+                                        response=response)
+    return wrapper
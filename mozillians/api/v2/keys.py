@@ -0,0 +1,123 @@
+"""Cached API key lookups and write-behind usage tracking.
+
+Validated keys are kept for a few seconds in process memory and for a
+minute in memcached, so busy consumers do not query the database on every
+request. Saving or deleting an app drops its entries, including the ones of
+the key and owner it had before the save (see mozillians.api.signals).
+The short local timeout bounds how long other processes keep serving a
+disabled or rotated key.
+
+Usage is recorded in memcached at most once per API_KEY_USAGE_RESOLUTION
+seconds per app and process. The ``flush_api_key_usage`` cron job writes
+the recorded timestamps to ``APIv2App.last_used`` in a single UPDATE.
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils.encoding import force_bytes
+from django.utils.timezone import utc
+
+from mozillians.api.models import APIv2App
+
+
+KEY_CACHE_KEY = 'api:v2:key:{0}'
+OWNER_CACHE_KEY = 'api:v2:owner:{0}'
+LAST_USED_CACHE_KEY = 'api:v2:last_used:{0}'
+
+_lock = threading.Lock()
+_local_apps = {}
+_local_touched = {}
+
+
+def _key_cache_key(key):
+    # API keys are user supplied, hash them into a valid memcached key.
+    return KEY_CACHE_KEY.format(hashlib.md5(force_bytes(key)).hexdigest())
+
+
+def get_app(key):
+    """Return (id, privacy_level) of the enabled app owning ``key``, or None."""
+    cache_key = _key_cache_key(key)
+    with _lock:
+        expires, app = _local_apps.get(cache_key, (0, None))
+    if expires > time.time():
+        return app or None
+
+    app = cache.get(cache_key)
+    if app is None:
+        app = (APIv2App.objects.filter(key=key, enabled=True)
+               .values_list('id', 'privacy_level').first())
+        # Unknown keys are cached too, so clients retrying a wrong key do
+        # not hit the database either.
+        app = tuple(app) if app else False
+        cache.set(cache_key, app, settings.API_KEY_CACHE_TIMEOUT)
+
+    with _lock:
+        _local_apps[cache_key] = (time.time() + settings.API_KEY_LOCAL_CACHE_TIMEOUT, app)
+    return app or None
+
+
+def get_owner_key(userprofile):
+    """Return the key of the least privileged app of ``userprofile``, or None."""
+    cache_key = OWNER_CACHE_KEY.format(userprofile.id)
+    key = cache.get(cache_key)
+    if key is None:
+        key = (APIv2App.objects.filter(owner=userprofile).order_by('privacy_level')
+               .values_list('key', flat=True).first()) or ''
+        cache.set(cache_key, key, settings.API_KEY_CACHE_TIMEOUT)
+    return key or None
+
+
+def invalidate_app(app, previous=None):
+    """Drop the cached lookups of ``app``.
+
+    ``previous`` is the (key, owner_id) pair the app was stored with, its
+    entries are dropped too so a rotated key or a former owner's key stops
+    working right away.
+    """
+    keys = set([app.key])
+    owner_ids = set([app.owner_id])
+    if previous:
+        keys.add(previous[0])
+        owner_ids.add(previous[1])
+    key_cache_keys = [_key_cache_key(key) for key in keys]
+    owner_cache_keys = [OWNER_CACHE_KEY.format(owner_id) for owner_id in owner_ids]
+    cache.delete_many(key_cache_keys + owner_cache_keys)
+    with _lock:
+        for cache_key in key_cache_keys:
+            _local_apps.pop(cache_key, None)
+
+
+def record_usage(app_id):
+    """Record that app ``app_id`` was just used, without touching the database."""
+    now = time.time()
+    with _lock:
+        if now - _local_touched.get(app_id, 0) < settings.API_KEY_USAGE_RESOLUTION:
+            return
+        _local_touched[app_id] = now
+    cache.set(LAST_USED_CACHE_KEY.format(app_id), now, settings.API_KEY_USAGE_TIMEOUT)
+
+
+def flush_usage():
+    """Write the recorded usage timestamps to the database.
+
+    Returns the number of updated apps.
+    """
+    keys = dict((LAST_USED_CACHE_KEY.format(app_id), app_id)
+                for app_id in APIv2App.objects.values_list('id', flat=True))
+    recorded = cache.get_many(list(keys))
+    if not recorded:
+        return 0
+
+    # Timestamps recorded between reading and deleting them are lost, the
+    # next request of those apps after API_KEY_USAGE_RESOLUTION records
+    # them again.
+    cache.delete_many(list(recorded))
+    whens = [When(id=keys[key], then=Value(datetime.fromtimestamp(timestamp, utc)))
+             for key, timestamp in recorded.items()]
+    return (APIv2App.objects.filter(id__in=[keys[key] for key in recorded])
+            .update(last_used=Case(*whens, output_field=DateTimeField())))
@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.encoding import force_bytes, force_text
+from django.utils.translation import ugettext_lazy as _lazy
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+class KeysetPagination(BasePagination):
+    """Paginate on the values of the ordering fields of the last item.
+
+    Each page filters on the ordering fields, with the primary key as a
+    tie breaker, instead of skipping the previous rows, so every page
+    costs the same at any depth. Cursors hold the position of an item,
+    which stays valid when rows are inserted or removed.
+
+    Counting all the rows costs as much as an offset, so pages only hold
+    a ``count`` when ``count=true`` is given. Requests giving an ``offset``
+    are paginated with LimitOffsetPagination, as they used to.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    ordering = ('pk',)
+    invalid_cursor_message = _lazy(u'Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.offset_paginator = None
+        if LimitOffsetPagination.offset_query_param in request.query_params:
+            self.offset_paginator = LimitOffsetPagination()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        reverse, position = self.decode_cursor(request, queryset)
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true', 'True'):
+            self.count = queryset.count()
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        # The extra item tells whether another page follows.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(request.query_params[self.page_size_query_param],
+                                 strict=True, cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        """Return the ordering of the view, ending with the primary key."""
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        else:
+            ordering = getattr(view, 'ordering', None)
+
+        if not ordering:
+            ordering = self.ordering
+        elif isinstance(ordering, basestring):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if not set(['pk', '-pk', 'id', '-id']) & set(ordering):
+            ordering += ('pk',)
+        return ordering
+
+    def _after(self, ordering, position):
+        """Return a Q matching the items following ``position`` in ``ordering``."""
+        query = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            field = field.lstrip('-')
+            query |= equal & Q(**{field + lookup: value})
+            equal &= Q(**{field: value})
+        return query
+
+    def _get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    def _get_field(self, model, path):
+        """Return the model field ``path`` points to, None for annotations."""
+        field = None
+        try:
+            for name in path.split('__'):
+                if field is not None:
+                    model = field.related_model
+                field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except (AttributeError, FieldDoesNotExist):
+            return None
+        return field
+
+    def decode_cursor(self, request, queryset):
+        """Return (reverse, position) of the cursor of ``request``.
+
+        Raises NotFound for cursors which were not made for the ordering
+        of ``queryset``.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            reverse, position = json.loads(force_text(base64.urlsafe_b64decode(
+                force_bytes(encoded))))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(reverse, bool) or not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            # Positions are compared with < and >, which do not apply to NULL.
+            if not isinstance(value, (basestring, int, long, float)):
+                raise NotFound(self.invalid_cursor_message)
+            model_field = self._get_field(queryset.model, field.lstrip('-'))
+            if model_field is not None:
+                try:
+                    value = model_field.to_python(value)
+                except ValidationError:
+                    raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+        return reverse, cleaned
+
+    def encode_cursor(self, reverse, instance):
+        encoded = base64.urlsafe_b64encode(force_bytes(json.dumps(
+            [reverse, self._get_position(instance)], cls=DjangoJSONEncoder)))
+        return replace_query_param(self.base_url, self.cursor_query_param, force_text(encoded))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(True, self.page[0])
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        items = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        if self.count is not None:
+            items.insert(0, ('count', self.count))
+        return Response(OrderedDict(items))
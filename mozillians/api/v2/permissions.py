@@ -1,8 +1,6 @@
-from django.utils.timezone import now
-
 from rest_framework.permissions import BasePermission
 
-from mozillians.api.models import APIv2App
+from mozillians.api.v2.keys import get_app, get_owner_key, record_usage
 
 
 class MozilliansPermission(BasePermission):
@@ -10,21 +8,17 @@ class MozilliansPermission(BasePermission):
         api_key = None
 
         if request.user.is_authenticated():
-            api_query = APIv2App.objects.filter(owner=request.user.userprofile)
-            if api_query.exists():
-                api_key = api_query.order_by('privacy_level')[0].key
+            api_key = get_owner_key(request.user.userprofile)
 
         api_key = (request.GET.get('api-key') or request.META.get('HTTP_X_API_KEY') or api_key)
 
         if api_key:
-            try:
-                app = APIv2App.objects.get(key=api_key, enabled=True)
-            except APIv2App.DoesNotExist:
+            app = get_app(api_key)
+            if not app:
                 return False
 
-            request.privacy_level = app.privacy_level
-
-            APIv2App.objects.filter(id=app.id).update(last_used=now())
+            request.api_app_id, request.privacy_level = app
+            record_usage(request.api_app_id)
 
             return True
         return False
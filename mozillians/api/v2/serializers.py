@@ -0,0 +1,28 @@
+FIELDS_QUERY_PARAM = 'fields'
+
+
+def get_requested_fields(request):
+    """Return the names listed in the ``fields`` query parameter, or None for all fields."""
+    if request is None:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    value = params.get(FIELDS_QUERY_PARAM)
+    if not value:
+        return None
+    return set(name.strip() for name in value.split(',') if name.strip())
+
+
+class SparseFieldsetsMixin(object):
+    """Serializer mixin dropping the fields missing from the ``fields`` query parameter.
+
+    Dropped fields are neither computed nor read from the instances.
+    Only serializers given the request in their context are trimmed, so
+    nested serializers keep all their fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SparseFieldsetsMixin, self).__init__(*args, **kwargs)
+        requested = get_requested_fields(self._context.get('request'))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
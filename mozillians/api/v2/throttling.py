@@ -0,0 +1,101 @@
+"""Token bucket rate limits of the API v2 keys.
+
+Every app has a bucket holding as many tokens as the requests of its rate
+and refilled at that rate. Buckets live in memcached, so all the nodes
+share them. A bucket is a single counter holding the time, in
+milliseconds, at which the bucket will be full again. Each request adds
+the time one token takes to refill with an atomic incr and is allowed
+while the counter stays within one bucket of the current time. Denied
+requests give their token back.
+"""
+import math
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+THROTTLE_CACHE_KEY = 'api:v2:throttle:{0}'
+# Counters are dropped after BUCKET_TIMEOUT seconds, which refills the
+# buckets of apps that never paused long enough to refill them.
+BUCKET_TIMEOUT = 3600
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+RateLimit = namedtuple('RateLimit', 'allowed limit remaining reset wait')
+
+
+def parse_rate(rate):
+    """Return (requests, seconds) of a '<requests>/<period>' rate, or None."""
+    if not rate:
+        return None
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def get_rate(app_id, privacy_level):
+    if app_id in settings.API_THROTTLE_APP_RATES:
+        return parse_rate(settings.API_THROTTLE_APP_RATES[app_id])
+    return parse_rate(settings.API_THROTTLE_RATES.get(privacy_level))
+
+
+def consume(key, limit, duration):
+    """Take a token from the bucket ``key`` of ``limit`` tokens per ``duration`` seconds."""
+    interval = max(int(duration * 1000 / limit), 1)
+    size = interval * limit
+    now = int(time.time() * 1000)
+
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:
+        full_at = None
+    if full_at is None or full_at - interval <= now:
+        # The bucket was full. Concurrent requests may both restart it,
+        # losing a token of an app well within its limit.
+        full_at = now + interval
+        cache.set(key, full_at, BUCKET_TIMEOUT)
+
+    allowed = full_at - now <= size
+    if not allowed:
+        try:
+            cache.decr(key, interval)
+        except ValueError:
+            pass
+        full_at -= interval
+
+    return RateLimit(
+        allowed=allowed,
+        limit=limit,
+        remaining=max((size - (full_at - now)) // interval, 0),
+        reset=int(math.ceil(full_at / 1000.0)),
+        wait=None if allowed else (full_at + interval - size - now) / 1000.0,
+    )
+
+
+def patch_rate_limit_headers(response, rate_limit):
+    response['X-RateLimit-Limit'] = str(rate_limit.limit)
+    response['X-RateLimit-Remaining'] = str(rate_limit.remaining)
+    response['X-RateLimit-Reset'] = str(rate_limit.reset)
+
+
+class APIKeyRateThrottle(BaseThrottle):
+    """Throttle the requests of each API key with its token bucket.
+
+    Relies on MozilliansPermission to set ``api_app_id`` and
+    ``privacy_level`` on the request.
+    """
+
+    def allow_request(self, request, view):
+        app_id = getattr(request, 'api_app_id', None)
+        rate = get_rate(app_id, request.privacy_level) if app_id else None
+        if not rate:
+            return True
+
+        self.rate_limit = consume(THROTTLE_CACHE_KEY.format(app_id), *rate)
+        request.rate_limit = self.rate_limit
+        return self.rate_limit.allowed
+
+    def wait(self):
+        return self.rate_limit.wait
@@ -1,12 +1,46 @@
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import never_cache
-
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from mozillians.api.v2.cache import cache_response, object_namespace
+from mozillians.api.v2.throttling import patch_rate_limit_headers
+
+
+class CachedReadOnlyModelViewSet(ReadOnlyModelViewSet):
+    """DRF ReadOnlyModelViewSet with cached, conditional responses.
+
+    Subclasses list the cache namespaces their responses depend on in
+    ``cache_namespaces`` and decorate list and retrieve overrides with
+    ``cache_response``. Responses carry the rate limit headers of the
+    API key.
+    """
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self, **kwargs):
+        """Return the namespaces the response to the URL ``kwargs`` depends on.
+
+        Detail actions only depend on the namespaces of their object.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in kwargs:
+            return [object_namespace(namespace, kwargs[lookup_url_kwarg])
+                    for namespace in self.cache_namespaces]
+        return list(self.cache_namespaces)
+
+    def get_last_modified(self, **kwargs):
+        """Return when the data served for the URL ``kwargs`` last changed, if known."""
+        return None
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super(CachedReadOnlyModelViewSet, self).list(request, *args, **kwargs)
 
-class NoCacheReadOnlyModelViewSet(ReadOnlyModelViewSet):
-    """DRF ReadOnlyModelViewSet with non-cached responses."""
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super(CachedReadOnlyModelViewSet, self).retrieve(request, *args, **kwargs)
 
-    @method_decorator(never_cache)
-    def dispatch(self, *args, **kwargs):
-        return super(NoCacheReadOnlyModelViewSet, self).dispatch(*args, **kwargs)
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(CachedReadOnlyModelViewSet, self).finalize_response(
+            request, response, *args, **kwargs)
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit:
+            patch_rate_limit_headers(response, rate_limit)
+        return response
@@ -8,7 +8,7 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import User
 from mozilla_django_oidc.auth import OIDCAuthenticationBackend
-from mozillians.users.models import IdpProfile
+from mozillians.users.models import IdpProfile, ProfileEmail
 
 SSO_AAL_SCOPE = 'https://sso.mozilla.com/claim/AAL'
 
@@ -80,7 +80,12 @@ class MozilliansAuthBackend(OIDCAuthenticationBackend):
     def filter_users_by_claims(self, claims):
         """Override default method to store claims."""
         self.claims = claims
-        users = super(MozilliansAuthBackend, self).filter_users_by_claims(claims)
+        # User.email is not indexed, look the address up in the email table instead
+        email = (claims.get('email') or '').strip().lower()
+        users = self.UserModel.objects.none()
+        if email:
+            emails = ProfileEmail.objects.filter(source=ProfileEmail.SOURCE_USER, email=email)
+            users = self.UserModel.objects.filter(id__in=emails.values('source_id'))
 
         # Checking the primary email returned 0 users,
         # before creating a new user we should check if the identity returned exists
@@ -132,6 +137,8 @@ class MozilliansAuthBackend(OIDCAuthenticationBackend):
         if not obj.primary:
             obj.primary = True
             IdpProfile.objects.filter(profile=profile).exclude(id=obj.id).update(primary=False)
+            (ProfileEmail.objects.filter(profile=profile, source=ProfileEmail.SOURCE_IDENTITY)
+             .exclude(source_id=obj.id).update(primary=False))
 
         # Update/Save the Github username
         if 'github|' in auth0_user_id:
@@ -0,0 +1,9 @@
+from django.core.management import call_command
+
+from cronjobs import register
+
+
+@register
+def repair_search_index():
+    """Nightly check for documents that drifted from the database."""
+    call_command('repair_search_index')
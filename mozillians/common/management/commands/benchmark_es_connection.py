@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+
+import boto3
+from django.core.management.base import BaseCommand
+from elasticsearch import RequestsHttpConnection
+
+from mozillians.common.search import AWS4AuthEncoded, AWSRequestsHttpConnection
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer every request with an empty JSON document."""
+
+    def _respond(self):
+        body = '{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_HEAD = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class UncachedAWSRequestsHttpConnection(RequestsHttpConnection):
+    """Resolves credentials and builds a new signer for every request."""
+
+    def perform_request(self, *args, **kwargs):
+        credentials = boto3.session.Session().get_credentials()
+        self.session.auth = AWS4AuthEncoded(
+            credentials.access_key, credentials.secret_key,
+            os.environ['AWS_ES_REGION'], 'es',
+            session_token=credentials.token
+        )
+        return super(UncachedAWSRequestsHttpConnection, self).perform_request(*args, **kwargs)
+
+
+class Command(BaseCommand):
+    help = ('Benchmark signed Elasticsearch requests against a local stub endpoint, '
+            'with and without cached AWS credentials.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Number of requests per connection class.')
+
+    def _run(self, connection_class, port, count):
+        connection = connection_class(host='127.0.0.1', port=port)
+        # Warm up the connection pool before measuring.
+        connection.perform_request('GET', '/')
+        timings = []
+        for i in range(count):
+            start = time.time()
+            connection.perform_request('GET', '/')
+            timings.append((time.time() - start) * 1000)
+        timings.sort()
+        return {
+            'mean': sum(timings) / len(timings),
+            'p50': timings[len(timings) // 2],
+            'p95': timings[int(len(timings) * 0.95)],
+        }
+
+    def handle(self, *args, **options):
+        # Dummy credentials keep the benchmark self-contained; the stub
+        # endpoint never verifies the signature.
+        os.environ.setdefault('AWS_ES_REGION', 'us-west-2')
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+
+        server = StubServer(('127.0.0.1', 0), StubHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        port = server.server_address[1]
+
+        try:
+            for name, connection_class in (('uncached', UncachedAWSRequestsHttpConnection),
+                                           ('cached', AWSRequestsHttpConnection)):
+                result = self._run(connection_class, port, options['requests'])
+                self.stdout.write('{0:>10}: mean {mean:.3f}ms  p50 {p50:.3f}ms  '
+                                  'p95 {p95:.3f}ms'.format(name, **result))
+        finally:
+            server.shutdown()
+            server.server_close()
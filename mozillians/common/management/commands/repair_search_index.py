@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from haystack import connections
+from haystack.constants import DEFAULT_ALIAS
+
+from mozillians.common.search_drift import check_index
+from mozillians.groups.models import Group
+from mozillians.users.models import IdpProfile, UserProfile
+
+
+MODELS = {
+    'userprofile': UserProfile,
+    'idpprofile': IdpProfile,
+    'group': Group,
+}
+
+
+class Command(BaseCommand):
+    help = ('Compare search documents with the database and reindex or remove only '
+            'the documents that drifted.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--using', default=DEFAULT_ALIAS,
+                            help='Haystack connection to check (default: default).')
+        parser.add_argument('--model', action='append', choices=sorted(MODELS), dest='models',
+                            help='Model to check, may be repeated (default: all).')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Objects per primary key range (default: ES_REINDEX_BATCHSIZE).')
+        parser.add_argument('--dry-run', action='store_true', default=False,
+                            help='Report drift without touching the index.')
+
+    def handle(self, *args, **options):
+        using = options['using']
+        if using not in connections.connections_info:
+            raise CommandError('Unknown haystack connection "{0}".'.format(using))
+
+        for name in options['models'] or sorted(MODELS):
+            report = check_index(MODELS[name], using=using, batch_size=options['batch_size'],
+                                 repair=not options['dry_run'])
+            self.stdout.write('{0}: checked {1}, stale {2}, missing {3}, orphaned {4} '
+                              '({5:.2%} drift)'.format(report.model, report.checked, report.stale,
+                                                       report.missing, report.orphaned,
+                                                       report.ratio))
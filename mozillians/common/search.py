@@ -1,9 +1,132 @@
 import boto3
+import logging
 import os
+import threading
+import time
 
-from botocore.auth import SigV4Auth
+from django.conf import settings
+from requests.adapters import HTTPAdapter
 from requests_aws4auth import AWS4Auth
-from elasticsearch import RequestsHttpConnection
+from elasticsearch import ConnectionError, RequestsHttpConnection, TransportError
+
+logger = logging.getLogger(__name__)
+_credentials = None
+_credentials_lock = threading.Lock()
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+_failures = threading.local()
+
+
+def get_aws_credentials():
+    """Return the AWS credentials shared by this process.
+
+    The boto3 session is resolved once per process instead of on every
+    request. Temporary credentials (instance or task roles) are
+    refreshable and botocore renews them shortly before they expire.
+    """
+    global _credentials
+    if _credentials is None:
+        with _credentials_lock:
+            if _credentials is None:
+                _credentials = boto3.session.Session().get_credentials()
+    return _credentials
+
+
+class CircuitBreaker(object):
+    """Stop calling a service after consecutive failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    requests are refused without touching the network. Once
+    ``reset_timeout`` seconds have passed, a single probe request is let
+    through while the others are still refused. Its success closes the
+    breaker and its failure opens it for another ``reset_timeout`` seconds.
+    A probe which never reports back is replaced after ``reset_timeout``
+    seconds.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        """Whether requests are refused, apart from a probe that is due."""
+        opened_at = self.opened_at
+        if opened_at is None:
+            return False
+        now = time.time()
+        if now - opened_at < self.reset_timeout:
+            return True
+        probe_started_at = self.probe_started_at
+        return probe_started_at is not None and now - probe_started_at < self.reset_timeout
+
+    def allow_request(self):
+        """Return whether a request may go through, making it the probe when one is due."""
+        if self.opened_at is None:
+            return True
+        with self._lock:
+            if self.is_open:
+                return False
+            if self.opened_at is not None:
+                self.probe_started_at = time.time()
+            return True
+
+    def record_success(self):
+        if self.failures or self.opened_at is not None:
+            with self._lock:
+                if self.opened_at is not None:
+                    logger.info('Search circuit breaker closed.')
+                self.failures = 0
+                self.opened_at = None
+                self.probe_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning('Search circuit breaker opened after %d failures.',
+                                   self.failures)
+                self.opened_at = time.time()
+                self.probe_started_at = None
+
+
+def get_search_circuit_breaker(name='default'):
+    """Return the circuit breaker guarding the Elasticsearch connection ``name``.
+
+    Each haystack connection has its own breaker, so a failing reindex
+    does not take down the live search.
+    """
+    breaker = _circuit_breakers.get(name)
+    if breaker is None:
+        with _circuit_breakers_lock:
+            breaker = _circuit_breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(settings.ES_CIRCUIT_BREAKER_FAILURES,
+                                         settings.ES_CIRCUIT_BREAKER_RESET_TIMEOUT)
+                _circuit_breakers[name] = breaker
+    return breaker
+
+
+def is_search_available(name='default'):
+    return not get_search_circuit_breaker(name).is_open
+
+
+def get_search_failure_count():
+    """Return the number of Elasticsearch requests which failed in this thread.
+
+    Haystack logs failed searches and returns no results. Comparing the
+    count before and after evaluating a search tells both apart.
+    """
+    return getattr(_failures, 'count', 0)
+
+
+def _add_search_failure():
+    _failures.count = get_search_failure_count() + 1
 
 
 class AWS4AuthEncoded(AWS4Auth):
@@ -28,15 +151,69 @@ class AWS4AuthEncoded(AWS4Auth):
         request.headers[header_name] = value
 
 
-class AWSRequestsHttpConnection(RequestsHttpConnection):
+class PooledRequestsHttpConnection(RequestsHttpConnection):
+    """RequestsHttpConnection with a configurable HTTP connection pool.
+
+    Requests go through the circuit breaker named by the
+    ``circuit_breaker`` argument, the host by default, so while the
+    cluster is down they fail immediately instead of waiting for the
+    timeout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pool_maxsize = kwargs.pop('pool_maxsize', None)
+        circuit_breaker = kwargs.pop('circuit_breaker', None)
+        super(PooledRequestsHttpConnection, self).__init__(*args, **kwargs)
+        self.circuit_breaker = get_search_circuit_breaker(circuit_breaker or self.host)
+        if pool_maxsize:
+            adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+    def perform_request(self, *args, **kwargs):
+        breaker = self.circuit_breaker
+        if not breaker.allow_request():
+            _add_search_failure()
+            raise ConnectionError('N/A', 'Search circuit breaker is open.', None)
+        try:
+            response = super(PooledRequestsHttpConnection, self).perform_request(*args, **kwargs)
+        except ConnectionError:
+            breaker.record_failure()
+            _add_search_failure()
+            raise
+        except TransportError as e:
+            # Server errors count as failures, client errors are our own fault.
+            if not isinstance(e.status_code, int) or e.status_code >= 500:
+                breaker.record_failure()
+                _add_search_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return response
+
+
+class AWSRequestsHttpConnection(PooledRequestsHttpConnection):
+    """Connection signing every request for the AWS Elasticsearch service.
+
+    The signer is reused for as long as the process credentials stay the
+    same and is only rebuilt after they have been refreshed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(AWSRequestsHttpConnection, self).__init__(*args, **kwargs)
+        self._signed_credentials = None
+
+    def _update_auth(self):
+        credentials = get_aws_credentials().get_frozen_credentials()
+        if credentials != self._signed_credentials:
+            self.session.auth = AWS4AuthEncoded(
+                credentials.access_key, credentials.secret_key,
+                os.environ['AWS_ES_REGION'], 'es',
+                session_token=credentials.token
+            )
+            self._signed_credentials = credentials
+
     def perform_request(self, *args, **kwargs):
-        credentials = boto3.session.Session().get_credentials()
-        signed_creds = SigV4Auth(credentials, 'es', os.environ['AWS_ES_REGION'])
-
-        secure_auth = AWS4AuthEncoded(
-            credentials.access_key, credentials.secret_key,
-            os.environ['AWS_ES_REGION'], 'es',
-            session_token=signed_creds.credentials.token
-        )
-        self.session.auth = secure_auth
+        self._update_auth()
         return super(AWSRequestsHttpConnection, self).perform_request(*args, **kwargs)
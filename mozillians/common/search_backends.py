@@ -0,0 +1,473 @@
+"""Embedded haystack backend for running search without Elasticsearch.
+
+Documents are stored in a SQLite database together with an inverted
+index of ``(field, term) -> document`` postings and the sortable values
+of their fields. Queries compile to a single SQL statement intersecting
+the postings, sorted and sliced by SQLite on indexed columns, which lets
+development, CI and small deployments run search in-process.
+"""
+import errno
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from django.utils import six
+from django.utils.encoding import force_text
+
+from haystack.backends import (BaseEngine, BaseSearchBackend, BaseSearchQuery,
+                               SearchNode, log_query)
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.exceptions import SkipDocument
+from haystack.inputs import AutoQuery, BaseInput, Exact, Not
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+from haystack.utils.app_loading import haystack_get_model
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Upper bound used to turn prefix lookups into index range scans.
+PREFIX_END = u'\uffff'
+# Gram sizes of the Elasticsearch backend's edgengram analyzer.
+EDGE_NGRAM_MIN = 2
+EDGE_NGRAM_MAX = 15
+# SQLite limits the number of host parameters in a single statement.
+SQLITE_MAX_VARIABLES = 900
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS documents ('
+    'id TEXT PRIMARY KEY, django_ct TEXT NOT NULL, django_id TEXT NOT NULL, data TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS documents_django_ct ON documents (django_ct)',
+    'CREATE TABLE IF NOT EXISTS postings ('
+    'field TEXT NOT NULL, term TEXT NOT NULL, value REAL, doc_id TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS postings_term ON postings (field, term)',
+    'CREATE INDEX IF NOT EXISTS postings_value ON postings (field, value)',
+    'CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id)',
+    'CREATE TABLE IF NOT EXISTS sort_values ('
+    'doc_id TEXT NOT NULL, field TEXT NOT NULL, value, PRIMARY KEY (doc_id, field))',
+    'CREATE INDEX IF NOT EXISTS sort_values_value ON sort_values (field, value)',
+)
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path, connection_alias=None):
+    """Return a process-wide ``(connection, lock)`` pair for ``path``.
+
+    A single connection is shared by all threads of a process so that
+    in-memory indexes (``:memory:``) are visible to every request. Each
+    haystack connection gets its own in-memory database. The directory of
+    file databases is created on first use.
+    """
+    key = (path, connection_alias) if path == ':memory:' else path
+    with _databases_lock:
+        if key not in _databases:
+            directory = os.path.dirname(path)
+            if path != ':memory:' and directory:
+                try:
+                    os.makedirs(directory)
+                except OSError as exc:
+                    if exc.errno != errno.EEXIST:
+                        raise
+            connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            if path != ':memory:':
+                connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            _databases[key] = (connection, threading.RLock())
+        return _databases[key]
+
+
+def tokenize(value):
+    """Split ``value`` into lowercase word tokens."""
+    return TOKEN_RE.findall(force_text(value).lower())
+
+
+def _chunks(items, size=SQLITE_MAX_VARIABLES):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class EmbeddedSearchBackend(BaseSearchBackend):
+    """Haystack backend storing an inverted index in SQLite."""
+
+    def __init__(self, connection_alias, **connection_options):
+        super(EmbeddedSearchBackend, self).__init__(connection_alias, **connection_options)
+        self.path = connection_options.get('PATH', ':memory:')
+        self._database = None
+
+    @property
+    def connection(self):
+        return self.database[0]
+
+    @property
+    def lock(self):
+        return self.database[1]
+
+    @property
+    def database(self):
+        """Return the ``(connection, lock)`` pair, opening the database on first use."""
+        if self._database is None:
+            self._database = get_database(self.path, self.connection_alias)
+        return self._database
+
+    def _from_python(self, value):
+        """Convert a python value to its stored representation."""
+        if isinstance(value, bool):
+            return u'true' if value else u'false'
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, (six.integer_types, float)):
+            return value
+        if isinstance(value, (list, tuple, set)):
+            return [self._from_python(item) for item in value]
+        if value is None:
+            return None
+        return force_text(value)
+
+    def _postings(self, doc_id, field, value, edge_ngram=False):
+        """Yield the ``(field, term, value, doc_id)`` rows for a field value.
+
+        Edge n-gram fields also get a posting for every token prefix,
+        mirroring the ``edgengram_analyzer`` of the Elasticsearch backend.
+        """
+        values = value if isinstance(value, list) else [value]
+        terms = {}
+        for item in values:
+            if item is None:
+                continue
+            if isinstance(item, (six.integer_types, float)):
+                terms[force_text(item)] = item
+                continue
+            normalized = item.strip().lower()
+            if normalized:
+                terms[normalized] = None
+            for token in tokenize(item):
+                terms.setdefault(token, None)
+                if edge_ngram:
+                    for length in range(EDGE_NGRAM_MIN, min(len(token), EDGE_NGRAM_MAX) + 1):
+                        terms.setdefault(token[:length], None)
+        for term, numeric in terms.items():
+            yield (field, term, numeric, doc_id)
+
+    def _delete_documents(self, cursor, doc_ids):
+        for chunk in _chunks(doc_ids):
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute('DELETE FROM postings WHERE doc_id IN (%s)' % placeholders, chunk)
+            cursor.execute('DELETE FROM sort_values WHERE doc_id IN (%s)' % placeholders, chunk)
+            cursor.execute('DELETE FROM documents WHERE id IN (%s)' % placeholders, chunk)
+
+    def update(self, index, iterable, commit=True):
+        documents = []
+        postings = []
+        sort_values = []
+        edge_ngram_fields = set(field.index_fieldname for field in index.fields.values()
+                                if field.field_type == 'edge_ngram')
+
+        for obj in iterable:
+            try:
+                prepped_data = index.full_prepare(obj)
+            except SkipDocument:
+                logger.debug(u'Indexing for object `%s` skipped', obj)
+                continue
+
+            data = dict((key, self._from_python(value)) for key, value in prepped_data.items())
+            doc_id = data[ID]
+            documents.append((doc_id, data[DJANGO_CT], force_text(data[DJANGO_ID]),
+                              json.dumps(data)))
+            for field, value in data.items():
+                if field in (ID, DJANGO_CT, DJANGO_ID):
+                    continue
+                postings.extend(self._postings(doc_id, field, value, field in edge_ngram_fields))
+                if value is not None and not isinstance(value, list):
+                    sort_values.append((doc_id, field, value))
+
+        if not documents:
+            return
+
+        try:
+            with self.lock, self.connection:
+                cursor = self.connection.cursor()
+                self._delete_documents(cursor, [document[0] for document in documents])
+                cursor.executemany('INSERT INTO documents VALUES (?, ?, ?, ?)', documents)
+                cursor.executemany('INSERT INTO postings VALUES (?, ?, ?, ?)', postings)
+                cursor.executemany('INSERT INTO sort_values VALUES (?, ?, ?)', sort_values)
+        except sqlite3.Error:
+            if not self.silently_fail:
+                raise
+            logger.error('Failed to add documents to the embedded index.', exc_info=True)
+
+    def remove(self, obj_or_string, commit=True):
+        doc_id = get_identifier(obj_or_string)
+        try:
+            with self.lock, self.connection:
+                self._delete_documents(self.connection.cursor(), [doc_id])
+        except sqlite3.Error:
+            if not self.silently_fail:
+                raise
+            logger.error('Failed to remove document %s from the embedded index.', doc_id,
+                         exc_info=True)
+
+    def clear(self, models=None, commit=True):
+        try:
+            with self.lock, self.connection:
+                cursor = self.connection.cursor()
+                if not models:
+                    cursor.execute('DELETE FROM postings')
+                    cursor.execute('DELETE FROM sort_values')
+                    cursor.execute('DELETE FROM documents')
+                    return
+                for model in models:
+                    for table in ('postings', 'sort_values'):
+                        cursor.execute('DELETE FROM %s WHERE doc_id IN '
+                                       '(SELECT id FROM documents WHERE django_ct = ?)' % table,
+                                       [get_model_ct(model)])
+                    cursor.execute('DELETE FROM documents WHERE django_ct = ?',
+                                   [get_model_ct(model)])
+        except sqlite3.Error:
+            if not self.silently_fail:
+                raise
+            logger.error('Failed to clear the embedded index.', exc_info=True)
+
+    def _model_cts(self, models=None, limit_to_registered_models=True):
+        if models:
+            return sorted(get_model_ct(model) for model in models)
+        if limit_to_registered_models:
+            return self.build_models_list()
+        return None
+
+    def _posting(self, field, where, params):
+        """Return SQL matching the documents with a posting of ``field`` matching ``where``."""
+        return ('documents.id IN (SELECT doc_id FROM postings WHERE field = ? AND %s)' % where,
+                [field] + list(params))
+
+    def _all_terms(self, field, terms, scores):
+        """Return SQL matching the documents containing every term in ``terms``.
+
+        Each term adds one to the score of the documents containing it.
+        """
+        conditions = [self._posting(field, 'term = ?', [term]) for term in terms]
+        scores.extend(conditions)
+        return self._join(' AND ', conditions, u'0')
+
+    def _join(self, connector, conditions, empty):
+        if not conditions:
+            return (empty, [])
+        params = []
+        for sql, condition_params in conditions:
+            params.extend(condition_params)
+        return ('(%s)' % connector.join(sql for sql, condition_params in conditions), params)
+
+    def _compile_leaf(self, leaf, scores):
+        field, filter_type, value = leaf
+
+        if filter_type == 'auto_query':
+            required, excluded = value
+            conditions = []
+            if required:
+                conditions.append(self._all_terms(field, required, scores))
+            for term in excluded:
+                sql, params = self._posting(field, 'term = ?', [term])
+                conditions.append(('NOT ' + sql, params))
+            return self._join(' AND ', conditions, u'1')
+        if filter_type == 'content':
+            return self._all_terms(field, tokenize(value), scores)
+        if filter_type == 'exact':
+            return self._posting(field, 'term = ?', [force_text(value).strip().lower()])
+        if filter_type == 'in':
+            terms = [force_text(item).strip().lower() for item in value]
+            if not terms:
+                return (u'0', [])
+            return self._posting(field, 'term IN (%s)' % ','.join('?' * len(terms)), terms)
+        if filter_type == 'startswith':
+            prefix = force_text(value).strip().lower()
+            return self._posting(field, 'term >= ? AND term < ?', [prefix, prefix + PREFIX_END])
+        if filter_type in ('contains', 'endswith'):
+            pattern = u'%{0}%' if filter_type == 'contains' else u'%{0}'
+            escaped = force_text(value).strip().lower().replace('%', r'\%').replace('_', r'\_')
+            return self._posting(field, "term LIKE ? ESCAPE '\\'", [pattern.format(escaped)])
+
+        sample = value[0] if filter_type == 'range' else value
+        column = 'value' if isinstance(sample, (six.integer_types, float)) else 'term'
+        if filter_type == 'range':
+            return self._posting(field, '%s BETWEEN ? AND ?' % column, value)
+        operators = {'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+        return self._posting(field, '%s %s ?' % (column, operators[filter_type]), [value])
+
+    def _compile(self, node, scores):
+        """Compile a query node into a ``(sql, params)`` condition on documents."""
+        if node is None:
+            return (u'1', [])
+        if isinstance(node, tuple):
+            return self._compile_leaf(node, scores)
+
+        connector = ' OR ' if node['connector'] == SearchNode.OR else ' AND '
+        sql, params = self._join(connector, [self._compile(child, scores)
+                                             for child in node['children']], u'1')
+        if node['negated']:
+            sql = 'NOT %s' % sql
+        return (sql, params)
+
+    def _process_results(self, rows, result_class):
+        from haystack import connections
+        unified_index = connections[self.connection_alias].get_unified_index()
+        indexed_models = unified_index.get_indexed_models()
+        results = []
+
+        for data, score in rows:
+            app_label, model_name = data[DJANGO_CT].split('.')
+            model = haystack_get_model(app_label, model_name)
+            if not model or model not in indexed_models:
+                continue
+
+            index = unified_index.get_index(model)
+            additional_fields = {}
+            for key, value in data.items():
+                if key in (DJANGO_CT, DJANGO_ID):
+                    continue
+                string_key = str(key)
+                if string_key in index.fields and hasattr(index.fields[string_key], 'convert'):
+                    additional_fields[string_key] = index.fields[string_key].convert(value)
+                else:
+                    additional_fields[string_key] = value
+
+            results.append(result_class(app_label, model_name, data[DJANGO_ID],
+                                        score, **additional_fields))
+        return results
+
+    @log_query
+    def search(self, query_string, sort_by=None, start_offset=0, end_offset=None,
+               models=None, limit_to_registered_models=True, result_class=None,
+               narrow_queries=None, **kwargs):
+        if result_class is None:
+            result_class = SearchResult
+
+        scores = []
+        where, where_params = self._compile(query_string, scores)
+        model_cts = self._model_cts(models, limit_to_registered_models)
+        if model_cts is not None:
+            placeholders = ','.join('?' * len(model_cts))
+            where = '%s AND documents.django_ct IN (%s)' % (where, placeholders)
+            where_params = where_params + model_cts
+        score, score_params = self._join(' + ', scores, u'0')
+
+        joins, join_params, ordering = [], [], []
+        for number, field in enumerate(sort_by or []):
+            alias = 'sort_{0}'.format(number)
+            joins.append('LEFT JOIN sort_values %s ON %s.doc_id = documents.id AND %s.field = ?'
+                         % (alias, alias, alias))
+            join_params.append(field.lstrip('-'))
+            ordering.append('%s.value%s' % (alias, ' DESC' if field.startswith('-') else ''))
+        if not sort_by:
+            ordering.append('score DESC')
+        ordering.append('documents.id')
+
+        limit = -1 if end_offset is None else max(end_offset - start_offset, 0)
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('SELECT COUNT(*) FROM documents WHERE %s' % where, where_params)
+            hits = cursor.fetchone()[0]
+            cursor.execute(
+                'SELECT documents.data, %s AS score FROM documents %s WHERE %s '
+                'ORDER BY %s LIMIT ? OFFSET ?' % (score, ' '.join(joins), where,
+                                                  ', '.join(ordering)),
+                score_params + join_params + where_params + [limit, start_offset])
+            rows = [(json.loads(data), row_score) for data, row_score in cursor.fetchall()]
+
+        return {
+            'results': self._process_results(rows, result_class),
+            'hits': hits,
+            'facets': {},
+            'spelling_suggestion': None,
+        }
+
+    def more_like_this(self, model_instance, additional_query_string=None,
+                       result_class=None, **kwargs):
+        raise NotImplementedError('The embedded search backend does not support '
+                                  'More Like This.')
+
+
+class EmbeddedSearchQuery(BaseSearchQuery):
+    """Compile the ``SQ`` tree into nodes the embedded backend evaluates.
+
+    Leaves are ``(index_fieldname, filter_type, value)`` tuples, inner
+    nodes are dicts holding the connector, negation and children.
+    """
+
+    def __str__(self):
+        return force_text(self.query_filter)
+
+    def matching_all_fragment(self):
+        return None
+
+    def build_query(self):
+        if not self.query_filter:
+            return self.matching_all_fragment()
+        return self._compile(self.query_filter)
+
+    def build_not_query(self, query_string):
+        return u'-%s' % query_string
+
+    def build_exact_query(self, query_string):
+        return query_string
+
+    def _compile(self, node):
+        children = []
+        for child in node.children:
+            if isinstance(child, SearchNode):
+                children.append(self._compile(child))
+            else:
+                expression, value = child
+                field, filter_type = node.split_expression(expression)
+                children.append(self._compile_leaf(field, filter_type, value))
+        return {'connector': node.connector, 'negated': node.negated, 'children': children}
+
+    def _compile_leaf(self, field, filter_type, value):
+        from haystack import connections
+        unified_index = connections[self._using].get_unified_index()
+        if field == 'content':
+            field = unified_index.document_field
+        else:
+            field = unified_index.get_index_fieldname(field)
+
+        if isinstance(value, AutoQuery):
+            required, excluded = [], []
+            for bit in value.prepare(self).split():
+                if bit.startswith('-') and len(bit) > 1:
+                    excluded.extend(tokenize(bit[1:]))
+                else:
+                    required.extend(tokenize(bit))
+            return (field, 'auto_query', (required, excluded))
+
+        if isinstance(value, Not):
+            return {'connector': SearchNode.AND, 'negated': True,
+                    'children': [self._compile_leaf(field, filter_type,
+                                                    value.query_string)]}
+
+        if isinstance(value, Exact) and filter_type == 'content':
+            filter_type = 'exact'
+
+        if isinstance(value, BaseInput):
+            value = value.prepare(self)
+        if hasattr(value, 'values_list'):
+            value = list(value)
+
+        value = self.backend._from_python(value)
+        if filter_type in ('content', 'contains', 'startswith', 'endswith', 'fuzzy'):
+            value = force_text(value)
+            if filter_type == 'fuzzy':
+                filter_type = 'content'
+        return (field, filter_type, value)
+
+
+class EmbeddedSearchEngine(BaseEngine):
+    backend = EmbeddedSearchBackend
+    query = EmbeddedSearchQuery
@@ -0,0 +1,95 @@
+"""Find and repair documents that drifted from the database.
+
+Every document of a ``HashedSearchIndex`` stores a hash of its prepared
+data. The database and the index are walked side by side in primary key
+ranges, comparing the hash of each freshly prepared object with the one
+in the index. Only stale and missing documents are written and only
+orphaned documents are removed, which is a small fraction of the work a
+full rebuild does.
+"""
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from haystack import connections
+from haystack.query import SearchQuerySet
+
+
+logger = logging.getLogger(__name__)
+
+
+class DriftReport(namedtuple('DriftReport', 'model checked stale missing orphaned')):
+    """Drift of the documents of one model."""
+
+    @property
+    def drifted(self):
+        return self.stale + self.missing + self.orphaned
+
+    @property
+    def ratio(self):
+        return float(self.drifted) / self.checked if self.checked else 0.0
+
+
+def _pk_ranges(queryset, batch_size):
+    """Yield (first pk, last pk, objects) for batches of ``queryset`` in pk order.
+
+    The first range starts at zero and the last one is open ended, so the
+    ranges also cover documents whose objects are gone from the database.
+    """
+    lower = 0
+    while True:
+        batch = list(queryset.filter(pk__gte=lower).order_by('pk')[:batch_size])
+        if len(batch) < batch_size:
+            yield lower, None, batch
+            return
+        upper = batch[-1].pk
+        yield lower, upper, batch
+        lower = upper + 1
+
+
+def _indexed_hashes(using, model, lower, upper):
+    sqs = SearchQuerySet(using=using).models(model).filter(object_pk__gte=lower)
+    if upper is not None:
+        sqs = sqs.filter(object_pk__lte=upper)
+    return dict((int(result.object_pk), getattr(result, 'content_hash', None))
+                for result in sqs)
+
+
+def check_index(model, using='default', batch_size=None, repair=True):
+    """Compare the ``model`` documents of ``using`` with the database.
+
+    Stale and missing documents are reindexed and orphaned ones removed,
+    unless ``repair`` is false. Returns a ``DriftReport``.
+    """
+    batch_size = batch_size or settings.ES_REINDEX_BATCHSIZE
+    backend = connections[using].get_backend()
+    index = connections[using].get_unified_index().get_index(model)
+    label = model._meta.label_lower
+
+    checked = stale = missing = orphaned = 0
+    for lower, upper, objects in _pk_ranges(index.index_queryset(using=using), batch_size):
+        indexed = _indexed_hashes(using, model, lower, upper)
+        outdated = []
+        for obj in objects:
+            indexed_hash = indexed.pop(obj.pk, False)
+            if indexed_hash is False:
+                missing += 1
+            elif indexed_hash != index.full_prepare(obj)['content_hash']:
+                stale += 1
+            else:
+                continue
+            outdated.append(obj)
+        checked += len(objects)
+        orphaned += len(indexed)
+
+        if repair:
+            if outdated:
+                backend.update(index, outdated)
+            for pk in indexed:
+                backend.remove('{0}.{1}'.format(label, pk))
+
+    report = DriftReport(label, checked, stale, missing, orphaned)
+    logger.info('Search index drift using=%s model=%s checked=%d stale=%d missing=%d '
+                'orphaned=%d ratio=%.4f', using, label, checked, stale, missing, orphaned,
+                report.ratio)
+    return report
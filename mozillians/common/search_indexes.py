@@ -0,0 +1,28 @@
+import hashlib
+import json
+
+from django.utils.encoding import force_bytes, force_text
+from haystack import indexes
+
+
+def content_hash(prepared_data):
+    """Return a stable hash of a prepared search document."""
+    data = dict((key, value) for key, value in prepared_data.items() if key != 'content_hash')
+    return hashlib.sha1(force_bytes(json.dumps(data, sort_keys=True, default=force_text))
+                        ).hexdigest()
+
+
+class HashedSearchIndex(indexes.SearchIndex):
+    """SearchIndex storing a hash of each document next to it.
+
+    The hash lets ``repair_search_index`` find stale documents without
+    rewriting the whole index, and ``object_pk`` lets it walk the index
+    in primary key ranges.
+    """
+    object_pk = indexes.IntegerField(model_attr='pk')
+    content_hash = indexes.CharField(indexed=False)
+
+    def prepare(self, obj):
+        data = super(HashedSearchIndex, self).prepare(obj)
+        data['content_hash'] = content_hash(data)
+        return data
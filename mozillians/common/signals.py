@@ -1,25 +1,100 @@
+import threading
+
 from django.conf import settings
+from django.db import transaction
 from django.db.models import signals
+from haystack.exceptions import NotHandled
 from haystack.signals import BaseSignalProcessor
-from mozillians.users.models import IdpProfile, UserProfile
+from mozillians.groups.models import Group, GroupMembership
+from mozillians.users.models import IdpProfile, Language, UserProfile
 
 
 # Django Haystack signals
 class SearchSignalProcessor(BaseSignalProcessor):
+    """Keep the search indexes up to date as objects change.
+
+    Profiles, identities and groups are indexed as soon as they are saved.
+    Profile documents also embed language and group names, so changes to
+    languages, memberships and group names queue the affected profiles,
+    which are reindexed in batches once the transaction commits.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._pending = threading.local()
+        super(SearchSignalProcessor, self).__init__(*args, **kwargs)
 
     def setup(self):
         signals.post_save.connect(self.handle_save, sender=UserProfile)
         signals.post_delete.connect(self.handle_delete, sender=UserProfile)
         signals.post_save.connect(self.handle_save, sender=IdpProfile)
         signals.post_delete.connect(self.handle_delete, sender=IdpProfile)
+        signals.post_save.connect(self.handle_save, sender=Group)
+        signals.post_delete.connect(self.handle_delete, sender=Group)
+        signals.pre_save.connect(self.handle_group_pre_save, sender=Group)
+        signals.post_save.connect(self.handle_profile_dependency, sender=GroupMembership)
+        signals.post_delete.connect(self.handle_profile_dependency, sender=GroupMembership)
+        signals.post_save.connect(self.handle_profile_dependency, sender=Language)
+        signals.post_delete.connect(self.handle_profile_dependency, sender=Language)
 
     def handle_save(self, sender, instance, **kwargs):
         # Do not index incomplete profiles and not visible groups.
         if ((isinstance(instance, UserProfile) and instance.is_complete) or (isinstance(instance, IdpProfile))):
             super(SearchSignalProcessor, self).handle_save(sender, instance, **kwargs)
+        elif isinstance(instance, Group):
+            super(SearchSignalProcessor, self).handle_save(sender, instance, **kwargs)
+            if getattr(instance, '_members_search_stale', False):
+                memberships = GroupMembership.objects.filter(group=instance)
+                self.queue_profiles(memberships.values_list('userprofile_id', flat=True))
+
+    def handle_group_pre_save(self, sender, instance, **kwargs):
+        """Flag groups whose members' documents embed a stale name."""
+        if not instance.pk:
+            return
+        old_name = (Group._base_manager.filter(pk=instance.pk)
+                    .values_list('name', flat=True).first())
+        instance._members_search_stale = old_name is not None and old_name != instance.name
+
+    def handle_profile_dependency(self, sender, instance, **kwargs):
+        self.queue_profiles([instance.userprofile_id])
+
+    def queue_profiles(self, pks):
+        """Reindex the profiles in ``pks`` once the current transaction commits."""
+        pending = getattr(self._pending, 'pks', None)
+        if pending is None:
+            pending = self._pending.pks = set()
+        pending.update(pks)
+        # Callbacks of rolled back transactions are discarded, whatever they
+        # queued is picked up by the next flush.
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        pks = getattr(self._pending, 'pks', None)
+        self._pending.pks = None
+        if not pks:
+            return
+
+        pks = sorted(pks)
+        batch_size = settings.ES_REINDEX_BATCHSIZE
+        for using in self.connection_router.for_write(models=[UserProfile]):
+            try:
+                index = self.connections[using].get_unified_index().get_index(UserProfile)
+            except NotHandled:
+                continue
+            backend = self.connections[using].get_backend()
+            for start in range(0, len(pks), batch_size):
+                profiles = (index.index_queryset(using=using)
+                            .filter(pk__in=pks[start:start + batch_size]))
+                backend.update(index, profiles)
 
     def teardown(self):
         signals.post_save.disconnect(self.handle_save, sender=UserProfile)
         signals.post_delete.disconnect(self.handle_delete, sender=UserProfile)
         signals.post_save.disconnect(self.handle_save, sender=IdpProfile)
         signals.post_delete.disconnect(self.handle_delete, sender=IdpProfile)
+        signals.post_save.disconnect(self.handle_save, sender=Group)
+        signals.post_delete.disconnect(self.handle_delete, sender=Group)
+        signals.pre_save.disconnect(self.handle_group_pre_save, sender=Group)
+        signals.post_save.disconnect(self.handle_profile_dependency, sender=GroupMembership)
+        signals.post_delete.disconnect(self.handle_profile_dependency, sender=GroupMembership)
+        signals.post_save.disconnect(self.handle_profile_dependency, sender=Language)
+        signals.post_delete.disconnect(self.handle_profile_dependency, sender=Language)
@@ -16,6 +16,7 @@ from django.utils.safestring import mark_safe
 import bleach
 import markdown as markdown_module
 from django_jinja import library
+from functools32 import lru_cache
 from jinja2 import Markup, contextfunction
 from pytz import timezone, utc
 from sorl.thumbnail import get_thumbnail
@@ -26,6 +27,8 @@ from mozillians.common import utils
 from mozillians.users.managers import PUBLIC
 
 GRAVATAR_URL = 'https://secure.gravatar.com/avatar/{emaildigest}'
+# Number of rendered texts the markdown filter keeps in each process.
+MARKDOWN_CACHE_SIZE = 512
 
 
 @library.global_function
@@ -128,16 +131,28 @@ def redirect(to, *args, **kwargs):
     return HttpResponseRedirect(url)
 
 
+@lru_cache(maxsize=MARKDOWN_CACHE_SIZE)
+def _render_markdown(text, allowed_tags, allowed_attributes, allowed_styles):
+    text = markdown_module.markdown(text, safe_mode='remove')
+    return bleach.clean(text, list(allowed_tags), list(allowed_attributes),
+                        list(allowed_styles), strip=True)
+
+
 @library.filter
 def markdown(text, allowed_tags=None, allowed_attributes=None, allowed_styles=None):
+    """Render ``text`` as sanitized HTML.
+
+    Renderings are kept in a process local LRU cache, so texts shown
+    over and over, like group descriptions, are only rendered once.
+    """
     if not allowed_tags:
         allowed_tags = ['p', 'em', 'li', 'ul', 'a', 'strong', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
     if not allowed_attributes:
         allowed_attributes = ['href']
     if not allowed_styles:
         allowed_styles = []
-    text = markdown_module.markdown(text, safe_mode='remove')
-    clean_text = bleach.clean(text, allowed_tags, allowed_attributes, allowed_styles, strip=True)
+    clean_text = _render_markdown(text, tuple(allowed_tags), tuple(allowed_attributes),
+                                  tuple(allowed_styles))
     return Markup(clean_text)
 
 
@@ -311,6 +326,9 @@ def get_privacy_aware_photo_url(profile, privacy_level, geometry, **kwargs):
     """Returns privacy aware profile photo url."""
 
     if profile.privacy_photo >= privacy_level:
+        photo_url = None if kwargs else profile.get_manifest_photo_url(geometry)
+        if photo_url is not None:
+            return photo_url
         if not profile.photo:
             return gravatar(profile.email, size=geometry)
         return profile.get_photo_thumbnail(geometry, **kwargs).url
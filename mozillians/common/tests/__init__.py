@@ -8,6 +8,7 @@ from django.test import TestCase as BaseTestCase
 from django.test.client import Client
 from django.test.utils import modify_settings, override_settings
 
+from haystack import connections
 from mock import patch
 from nose.tools import make_decorator, ok_
 
@@ -23,6 +24,10 @@ ES_INDEXES = {
     'default': 'mozillians-test',
     'public': 'mozillians-public-test'
 }
+EMBEDDED_SEARCH_CONNECTION = {
+    'ENGINE': 'mozillians.common.search_backends.EmbeddedSearchEngine',
+    'PATH': ':memory:',
+}
 
 
 @override_settings(AUTHENTICATION_BACKENDS=AUTHENTICATION_BACKENDS,
@@ -37,6 +42,16 @@ class TestCase(BaseTestCase):
         yield client
 
 
+def patch_embedded_search():
+    """Return a patcher adding an in memory ``embedded`` haystack connection.
+
+    HAYSTACK_CONNECTIONS is built anew on every access, so the connections
+    of the handler are replaced instead of updated.
+    """
+    connections_info = dict(connections.connections_info, embedded=EMBEDDED_SEARCH_CONNECTION)
+    return patch.object(connections, 'connections_info', connections_info)
+
+
 def requires_login():
     def decorate(func):
         def newfunc(*args, **kwargs):
@@ -26,11 +26,21 @@ class HelperTests(TestCase):
     @patch('mozillians.common.templatetags.helpers.markdown_module.markdown', wraps=markdown)
     @patch('mozillians.common.templatetags.helpers.bleach.clean', wraps=clean)
     def test_markdown(self, clean_mock, markdown_mock):
+        helpers._render_markdown.cache_clear()
         returned_text = helpers.markdown('***foo***', allowed_tags=['strong'])
         eq_(returned_text, '<strong>foo</strong>')
         ok_(clean_mock.called)
         ok_(markdown_mock.called)
 
+    @patch('mozillians.common.templatetags.helpers.markdown_module.markdown', wraps=markdown)
+    def test_markdown_cache(self, markdown_mock):
+        helpers._render_markdown.cache_clear()
+        helpers.markdown(u'*foo*')
+        eq_(helpers.markdown(u'*foo*'), u'<p><em>foo</em></p>')
+        eq_(markdown_mock.call_count, 1)
+        helpers.markdown(u'*foo*', allowed_tags=['em'])
+        eq_(markdown_mock.call_count, 2)
+
     @override_settings(DEBUG=True)
     def test_display_context(self):
         # With DEBUG on,  display_context() inserts the values of context vars
@@ -0,0 +1,155 @@
+from collections import namedtuple
+
+from elasticsearch import ConnectionError, TransportError
+from mock import patch
+from nose.tools import assert_raises, eq_, ok_
+
+from mozillians.common import search
+from mozillians.common.tests import TestCase
+
+
+Credentials = namedtuple('Credentials', ['access_key', 'secret_key', 'token'])
+
+
+@patch.dict('os.environ', {'AWS_ES_REGION': 'us-west-2'})
+@patch('mozillians.common.search.RequestsHttpConnection.perform_request')
+class AWSRequestsHttpConnectionTests(TestCase):
+    def setUp(self):
+        search._credentials = None
+        search._circuit_breakers.clear()
+
+    def tearDown(self):
+        search._credentials = None
+        search._circuit_breakers.clear()
+
+    @patch('mozillians.common.search.boto3.session.Session')
+    def test_credentials_resolved_once(self, session_mock, perform_request_mock):
+        credentials = session_mock.return_value.get_credentials.return_value
+        credentials.get_frozen_credentials.return_value = Credentials('key', 'secret', None)
+        connection = search.AWSRequestsHttpConnection()
+        connection.perform_request('GET', '/')
+        connection.perform_request('GET', '/')
+        search.AWSRequestsHttpConnection().perform_request('GET', '/')
+        eq_(session_mock.call_count, 1)
+        eq_(perform_request_mock.call_count, 3)
+
+    @patch('mozillians.common.search.get_aws_credentials')
+    def test_signer_reused_until_credentials_change(self, credentials_mock,
+                                                    perform_request_mock):
+        frozen = credentials_mock.return_value.get_frozen_credentials
+        frozen.return_value = Credentials('key', 'secret', 'token')
+        connection = search.AWSRequestsHttpConnection()
+        connection.perform_request('GET', '/')
+        auth = connection.session.auth
+        connection.perform_request('GET', '/')
+        ok_(connection.session.auth is auth)
+
+        frozen.return_value = Credentials('key', 'secret', 'refreshed')
+        connection.perform_request('GET', '/')
+        ok_(connection.session.auth is not auth)
+        eq_(connection.session.auth.session_token, 'refreshed')
+
+
+class PooledRequestsHttpConnectionTests(TestCase):
+    def test_pool_size(self):
+        connection = search.PooledRequestsHttpConnection(pool_maxsize=25)
+        eq_(connection.session.get_adapter('https://example.com')._pool_maxsize, 25)
+
+    def test_default_pool(self):
+        connection = search.PooledRequestsHttpConnection()
+        eq_(connection.session.get_adapter('http://example.com')._pool_maxsize, 10)
+
+
+class CircuitBreakerTests(TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = search.CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        ok_(not breaker.is_open)
+        breaker.record_failure()
+        ok_(breaker.is_open)
+
+    @patch('mozillians.common.search.time.time')
+    def test_retries_after_reset_timeout(self, time_mock):
+        time_mock.return_value = 100
+        breaker = search.CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        ok_(breaker.is_open)
+
+        time_mock.return_value = 130
+        ok_(not breaker.is_open)
+        breaker.record_failure()
+        ok_(breaker.is_open)
+
+        time_mock.return_value = 160
+        breaker.record_success()
+        ok_(not breaker.is_open)
+        eq_(breaker.failures, 0)
+
+    @patch('mozillians.common.search.time.time')
+    def test_single_probe_after_reset_timeout(self, time_mock):
+        time_mock.return_value = 100
+        breaker = search.CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        ok_(not breaker.allow_request())
+
+        time_mock.return_value = 130
+        ok_(breaker.allow_request())
+        ok_(breaker.is_open)
+        ok_(not breaker.allow_request())
+
+        breaker.record_success()
+        ok_(breaker.allow_request())
+        ok_(breaker.allow_request())
+
+    @patch('mozillians.common.search.time.time')
+    def test_lost_probe_is_replaced(self, time_mock):
+        time_mock.return_value = 100
+        breaker = search.CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        time_mock.return_value = 130
+        ok_(breaker.allow_request())
+        time_mock.return_value = 159
+        ok_(not breaker.allow_request())
+        time_mock.return_value = 160
+        ok_(breaker.allow_request())
+
+
+@patch('mozillians.common.search.RequestsHttpConnection.perform_request')
+class CircuitBreakerConnectionTests(TestCase):
+    def setUp(self):
+        for name in ('default', 'tmp'):
+            search._circuit_breakers[name] = search.CircuitBreaker(failure_threshold=2,
+                                                                   reset_timeout=30)
+
+    def tearDown(self):
+        search._circuit_breakers.clear()
+
+    def test_open_breaker_skips_network(self, perform_request_mock):
+        perform_request_mock.side_effect = ConnectionError('N/A', 'refused', None)
+        connection = search.PooledRequestsHttpConnection(circuit_breaker='default')
+        failures = search.get_search_failure_count()
+        for i in range(3):
+            with assert_raises(ConnectionError):
+                connection.perform_request('GET', '/')
+        eq_(perform_request_mock.call_count, 2)
+        eq_(search.get_search_failure_count(), failures + 3)
+        ok_(not search.is_search_available())
+
+    def test_breakers_per_connection(self, perform_request_mock):
+        perform_request_mock.side_effect = ConnectionError('N/A', 'refused', None)
+        connection = search.PooledRequestsHttpConnection(circuit_breaker='tmp')
+        for i in range(2):
+            with assert_raises(ConnectionError):
+                connection.perform_request('GET', '/')
+        ok_(not search.is_search_available('tmp'))
+        ok_(search.is_search_available())
+
+    def test_client_errors_are_not_failures(self, perform_request_mock):
+        perform_request_mock.side_effect = TransportError(404, 'not found')
+        connection = search.PooledRequestsHttpConnection(circuit_breaker='default')
+        for i in range(3):
+            with assert_raises(TransportError):
+                connection.perform_request('GET', '/')
+        ok_(search.is_search_available())
@@ -0,0 +1,120 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from haystack import connections
+from haystack.query import SQ, SearchQuerySet
+from nose.tools import eq_, ok_, raises
+
+from mozillians.common.search_backends import EmbeddedSearchBackend
+from mozillians.common.tests import TestCase, patch_embedded_search
+from mozillians.users.managers import MOZILLIANS, PRIVATE, PUBLIC
+from mozillians.users.models import IdpProfile
+from mozillians.users.tests import UserFactory
+
+
+class EmbeddedSearchBackendTests(TestCase):
+    def setUp(self):
+        self.connections_patch = patch_embedded_search()
+        self.connections_patch.start()
+        self.backend = connections['embedded'].get_backend()
+        self.index = connections['embedded'].get_unified_index().get_index(IdpProfile)
+        self.backend.clear()
+
+        self.foo = self._idp('foo@example.com', 'foo', PUBLIC)
+        self.bar = self._idp('bar@example.com', 'foobar', MOZILLIANS)
+        self.private = self._idp('private@example.com', 'private', PRIVATE)
+        self.backend.update(self.index, IdpProfile.objects.all())
+
+    def tearDown(self):
+        self.backend.clear()
+        self.connections_patch.stop()
+        connections.thread_local.connections.pop('embedded', None)
+
+    def _idp(self, email, username, privacy):
+        user = UserFactory.create()
+        return IdpProfile.objects.create(profile=user.userprofile, email=email,
+                                         username=username, privacy=privacy)
+
+    def _search(self):
+        return SearchQuerySet(using='embedded').models(IdpProfile)
+
+    def _pks(self, sqs):
+        return set(int(result.pk) for result in sqs)
+
+    def test_exact_field_match(self):
+        eq_(self._pks(self._search().filter(iusername='foo')), set([self.foo.pk]))
+
+    def test_privacy_filter(self):
+        sqs = self._search().filter(SQ(iemail='example.com', privacy_iemail__gte=MOZILLIANS))
+        eq_(self._pks(sqs), set([self.foo.pk, self.bar.pk]))
+
+    def test_auto_query(self):
+        sqs = self._search().auto_query('example.com -private')
+        eq_(self._pks(sqs), set([self.foo.pk, self.bar.pk]))
+
+    def test_startswith(self):
+        sqs = self._search().filter(iusername__startswith='foo')
+        eq_(self._pks(sqs), set([self.foo.pk, self.bar.pk]))
+
+    def test_stored_fields_and_count(self):
+        sqs = self._search().filter(iemail='foo@example.com')
+        eq_(sqs.count(), 1)
+        result = sqs[0]
+        eq_(result.iusername, 'foo')
+        eq_(result.privacy_iemail, PUBLIC)
+
+    def test_remove(self):
+        self.backend.remove(self.foo)
+        eq_(self._pks(self._search().all()), set([self.bar.pk, self.private.pk]))
+
+    def test_clear_models(self):
+        self.backend.clear(models=[IdpProfile])
+        ok_(not self._search().all().count())
+
+    def test_order_by(self):
+        sqs = self._search().order_by('iusername')
+        eq_([result.iusername for result in sqs], ['foo', 'foobar', 'private'])
+        sqs = self._search().order_by('-iusername')
+        eq_([result.iusername for result in sqs[1:]], ['foobar', 'foo'])
+
+    def test_slice_and_count(self):
+        sqs = self._search().filter(iemail='example.com').order_by('iusername')
+        eq_([result.iusername for result in sqs[1:2]], ['foobar'])
+        eq_(sqs.count(), 3)
+
+    @raises(NotImplementedError)
+    def test_more_like_this(self):
+        self.backend.more_like_this(self.foo)
+
+    def test_clear_silently_fail(self):
+        database = self.backend._database
+        broken = sqlite3.connect(':memory:')
+        broken.close()
+        self.backend._database = (broken, threading.RLock())
+        try:
+            self.backend.silently_fail = True
+            self.backend.clear()
+            self.backend.silently_fail = False
+            with self.assertRaises(sqlite3.Error):
+                self.backend.clear()
+        finally:
+            self.backend._database = database
+            self.backend.silently_fail = True
+
+
+class EmbeddedSearchPathTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_index_directory_created_on_first_use(self):
+        path = os.path.join(self.directory, 'index', 'default.sqlite3')
+        backend = EmbeddedSearchBackend('lazy', PATH=path)
+        ok_(not os.path.exists(os.path.dirname(path)))
+        backend.clear()
+        ok_(os.path.exists(path))
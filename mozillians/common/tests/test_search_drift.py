@@ -0,0 +1,56 @@
+from haystack import connections
+from haystack.query import SearchQuerySet
+from nose.tools import eq_, ok_
+
+from mozillians.common.search_drift import check_index
+from mozillians.common.search_indexes import content_hash
+from mozillians.common.tests import TestCase, patch_embedded_search
+from mozillians.groups.models import Group
+from mozillians.groups.tests import GroupFactory
+
+
+class CheckIndexTests(TestCase):
+    def setUp(self):
+        self.connections_patch = patch_embedded_search()
+        self.connections_patch.start()
+        self.backend = connections['embedded'].get_backend()
+        self.backend.clear()
+        self.index = connections['embedded'].get_unified_index().get_index(Group)
+        self.groups = [GroupFactory.create(name='group {0}'.format(i)) for i in range(5)]
+        self.backend.update(self.index, self.groups)
+
+    def tearDown(self):
+        self.backend.clear()
+        self.connections_patch.stop()
+        connections.thread_local.connections.pop('embedded', None)
+
+    def _indexed_names(self):
+        return sorted(result.name for result in SearchQuerySet(using='embedded').models(Group))
+
+    def test_no_drift(self):
+        report = check_index(Group, using='embedded', batch_size=2)
+        eq_(report.checked, 5)
+        eq_(report.drifted, 0)
+        eq_(report.ratio, 0.0)
+
+    def test_repairs_stale_missing_and_orphaned(self):
+        Group.objects.filter(pk=self.groups[0].pk).update(name='renamed')
+        self.backend.remove(self.groups[1])
+        orphan = GroupFactory.create(name='orphan')
+        self.backend.update(self.index, [orphan])
+        Group.objects.filter(pk=orphan.pk).delete()
+
+        report = check_index(Group, using='embedded', batch_size=2)
+        eq_((report.checked, report.stale, report.missing, report.orphaned), (5, 1, 1, 1))
+        eq_(self._indexed_names(), sorted(['renamed'] + [g.name for g in self.groups[1:]]))
+        eq_(check_index(Group, using='embedded', batch_size=2).drifted, 0)
+
+    def test_dry_run_leaves_index_alone(self):
+        Group.objects.filter(pk=self.groups[0].pk).update(name='renamed')
+        report = check_index(Group, using='embedded', repair=False)
+        eq_(report.stale, 1)
+        ok_('renamed' not in self._indexed_names())
+
+    def test_content_hash_ignores_itself(self):
+        data = {'name': 'foo', 'content_hash': 'x'}
+        eq_(content_hash(data), content_hash({'name': 'foo'}))
@@ -0,0 +1,75 @@
+from haystack import connections
+from haystack.query import SearchQuerySet
+from mock import Mock
+from nose.tools import eq_, ok_
+
+from mozillians.common.signals import SearchSignalProcessor
+from mozillians.common.tests import TestCase, patch_embedded_search
+from mozillians.groups.models import Group, GroupMembership
+from mozillians.groups.tests import GroupFactory
+from mozillians.users.models import Language, UserProfile
+from mozillians.users.tests import UserFactory
+
+
+class SearchSignalProcessorTests(TestCase):
+    def setUp(self):
+        self.connections_patch = patch_embedded_search()
+        self.connections_patch.start()
+        connections['embedded'].get_backend().clear()
+        router = Mock()
+        router.for_write.return_value = ['embedded']
+        self.processor = SearchSignalProcessor(connections, router)
+        self.profile = UserFactory.create().userprofile
+
+    def tearDown(self):
+        self.processor.teardown()
+        connections['embedded'].get_backend().clear()
+        self.connections_patch.stop()
+        connections.thread_local.connections.pop('embedded', None)
+
+    def _found(self, model, term):
+        sqs = SearchQuerySet(using='embedded').models(model).filter(content=term)
+        return [int(result.pk) for result in sqs]
+
+    def test_language_change_reindexes_profile(self):
+        Language.objects.create(userprofile=self.profile, code='fr')
+        self.processor.flush()
+        eq_(self._found(UserProfile, 'french'), [self.profile.pk])
+
+    def test_group_rename_reindexes_members(self):
+        group = GroupFactory.create(name='webdev', visible=True)
+        group.add_member(self.profile)
+        self.processor.flush()
+        eq_(self._found(UserProfile, 'webdev'), [self.profile.pk])
+
+        group.name = 'webcompat'
+        group.save()
+        eq_(self._found(Group, 'webcompat'), [group.pk])
+        self.processor.flush()
+        eq_(self._found(UserProfile, 'webcompat'), [self.profile.pk])
+        eq_(self._found(UserProfile, 'webdev'), [])
+
+    def test_all_groups_indexed(self):
+        group = GroupFactory.create(name='webdev', visible=False)
+        group.add_member(self.profile, status=GroupMembership.PENDING)
+        self.processor.flush()
+        eq_(self._found(UserProfile, 'webdev'), [self.profile.pk])
+
+    def test_group_description_change_does_not_queue_members(self):
+        group = GroupFactory.create(visible=True)
+        group.add_member(self.profile)
+        self.processor.flush()
+
+        group.description = 'A new description'
+        group.save()
+        ok_(not getattr(self.processor._pending, 'pks', None))
+
+    def test_group_delete_reindexes_members(self):
+        group = GroupFactory.create(name='webdev', visible=True)
+        group.add_member(self.profile)
+        self.processor.flush()
+
+        group.delete()
+        eq_(self._found(Group, 'webdev'), [])
+        self.processor.flush()
+        eq_(self._found(UserProfile, 'webdev'), [])
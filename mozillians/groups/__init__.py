@@ -5,3 +5,6 @@ default_app_config = 'mozillians.groups.GroupConfig'
 
 class GroupConfig(AppConfig):
     name = 'mozillians.groups'
+
+    def ready(self):
+        import mozillians.groups.signals # noqa
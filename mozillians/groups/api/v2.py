@@ -2,25 +2,28 @@ from django.shortcuts import get_object_or_404
 
 import django_filters
 from rest_framework import serializers
+from rest_framework.decorators import detail_route
 from rest_framework.response import Response
 
-from mozillians.api.v2.viewsets import NoCacheReadOnlyModelViewSet
-from mozillians.common.templatetags.helpers import absolutify
-from mozillians.common.urlresolvers import reverse
+from mozillians.api.v2.cache import cache_response
+from mozillians.api.v2.pagination import KeysetPagination
+from mozillians.api.v2.serializers import SparseFieldsetsMixin
+from mozillians.api.v2.viewsets import CachedReadOnlyModelViewSet
+from mozillians.groups.lookup import get_alias_index
 from mozillians.groups.models import Group, GroupMembership, Skill
+from mozillians.users.managers import PUBLIC
 from mozillians.users.models import UserProfile
 
 
 class GroupMemberSerializer(serializers.HyperlinkedModelSerializer):
-    privacy = serializers.CharField(source='get_privacy_groups_display')
     username = serializers.ReadOnlyField(source='user.username')
 
     class Meta:
         model = UserProfile
-        fields = ('privacy', 'username', '_url')
+        fields = ('username', '_url')
 
 
-class GroupSerializer(serializers.HyperlinkedModelSerializer):
+class GroupSerializer(SparseFieldsetsMixin, serializers.HyperlinkedModelSerializer):
     member_count = serializers.ReadOnlyField()
     url = serializers.SerializerMethodField()
 
@@ -29,11 +32,12 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('id', 'url', 'name', 'member_count', '_url')
 
     def get_url(self, obj):
-        return absolutify(reverse('groups:show_group', kwargs={'url': obj.url}))
+        # Group pages are not served anymore, see mozillians/urls.py.
+        return None
 
 
 class GroupDetailedSerializer(GroupSerializer):
-    members = GroupMemberSerializer(many=True, source='_members')
+    members = serializers.HyperlinkedIdentityField(view_name='group-members')
     curator = serializers.SerializerMethodField()
 
     class Meta:
@@ -43,13 +47,13 @@ class GroupDetailedSerializer(GroupSerializer):
         fields = ('id', 'name', 'description', 'curator', 'curators',
                   'irc_channel', 'website', 'wiki',
                   'members_can_leave', 'accepting_new_members',
-                  'new_member_criteria', 'functional_area', 'members', 'url')
+                  'new_member_criteria', 'functional_area', 'member_count', 'members', 'url')
 
     def get_curator(self, obj):
         return obj.curators.all().first()
 
 
-class SkillSerializer(serializers.HyperlinkedModelSerializer):
+class SkillSerializer(SparseFieldsetsMixin, serializers.HyperlinkedModelSerializer):
     member_count = serializers.ReadOnlyField()
     url = serializers.SerializerMethodField()
 
@@ -58,24 +62,33 @@ class SkillSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('id', 'url', 'name', 'member_count', '_url')
 
     def get_url(self, obj):
-        return absolutify(reverse('groups:show_skill', kwargs={'url': obj.url}))
+        # Skill pages are not served anymore, see mozillians/urls.py.
+        return None
 
 
 class SkillDetailedSerializer(SkillSerializer):
-    members = GroupMemberSerializer(many=True, source='_members')
 
     class Meta:
         model = Skill
-        fields = ('id', 'name', 'members', 'url')
+        fields = ('id', 'name', 'url')
 
 
-class GroupFilter(django_filters.FilterSet):
+class AliasNameFilterSet(django_filters.FilterSet):
+    """FilterSet matching ``name__icontains`` through the alias name index."""
+    name__icontains = django_filters.CharFilter(method='filter_name_icontains')
+
+    def filter_name_icontains(self, queryset, name, value):
+        group_ids = get_alias_index(self._meta.model.ALIAS_MODEL).search(value)
+        return queryset.filter(pk__in=group_ids)
+
+
+class GroupFilter(AliasNameFilterSet):
     curator = django_filters.CharFilter(method='filter_curator')
 
     class Meta:
         model = Group
         fields = {
-            'name': ['exact', 'icontains'],
+            'name': ['exact'],
             'functional_area': ['exact'],
             'curators': ['exact'],
             'curator': ['exact'],
@@ -87,16 +100,28 @@ class GroupFilter(django_filters.FilterSet):
         return queryset.filter(curators=value)
 
 
-class SkillFilter(django_filters.FilterSet):
+class SkillFilter(AliasNameFilterSet):
 
     class Meta:
         model = Skill
         fields = {
-            'name': ['exact', 'icontains']
+            'name': ['exact']
         }
 
 
-class GroupViewSet(NoCacheReadOnlyModelViewSet):
+class MemberFilter(django_filters.FilterSet):
+    username = django_filters.CharFilter(name='user__username')
+
+    class Meta:
+        model = UserProfile
+        fields = ('username', 'is_vouched')
+
+
+class MemberPagination(KeysetPagination):
+    ordering = ('user__username',)
+
+
+class GroupViewSet(CachedReadOnlyModelViewSet):
     """
     Returns a list of Mozillians groups respecting authorization
     levels and privacy settings.
@@ -106,22 +131,44 @@ class GroupViewSet(NoCacheReadOnlyModelViewSet):
     ordering = 'name'
     ordering_fields = ('name', 'member_count')
     filter_class = GroupFilter
+    pagination_class = KeysetPagination
+    cache_namespaces = ('groups',)
 
     def get_queryset(self):
         queryset = Group.objects.filter(visible=True)
         return queryset
 
+    @cache_response
     def retrieve(self, request, pk):
         group = get_object_or_404(self.get_queryset(), pk=pk)
-
-        # Exclude members in 'pending' state
-        group._members = group.members.filter(privacy_groups__gte=self.request.privacy_level,
-                                              groupmembership__status=GroupMembership.MEMBER)
         serializer = GroupDetailedSerializer(group, context={'request': self.request})
         return Response(serializer.data)
 
+    @detail_route(methods=['get'])
+    @cache_response
+    def members(self, request, pk):
+        """Return the members of a visible group, ordered by username.
 
-class SkillViewSet(NoCacheReadOnlyModelViewSet):
+        Pending members are left out and anonymous requests only get the
+        profiles the users list shows them.
+        """
+        group = get_object_or_404(self.get_queryset(), pk=pk)
+        queryset = (UserProfile.objects.complete()
+                    .filter(groupmembership__group=group,
+                            groupmembership__status=GroupMembership.MEMBER)
+                    .select_related('user'))
+        if request.privacy_level == PUBLIC:
+            queryset = queryset.public()
+        queryset = MemberFilter(request.query_params, queryset=queryset, request=request).qs
+
+        # The members are ordered by username, not by the ordering of the viewset.
+        paginator = MemberPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = GroupMemberSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class SkillViewSet(CachedReadOnlyModelViewSet):
     """
     Returns a list of Mozillians skills respecting authorization
     levels and privacy settings.
@@ -130,9 +177,10 @@ class SkillViewSet(NoCacheReadOnlyModelViewSet):
     serializer_class = SkillSerializer
     ordering_fields = ('name',)
     filter_class = SkillFilter
+    cache_namespaces = ('skills',)
 
+    @cache_response
     def retrieve(self, request, pk):
         skill = get_object_or_404(self.queryset, pk=pk)
-        skill._members = skill.members.filter(privacy_groups__gte=self.request.privacy_level)
         serializer = SkillDetailedSerializer(skill, context={'request': self.request})
         return Response(serializer.data)
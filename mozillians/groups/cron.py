@@ -0,0 +1,13 @@
+from cronjobs import register
+
+from mozillians.groups.models import Group
+
+
+@register
+def update_group_member_counts():
+    """Recount the members of all groups.
+
+    Signals keep the counts up to date, this repairs the changes made
+    without them, like QuerySet.update() on memberships.
+    """
+    Group.update_member_counts()
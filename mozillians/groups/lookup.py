@@ -0,0 +1,127 @@
+"""In-memory name lookup for group and skill aliases.
+
+Autocompletion used to filter aliases with ``name LIKE '%term%'``, which
+scans every alias row on each keystroke. Instead every process keeps a
+sorted list of alias names for prefix lookups and a trigram index for
+substring lookups. The index is rebuilt lazily when the version stored
+in the cache changes, which happens whenever an alias is saved or
+deleted.
+"""
+import bisect
+import threading
+import uuid
+
+from django.core.cache import cache
+
+
+CACHE_KEY = 'groups:alias-index-version:{0}'
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def trigrams(value):
+    return set(value[i:i + 3] for i in range(len(value) - 2))
+
+
+class AliasNameIndex(object):
+    """Prefix and trigram index over the names of an alias model."""
+
+    def __init__(self, aliases):
+        # aliases is an iterable of (name, group_id) pairs.
+        self.entries = sorted((name.lower(), group_id) for name, group_id in aliases)
+        self.names = [name for name, group_id in self.entries]
+        self.words = sorted((word, position) for position, name in enumerate(self.names)
+                            for word in set(name.split()))
+        self.trigrams = {}
+        for position, name in enumerate(self.names):
+            for trigram in trigrams(name):
+                self.trigrams.setdefault(trigram, []).append(position)
+
+    def _prefix_positions(self, term):
+        start = bisect.bisect_left(self.names, term)
+        end = bisect.bisect_left(self.names, term + u'\uffff', lo=start)
+        return range(start, end)
+
+    def _word_prefix_positions(self, term):
+        start = bisect.bisect_left(self.words, (term,))
+        end = bisect.bisect_left(self.words, (term + u'\uffff',), lo=start)
+        return sorted(set(position for word, position in self.words[start:end]))
+
+    def _substring_positions(self, term):
+        # Terms too short for trigrams are looked for in every name.
+        if len(term) < 3:
+            return [position for position, name in enumerate(self.names) if term in name]
+
+        # Every name containing term is in the posting list of each of its
+        # trigrams, so checking the rarest one is enough.
+        candidates = None
+        for trigram in trigrams(term):
+            positions = self.trigrams.get(trigram)
+            if not positions:
+                return []
+            if candidates is None or len(positions) < len(candidates):
+                candidates = positions
+        return [position for position in candidates if term in self.names[position]]
+
+    def search(self, term, prefix=False):
+        """Return the ids of groups with an alias matching ``term``.
+
+        Aliases containing ``term`` match, or only aliases starting with
+        it when ``prefix`` is set.
+        """
+        term = term.strip().lower()
+        if not term:
+            return []
+        if prefix:
+            return self._group_ids(self._prefix_positions(term))
+        return self._group_ids(self._substring_positions(term))
+
+    def autocomplete(self, term):
+        """Return the ids of groups with an alias matching a typed ``term``.
+
+        Like search(), except that one and two letter terms only match
+        aliases with a word starting with them, which keeps the first
+        keystrokes from matching most aliases.
+        """
+        term = term.strip().lower()
+        if not term:
+            return []
+        if len(term) < 3:
+            return self._group_ids(self._word_prefix_positions(term))
+        return self._group_ids(self._substring_positions(term))
+
+    def _group_ids(self, positions):
+        group_ids = []
+        seen = set()
+        for position in positions:
+            group_id = self.entries[position][1]
+            if group_id not in seen:
+                seen.add(group_id)
+                group_ids.append(group_id)
+        return group_ids
+
+
+def _cache_key(alias_model):
+    return CACHE_KEY.format(alias_model._meta.label_lower)
+
+
+def get_alias_index(alias_model):
+    """Return an up to date AliasNameIndex for ``alias_model``."""
+    version = cache.get(_cache_key(alias_model)) or invalidate_alias_index(alias_model)
+
+    index = _indexes.get(alias_model)
+    if index is None or index[0] != version:
+        with _indexes_lock:
+            index = _indexes.get(alias_model)
+            if index is None or index[0] != version:
+                aliases = alias_model.objects.values_list('name', 'alias_id')
+                index = (version, AliasNameIndex(aliases.iterator()))
+                _indexes[alias_model] = index
+    return index[1]
+
+
+def invalidate_alias_index(alias_model):
+    """Mark the alias index of ``alias_model`` as stale in every process."""
+    version = uuid.uuid4().hex
+    cache.set(_cache_key(alias_model), version, timeout=None)
+    return version
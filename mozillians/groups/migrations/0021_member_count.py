@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_member_counts(apps, schema_editor):
+    Group = apps.get_model('groups', 'Group')
+    GroupMembership = apps.get_model('groups', 'GroupMembership')
+
+    counts = (GroupMembership.objects.filter(group=OuterRef('pk'), status='member').order_by()
+              .values('group').annotate(count=Count('pk')).values('count'))
+    Group.objects.update(member_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0))
+
+
+def backwards(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0020_auto_20171206_0641'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False, db_index=True),
+        ),
+        migrations.RunPython(populate_member_counts, backwards),
+    ]
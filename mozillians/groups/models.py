@@ -2,15 +2,16 @@ from autoslug.fields import AutoSlugField
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy as _lazy
 from mozillians.common.templatetags.helpers import get_object_or_none
 from mozillians.common.urlresolvers import reverse
 from mozillians.common.utils import absolutify
-from mozillians.groups.managers import (GroupBaseManager, GroupManager,
-                                        GroupQuerySet)
+from mozillians.groups.lookup import get_alias_index, invalidate_alias_index
+from mozillians.groups.managers import GroupBaseManager, GroupQuerySet
 from mozillians.groups.templatetags.helpers import slugify
 
 
@@ -43,11 +44,10 @@ class GroupBase(models.Model):
         return self.name
 
     @classmethod
-    def search(cls, query):
-        query = query.lower()
-        results = cls.objects.filter(aliases__name__contains=query)
-        results = results.distinct()
-        return results
+    def search(cls, query, prefix=False):
+        """Return groups with an alias containing (or starting with) query."""
+        group_ids = get_alias_index(cls.ALIAS_MODEL).search(query, prefix=prefix)
+        return cls.objects.filter(pk__in=group_ids)
 
     def save(self, *args, **kwargs):
         """Override save method."""
@@ -68,6 +68,7 @@ class GroupBase(models.Model):
             map(lambda x: self.add_member(x), group.members.all())
             group.aliases.update(alias=self)
             group.delete()
+        invalidate_alias_index(self.ALIAS_MODEL)
 
     def user_can_leave(self, userprofile):
         """Checks if a member of a group can leave."""
@@ -263,8 +264,21 @@ class Group(GroupBase):
     is_access_group = models.BooleanField(default=False,
                                           choices=ACCESS_GROUP_TYPES,
                                           verbose_name='Is this an access group?')
+    # Maintained by the mozillians.groups signals and the
+    # update_group_member_counts cron job.
+    member_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
 
-    objects = GroupManager.from_queryset(GroupQuerySet)()
+    objects = GroupQuerySet.as_manager()
+
+    @classmethod
+    def update_member_counts(cls, pks=None):
+        """Recount the members of the groups ``pks``, or of all groups, in one UPDATE."""
+        counts = (GroupMembership.objects
+                  .filter(group=OuterRef('pk'), status=GroupMembership.MEMBER).order_by()
+                  .values('group').annotate(count=Count('pk')).values('count'))
+        groups = cls.objects.all() if pks is None else cls.objects.filter(pk__in=pks)
+        return groups.update(
+            member_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0))
 
     @classmethod
     def get_functional_areas(cls):
@@ -286,8 +300,8 @@ class Group(GroupBase):
         return cls.get_non_functional_areas(curators__isnull=False)
 
     @classmethod
-    def search(cls, query):
-        return super(Group, cls).search(query).visible()
+    def search(cls, query, prefix=False):
+        return super(Group, cls).search(query, prefix=prefix).visible()
 
     def merge_groups(self, group_list):
         for membership in GroupMembership.objects.filter(group__in=group_list):
@@ -299,6 +313,7 @@ class Group(GroupBase):
         for group in group_list:
             group.aliases.update(alias=self)
             group.delete()
+        invalidate_alias_index(self.ALIAS_MODEL)
 
     def add_member(self, userprofile, status=GroupMembership.MEMBER, inviter=None):
         """
@@ -1,9 +1,11 @@
 from haystack import indexes
 
+from mozillians.common.search_indexes import HashedSearchIndex
+
 from mozillians.groups.models import Group
 
 
-class GroupIndex(indexes.SearchIndex, indexes.Indexable):
+class GroupIndex(HashedSearchIndex, indexes.Indexable):
     """User Profile Search Index."""
     # Primary field of the index
     text = indexes.CharField(document=True, use_template=True)
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models import signals
+from django.dispatch import receiver
+
+from mozillians.groups.lookup import invalidate_alias_index
+from mozillians.groups.models import Group, GroupAlias, GroupMembership, SkillAlias
+
+
+@receiver(signals.post_save, sender=GroupAlias, dispatch_uid='group_alias_changed_sig')
+@receiver(signals.post_delete, sender=GroupAlias, dispatch_uid='group_alias_deleted_sig')
+@receiver(signals.post_save, sender=SkillAlias, dispatch_uid='skill_alias_changed_sig')
+@receiver(signals.post_delete, sender=SkillAlias, dispatch_uid='skill_alias_deleted_sig')
+def alias_changed_sig(sender, **kwargs):
+    # Invalidate right away for this process and again once the change is
+    # committed, so other processes can't rebuild from uncommitted data.
+    invalidate_alias_index(sender)
+    transaction.on_commit(lambda: invalidate_alias_index(sender))
+
+
+@receiver(signals.post_save, sender=GroupMembership, dispatch_uid='membership_changed_sig')
+@receiver(signals.post_delete, sender=GroupMembership, dispatch_uid='membership_deleted_sig')
+def membership_changed_sig(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Group.update_member_counts([instance.group_id])
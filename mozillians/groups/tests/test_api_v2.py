@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test.utils import override_settings
+
+from nose.tools import eq_, ok_
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from mozillians.common.tests import TestCase
+from mozillians.groups.api.v2 import GroupViewSet
+from mozillians.groups.models import GroupMembership
+from mozillians.groups.tests import GroupFactory
+from mozillians.users.managers import MOZILLIANS, PUBLIC
+from mozillians.users.tests import UserFactory
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MembersTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def _call(self, viewset_class, action, pk, url='/', privacy_level=MOZILLIANS):
+        request = Request(self.factory.get(url))
+        request.privacy_level = privacy_level
+        viewset = viewset_class(request=request, format_kwarg=None, action=action)
+        return getattr(viewset, action)(request, pk=pk)
+
+    def _usernames(self, response):
+        return [member['username'] for member in response.data['results']]
+
+    def test_group_members(self):
+        group = GroupFactory.create()
+        users = sorted([UserFactory.create() for i in range(3)], key=lambda u: u.username)
+        for user in users:
+            group.add_member(user.userprofile)
+        pending = UserFactory.create()
+        group.add_member(pending.userprofile, status=GroupMembership.PENDING)
+
+        response = self._call(GroupViewSet, 'members', group.pk, '/?limit=2')
+        eq_(self._usernames(response), [user.username for user in users[:2]])
+        ok_(response.data['next'])
+
+        response = self._call(GroupViewSet, 'members', group.pk, response.data['next'])
+        eq_(self._usernames(response), [users[2].username])
+        eq_(response.data['next'], None)
+
+    def test_group_members_filter(self):
+        group = GroupFactory.create()
+        user = UserFactory.create()
+        group.add_member(user.userprofile)
+        group.add_member(UserFactory.create().userprofile)
+
+        response = self._call(GroupViewSet, 'members', group.pk,
+                              '/?username={0}'.format(user.username))
+        eq_(self._usernames(response), [user.username])
+
+    def test_group_members_public(self):
+        group = GroupFactory.create()
+        public = UserFactory.create(userprofile={'privacy_full_name': PUBLIC})
+        group.add_member(public.userprofile)
+        group.add_member(UserFactory.create().userprofile)
+
+        response = self._call(GroupViewSet, 'members', group.pk, privacy_level=PUBLIC)
+        eq_(self._usernames(response), [public.username])
+
+    def test_members_non_existent(self):
+        self.assertRaises(Http404, self._call, GroupViewSet, 'members', -1)
+
+    def test_retrieve_links_members(self):
+        group = GroupFactory.create()
+        group.add_member(UserFactory.create().userprofile)
+
+        response = self._call(GroupViewSet, 'retrieve', group.pk)
+        eq_(response.data['member_count'], 1)
+        ok_(response.data['members'].endswith('/groups/{0}/members/'.format(group.pk)))
+
+    def test_retrieve_fields(self):
+        group = GroupFactory.create()
+
+        response = self._call(GroupViewSet, 'retrieve', group.pk, '/?fields=name,member_count')
+        eq_(response.data, {'name': group.name, 'member_count': 0})
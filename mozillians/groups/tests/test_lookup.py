@@ -0,0 +1,49 @@
+from nose.tools import eq_
+
+from mozillians.common.tests import TestCase
+from mozillians.groups.lookup import AliasNameIndex
+from mozillians.groups.models import Group
+from mozillians.groups.tests import GroupAliasFactory, GroupFactory
+
+
+class AliasNameIndexTests(TestCase):
+    def setUp(self):
+        self.index = AliasNameIndex([(u'Firefox OS', 1), (u'firefox', 2), (u'rust', 3),
+                                     (u'servo and rust', 4), (u'fire', 1)])
+
+    def test_substring(self):
+        eq_(self.index.search('rust'), [3, 4])
+        eq_(self.index.search('FOX'), [2, 1])
+
+    def test_short_substring(self):
+        eq_(self.index.search('s'), [1, 3, 4])
+        eq_(self.index.search('ox'), [2, 1])
+
+    def test_autocomplete(self):
+        eq_(self.index.autocomplete('s'), [4])
+        eq_(self.index.autocomplete('OS'), [1])
+        eq_(self.index.autocomplete('ust'), [3, 4])
+
+    def test_prefix(self):
+        eq_(self.index.search('fire', prefix=True), [1, 2])
+        eq_(self.index.search('ust', prefix=True), [])
+
+    def test_no_match(self):
+        eq_(self.index.search('webextensions'), [])
+        eq_(self.index.search('  '), [])
+
+
+class GroupAliasLookupTests(TestCase):
+    def test_alias_changes_are_visible(self):
+        group = GroupFactory.create(name='localization', visible=True)
+        eq_(list(Group.search('l10n')), [])
+        alias = GroupAliasFactory.create(alias=group, name='l10n')
+        eq_(list(Group.search('l10n')), [group])
+        alias.delete()
+        eq_(list(Group.search('l10n')), [])
+
+    def test_merged_aliases(self):
+        group = GroupFactory.create(name='webdev', visible=True)
+        other = GroupFactory.create(name='web development', visible=True)
+        group.merge_groups([other])
+        eq_(list(Group.search('development')), [group])
@@ -301,3 +301,33 @@ class GroupManagerTests(TestCase):
             group.add_member(u.userprofile, status=GroupMembership.PENDING_TERMS)
 
         eq_(Group.objects.get(name='foo').member_count, 3)
+
+    def test_group_member_count_status_change(self):
+        group = GroupFactory.create(name='foo', accepting_new_members=Group.REVIEWED)
+        user = UserFactory.create()
+        group.add_member(user.userprofile, status=GroupMembership.PENDING)
+        eq_(Group.objects.get(name='foo').member_count, 0)
+
+        group.add_member(user.userprofile)
+        eq_(Group.objects.get(name='foo').member_count, 1)
+
+        group.remove_member(user.userprofile, status=GroupMembership.PENDING)
+        eq_(Group.objects.get(name='foo').member_count, 0)
+
+    def test_update_member_counts(self):
+        group = GroupFactory.create(name='foo')
+        other = GroupFactory.create(name='bar')
+        for u in UserFactory.create_batch(2):
+            group.add_member(u.userprofile)
+        GroupMembership.objects.filter(group=group).update(status=GroupMembership.PENDING)
+        Group.objects.filter(pk=other.pk).update(member_count=5)
+
+        eq_(Group.update_member_counts(), 2)
+        eq_(Group.objects.get(name='foo').member_count, 0)
+        eq_(Group.objects.get(name='bar').member_count, 0)
+
+    def test_member_count_without_join(self):
+        GroupFactory.create(name='foo')
+        with self.assertNumQueries(1):
+            eq_(Group.objects.get(name='foo').member_count, 0)
+        ok_('JOIN' not in str(Group.objects.order_by('-member_count').query))
@@ -1,4 +1,3 @@
-from dal import autocomplete
 from django.conf.urls import url
 from django.contrib.auth.decorators import login_required
 from mozillians.groups import views as group_views
@@ -36,7 +35,7 @@ urlpatterns = [
         name='toggle_skill_subscription'),
     # Django-autocomplete-light urls
     url(r'group-autocomplete/$',
-        login_required(autocomplete.Select2QuerySetView.as_view(model=Group)),
+        login_required(group_views.GroupsAutocomplete.as_view(model=Group)),
         name='group-autocomplete'),
     url('^groups/search/$', group_views.search,
         dict(searched_object=Group), name='search_groups'),
@@ -19,6 +19,7 @@ from mozillians.common.templatetags.helpers import (get_object_or_none,
                                                     urlparams)
 from mozillians.common.urlresolvers import reverse
 from mozillians.groups import forms
+from mozillians.groups.lookup import get_alias_index
 from mozillians.groups.models import Group, GroupMembership, Invite, Skill
 from mozillians.users.models import UserProfile
 
@@ -508,7 +509,21 @@ def group_edit(request, url=None):
     return render(request, 'groups/edit_group.html', context)
 
 
-class SkillsAutocomplete(autocomplete.Select2QuerySetView):
+class AliasSearchMixin(object):
+    """Match autocomplete terms through the alias name index."""
+
+    def get_queryset(self):
+        if not self.q:
+            return super(AliasSearchMixin, self).get_queryset()
+        group_ids = get_alias_index(self.model.ALIAS_MODEL).autocomplete(self.q)
+        return self.model.objects.filter(pk__in=group_ids)
+
+
+class GroupsAutocomplete(AliasSearchMixin, autocomplete.Select2QuerySetView):
+    pass
+
+
+class SkillsAutocomplete(AliasSearchMixin, autocomplete.Select2QuerySetView):
 
     def has_add_permission(self, request):
         """Return True if the user has the permission to add a model."""
@@ -8,16 +8,21 @@ import django_filters
 import happyforms
 from dal import autocomplete
 from django import forms
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import UploadedFile
+from django.db.models import Q
 from django.forms.models import BaseInlineFormSet, inlineformset_factory
 from django.forms.widgets import RadioSelect
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy as _lazy
 from haystack.forms import ModelSearchForm as HaystackSearchForm
-from haystack.query import SQ, SearchQuerySet
+from haystack.models import SearchResult
+from haystack.query import SQ
+from mozillians.common.search import is_search_available
 from mozillians.common.urlresolvers import reverse
 from mozillians.phonebook.models import Invite
+from mozillians.phonebook.search import FallbackSearchResults
 from mozillians.phonebook.validators import validate_username
 from mozillians.phonebook.widgets import MonthYearWidget
 from mozillians.users import get_languages_for_locale
@@ -326,6 +331,8 @@ class PhonebookSearchForm(HaystackSearchForm):
         self.country = kwargs.pop('country', '')
         self.region = kwargs.pop('region', '')
         self.city = kwargs.pop('city', '')
+        # Set when the results come from the database fallback search.
+        self.degraded = False
         super(PhonebookSearchForm, self).__init__(*args, **kwargs)
 
     def clean(self, *args, **kwargs):
@@ -373,19 +380,26 @@ class PhonebookSearchForm(HaystackSearchForm):
             # Anonymous and un-vouched users cannot search groups
             search_models = [UserProfile, IdpProfile]
 
+        def fallback():
+            self.degraded = True
+            return self.fallback_search(search_term, privacy_level)
+
+        if not is_search_available():
+            return fallback()
+
         if location_query:
             for k in location_query.keys():
                 if k.startswith('privacy_'):
                     location_query[k] = privacy_level
-            return SearchQuerySet().filter(**location_query).load_all() or self.no_query_found()
+            return FallbackSearchResults(self.searchqueryset.filter(**location_query).load_all(),
+                                         fallback)
 
         # Calling super will handle with form validation and
-        # will also search in fields that are not explicit queried through `text`
+        # will also search in fields that are not explicit queried through `text`.
+        # Querysets are returned unevaluated, an empty result is rendered just
+        # like no_query_found() and checking for it would cost an extra ES query.
         sqs = super(PhonebookSearchForm, self).search().models(*search_models)
 
-        if not sqs:
-            return self.no_query_found()
-
         query = SQ()
         q_args = {}
         # Profiles Search
@@ -414,4 +428,32 @@ class PhonebookSearchForm(HaystackSearchForm):
             # Filter only visible groups.
             query.add(SQ(**{'visible': True}), SQ.OR)
 
-        return sqs.filter(query).load_all()
+        return FallbackSearchResults(sqs.filter(query).load_all(), fallback)
+
+    def fallback_search(self, search_term, privacy_level):
+        """Search profiles in the database while Elasticsearch is unavailable.
+
+        Only usernames, full names and locations are matched, respecting
+        their privacy, and at most SEARCH_FALLBACK_LIMIT profiles are
+        returned as search results.
+        """
+        profiles = UserProfile.objects.complete()
+        if search_term:
+            profiles = profiles.filter(
+                Q(user__username__icontains=search_term)
+                | Q(full_name__icontains=search_term, privacy_full_name__gte=privacy_level))
+        for field, value in (('country', self.country), ('region', self.region),
+                             ('city', self.city)):
+            if value:
+                profiles = profiles.filter(**{
+                    '{0}__name__iexact'.format(field): value,
+                    'privacy_{0}__gte'.format(field): privacy_level
+                })
+
+        results = []
+        profiles = profiles.select_related('user').order_by('full_name', 'pk')
+        for profile in profiles[:settings.SEARCH_FALLBACK_LIMIT]:
+            result = SearchResult('users', 'userprofile', profile.pk, 0)
+            result._object = profile
+            results.append(result)
+        return results
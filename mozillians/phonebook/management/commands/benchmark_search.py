@@ -0,0 +1,260 @@
+import random
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template.defaultfilters import slugify
+from django.test import RequestFactory
+
+from cities_light.models import City, Country, Region
+from haystack import connections
+from haystack.constants import DEFAULT_ALIAS
+
+from mozillians.groups.models import Group, GroupMembership
+from mozillians.phonebook.forms import PhonebookSearchForm
+from mozillians.phonebook.search import StoredCardSearchQuerySet
+from mozillians.users.managers import EMPLOYEES, MOZILLIANS, PRIVATE, PUBLIC
+from mozillians.users.models import IdpProfile, UserProfile
+
+
+FIRST_NAMES = ['Anna', 'Ben', 'Chloe', 'Dimitris', 'Elena', 'Farah', 'Giorgos', 'Hiro',
+               'Ines', 'Jonas', 'Kofi', 'Lena', 'Mateo', 'Nadia', 'Oscar', 'Priya',
+               'Quentin', 'Rosa', 'Sven', 'Tariq', 'Uma', 'Viktor', 'Wen', 'Yara']
+LAST_NAMES = ['Anderson', 'Brown', 'Costa', 'Dubois', 'Eriksson', 'Fischer', 'Garcia',
+              'Haddad', 'Ivanova', 'Jensen', 'Kim', 'Lopez', 'Muller', 'Nakamura', 'Okafor',
+              'Papadopoulos', 'Rossi', 'Schmidt', 'Tanaka', 'Weber']
+WORDS = ['firefox', 'rust', 'localization', 'community', 'security', 'privacy', 'webextensions',
+         'documentation', 'quality', 'design', 'marketing', 'servo', 'android', 'devtools',
+         'accessibility', 'events', 'education', 'support', 'infrastructure', 'research']
+LOCATIONS = [('Greece', 'GR', 'Attika', 'Athens'),
+             ('Germany', 'DE', 'Berlin', 'Berlin'),
+             ('Brazil', 'BR', 'Sao Paulo', 'Campinas'),
+             ('India', 'IN', 'Karnataka', 'Bangalore'),
+             ('Kenya', 'KE', 'Nairobi', 'Nairobi')]
+PRIVACY_LEVELS = [PRIVATE, EMPLOYEES, MOZILLIANS, PUBLIC]
+VIEWER_NAMES = {PRIVATE: 'superuser', EMPLOYEES: 'staff', MOZILLIANS: 'vouched',
+                PUBLIC: 'anonymous'}
+PROFILE_PRIVACY_FIELDS = ['privacy_full_name', 'privacy_email', 'privacy_bio',
+                          'privacy_timezone', 'privacy_country', 'privacy_region',
+                          'privacy_city']
+QUERY_TYPES = ['name', 'username', 'email', 'bio', 'location', 'miss']
+DEFAULT_MIX = 'name:4,username:2,email:1,bio:2,location:1,miss:1'
+RESULTS_PER_PAGE = getattr(settings, 'HAYSTACK_SEARCH_RESULTS_PER_PAGE', 20)
+
+
+def percentile(timings, fraction):
+    """Return the ``fraction`` percentile of sorted ``timings``."""
+    index = min(len(timings) - 1, int(round(fraction * (len(timings) - 1))))
+    return timings[index]
+
+
+class Command(BaseCommand):
+    help = ('Index a synthetic corpus into a haystack connection and replay phonebook '
+            'searches at every viewer privacy level, reporting latency and throughput.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--using', default='tmp',
+                            help='Haystack connection to index into and search (default: tmp).')
+        parser.add_argument('--profiles', type=int, default=1000,
+                            help='Number of synthetic profiles.')
+        parser.add_argument('--groups', type=int, default=100,
+                            help='Number of synthetic groups.')
+        parser.add_argument('--queries', type=int, default=200,
+                            help='Number of queries per viewer privacy level.')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Weighted query types, e.g. "{0}".'.format(DEFAULT_MIX))
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Random seed for the corpus and the queries.')
+        parser.add_argument('--keep', action='store_true', default=False,
+                            help='Keep the corpus in the database and the index.')
+
+    def handle(self, *args, **options):
+        using = options['using']
+        if using not in connections.connections_info:
+            raise CommandError('Unknown haystack connection "{0}".'.format(using))
+        if using == DEFAULT_ALIAS:
+            self.stdout.write('Warning: the corpus is indexed into the default connection.')
+
+        self.random = random.Random(options['seed'])
+        self.prefix = 'bench{0}'.format(options['seed'])
+        mix = self._parse_mix(options['mix'])
+
+        # Indexing is done in bulk below, keep the signal processor out of the way.
+        signal_processor = apps.get_app_config('haystack').signal_processor
+        signal_processor.teardown()
+        try:
+            with transaction.atomic():
+                corpus = self._create_corpus(options['profiles'], options['groups'])
+                self._index(using, corpus)
+                try:
+                    self._replay(using, corpus, mix, options['queries'])
+                finally:
+                    if not options['keep']:
+                        self._unindex(using, corpus)
+                        transaction.set_rollback(True)
+        finally:
+            signal_processor.setup()
+
+    def _parse_mix(self, value):
+        mix = []
+        for item in value.split(','):
+            name, _, weight = item.partition(':')
+            name = name.strip()
+            if name not in QUERY_TYPES:
+                raise CommandError('Unknown query type "{0}", choose from {1}.'.format(
+                    name, ', '.join(QUERY_TYPES)))
+            try:
+                mix.extend([name] * int(weight or 1))
+            except ValueError:
+                raise CommandError('Invalid weight for query type "{0}".'.format(name))
+        return mix
+
+    def _create_corpus(self, num_profiles, num_groups):
+        locations = []
+        for country_name, code, region_name, city_name in LOCATIONS:
+            country = Country.objects.get_or_create(name=country_name, code2=code)[0]
+            region = Region.objects.get_or_create(name=region_name, country=country)[0]
+            city = City.objects.get_or_create(name=city_name, region=region,
+                                              country=country)[0]
+            locations.append((country, region, city))
+
+        User.objects.bulk_create([
+            User(username='{0}-{1}'.format(self.prefix, i),
+                 email='{0}.{1}@example.com'.format(self.prefix, i))
+            for i in range(num_profiles)
+        ])
+        users = User.objects.filter(username__startswith=self.prefix + '-')
+
+        profiles = []
+        for user in users:
+            country, region, city = self.random.choice(locations)
+            profile = UserProfile(
+                user=user,
+                full_name=u'{0} {1}'.format(self.random.choice(FIRST_NAMES),
+                                            self.random.choice(LAST_NAMES)),
+                bio=u' '.join(self.random.sample(WORDS, 6)),
+                timezone='Europe/Athens',
+                country=country, region=region, city=city,
+                is_vouched=self.random.random() < 0.8
+            )
+            for field in PROFILE_PRIVACY_FIELDS:
+                setattr(profile, field, self.random.choice(PRIVACY_LEVELS))
+            profiles.append(profile)
+        UserProfile.objects.bulk_create(profiles)
+        profiles = list(UserProfile.objects.filter(user__in=users).select_related('user'))
+
+        idps = []
+        for profile in profiles:
+            for i in range(self.random.randint(0, 2)):
+                idps.append(IdpProfile(
+                    profile=profile,
+                    type=IdpProfile.PROVIDER_GITHUB,
+                    email='{0}+{1}@example.org'.format(profile.user.username, i),
+                    username='{0}-gh{1}'.format(profile.user.username, i),
+                    primary=i == 0,
+                    privacy=self.random.choice(PRIVACY_LEVELS)
+                ))
+        IdpProfile.objects.bulk_create(idps)
+
+        Group.objects.bulk_create([
+            Group(name=u'{0} {1} {2}'.format(self.prefix, self.random.choice(WORDS), i),
+                  url=slugify(u'{0}-{1}'.format(self.prefix, i)),
+                  description=u' '.join(self.random.sample(WORDS, 8)),
+                  visible=self.random.random() < 0.9)
+            for i in range(num_groups)
+        ])
+
+        return {
+            'profiles': profiles,
+            'idps': list(IdpProfile.objects.filter(profile__in=profiles)),
+            'groups': list(Group.objects.filter(name__startswith=self.prefix)),
+            'locations': locations,
+            'viewers': self._create_viewers(),
+        }
+
+    def _create_viewers(self):
+        """Return a user for every viewer privacy level."""
+        viewers = {PUBLIC: AnonymousUser()}
+        for level in (PRIVATE, EMPLOYEES, MOZILLIANS):
+            user = User.objects.create(username='{0}-viewer-{1}'.format(self.prefix, level),
+                                       is_superuser=level == PRIVATE)
+            UserProfile.objects.create(user=user, full_name=u'Viewer {0}'.format(level),
+                                       is_vouched=True)
+            viewers[level] = user
+
+        staff = Group.objects.get_or_create(name='staff')[0]
+        GroupMembership.objects.create(userprofile=viewers[EMPLOYEES].userprofile, group=staff,
+                                       status=GroupMembership.MEMBER)
+        return viewers
+
+    def _indexed(self, using, corpus):
+        unified_index = connections[using].get_unified_index()
+        for model, objects in ((UserProfile, corpus['profiles']),
+                               (IdpProfile, corpus['idps']),
+                               (Group, corpus['groups'])):
+            yield unified_index.get_index(model), objects
+
+    def _index(self, using, corpus):
+        backend = connections[using].get_backend()
+        batch_size = settings.ES_REINDEX_BATCHSIZE
+        start = time.time()
+        count = 0
+        for index, objects in self._indexed(using, corpus):
+            for offset in range(0, len(objects), batch_size):
+                backend.update(index, objects[offset:offset + batch_size])
+            count += len(objects)
+        self.stdout.write('Indexed {0} documents into "{1}" in {2:.2f}s.'.format(
+            count, using, time.time() - start))
+
+    def _unindex(self, using, corpus):
+        backend = connections[using].get_backend()
+        for index, objects in self._indexed(using, corpus):
+            for obj in objects:
+                backend.remove(obj)
+
+    def _query(self, query_type, corpus):
+        """Return the search form arguments for a ``query_type`` query."""
+        profile = self.random.choice(corpus['profiles'])
+        if query_type == 'name':
+            return {'q': profile.full_name.split()[self.random.randint(0, 1)]}
+        if query_type == 'username':
+            return {'q': profile.user.username}
+        if query_type == 'email':
+            return {'q': profile.user.email}
+        if query_type == 'bio':
+            return {'q': self.random.choice(WORDS)}
+        if query_type == 'location':
+            country, region, city = self.random.choice(corpus['locations'])
+            return {'q': '', 'country': country.name, 'city': city.name}
+        return {'q': 'zz{0}'.format(self.random.randint(0, 10 ** 6))}
+
+    def _replay(self, using, corpus, mix, num_queries):
+        factory = RequestFactory()
+        self.stdout.write('{0:>12} {1:>8} {2:>9} {3:>9} {4:>9} {5:>10}'.format(
+            'viewer', 'queries', 'p50 ms', 'p95 ms', 'p99 ms', 'queries/s'))
+
+        for level in PRIVACY_LEVELS:
+            viewer = corpus['viewers'][level]
+            timings = []
+            for i in range(num_queries):
+                kwargs = self._query(self.random.choice(mix), corpus)
+                data = {'q': kwargs.pop('q')}
+                request = factory.get('/search/', data)
+                request.user = viewer
+
+                start = time.time()
+                form = PhonebookSearchForm(data=data, request=request,
+                                           searchqueryset=StoredCardSearchQuerySet(using=using),
+                                           **kwargs)
+                if form.is_valid():
+                    list(form.search()[:RESULTS_PER_PAGE])
+                timings.append(time.time() - start)
+
+            timings.sort()
+            self.stdout.write('{0:>12} {1:>8} {2:>9.2f} {3:>9.2f} {4:>9.2f} {5:>10.1f}'.format(
+                VIEWER_NAMES[level], num_queries,
+                percentile(timings, 0.5) * 1000, percentile(timings, 0.95) * 1000,
+                percentile(timings, 0.99) * 1000, num_queries / sum(timings)))
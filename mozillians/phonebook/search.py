@@ -0,0 +1,76 @@
+import json
+
+from haystack.query import SearchQuerySet
+
+from mozillians.common.search import get_search_failure_count
+
+
+def get_search_card(result, privacy_level):
+    """Return the stored result card of a profile search hit.
+
+    Returns None for hits without a stored card, e.g. documents indexed
+    before cards were introduced, which have to be rendered from the
+    database instead.
+    """
+    cards = getattr(result, 'search_card', None)
+    if not cards:
+        return None
+    return json.loads(cards).get(str(privacy_level))
+
+
+class StoredCardSearchQuerySet(SearchQuerySet):
+    """SearchQuerySet which renders profiles from their stored result cards.
+
+    ``load_all()`` only loads the objects of hits without a stored card,
+    so result pages made of profiles need no database query at all.
+    """
+
+    def post_process_results(self, results):
+        if not self._load_all:
+            return super(StoredCardSearchQuerySet, self).post_process_results(results)
+
+        stored = [result for result in results if getattr(result, 'search_card', None)]
+        if not stored:
+            return super(StoredCardSearchQuerySet, self).post_process_results(results)
+
+        stored_ids = set(id(result) for result in stored)
+        loaded_ids = set(id(result) for result in
+                         super(StoredCardSearchQuerySet, self).post_process_results(
+                             [result for result in results if id(result) not in stored_ids]))
+        return [result for result in results
+                if id(result) in stored_ids or id(result) in loaded_ids]
+
+
+class FallbackSearchResults(object):
+    """Lazy search results replaced by a fallback when Elasticsearch fails.
+
+    Haystack turns failed searches into empty results. When a request of
+    the wrapped SearchQuerySet fails, the results of ``fallback`` are
+    used instead, from then on. Supports what Paginator needs.
+    """
+
+    def __init__(self, searchqueryset, fallback):
+        self.searchqueryset = searchqueryset
+        self.fallback = fallback
+        self.fallback_results = None
+
+    def _evaluate(self, func):
+        if self.fallback_results is None:
+            failures = get_search_failure_count()
+            value = func(self.searchqueryset)
+            if get_search_failure_count() == failures:
+                return value
+            self.fallback_results = self.fallback()
+        return func(self.fallback_results)
+
+    def count(self):
+        return self._evaluate(len)
+
+    def __len__(self):
+        return self._evaluate(len)
+
+    def __getitem__(self, k):
+        return self._evaluate(lambda results: results[k])
+
+    def __iter__(self):
+        return iter(self._evaluate(list))
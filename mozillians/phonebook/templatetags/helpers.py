@@ -8,6 +8,7 @@ from django.utils.translation import get_language
 from django_jinja import library
 import jinja2
 
+from mozillians.phonebook.search import get_search_card
 from mozillians.users import get_languages_for_locale
 from mozillians.users.models import IdpProfile
 
@@ -30,6 +31,9 @@ def search_result(context, result):
     return d
 
 
+library.global_function(get_search_card)
+
+
 @library.global_function
 def get_mozillian_years(userprofile):
     if userprofile.date_mozillian:
@@ -1,12 +1,19 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
 from django.forms import model_to_dict
+from django.test.client import RequestFactory
 
+from haystack import connections
+from haystack.query import SearchQuerySet
 from mock import MagicMock, patch
 from nose.tools import eq_, ok_
 
-from mozillians.common.tests import TestCase
+from mozillians.common import search
+from mozillians.common.tests import TestCase, patch_embedded_search
 from mozillians.phonebook.forms import (ContributionForm, EmailForm, ExternalAccountForm,
-                                        filter_vouched)
-from mozillians.users.models import UserProfile
+                                        PhonebookSearchForm, filter_vouched)
+from mozillians.users.managers import MOZILLIANS, PUBLIC
+from mozillians.users.models import IdpProfile, UserProfile
 from mozillians.users.tests import UserFactory
 
 
@@ -87,3 +94,92 @@ class ExternalAccountFormTests(TestCase):
                                         'privacy': 3})
             form.is_valid()
         ok_('identifier' in form.errors)
+
+
+class PhonebookSearchFormTests(TestCase):
+    def setUp(self):
+        self.connections_patch = patch_embedded_search()
+        self.connections_patch.start()
+        self.backend = connections['embedded'].get_backend()
+        self.backend.clear()
+
+        user = UserFactory.create()
+        IdpProfile.objects.create(profile=user.userprofile, email='foo@example.com',
+                                  username='foo', privacy=PUBLIC)
+        index = connections['embedded'].get_unified_index().get_index(IdpProfile)
+        self.backend.update(index, IdpProfile.objects.all())
+
+    def tearDown(self):
+        self.backend.clear()
+        self.connections_patch.stop()
+        connections.thread_local.connections.pop('embedded', None)
+
+    def _search_page(self, data, **kwargs):
+        """Run the search the way PhonebookSearchView does, returning the backend calls."""
+        request = RequestFactory().get('/search/', data)
+        request.user = AnonymousUser()
+        with patch.object(self.backend, 'search', wraps=self.backend.search) as search_mock:
+            form = PhonebookSearchForm(data, request=request,
+                                       searchqueryset=SearchQuerySet(using='embedded'), **kwargs)
+            ok_(form.is_valid())
+            results = form.search()
+            eq_(search_mock.call_count, 0)
+
+            page = Paginator(results, 20).page(1)
+            object_list = list(page.object_list)
+            page.paginator.count
+        return object_list, search_mock.call_count
+
+    def test_search_costs_one_query_plus_count(self):
+        object_list, calls = self._search_page({'q': 'foo'})
+        eq_([result.object.email for result in object_list], ['foo@example.com'])
+        eq_(calls, 2)
+
+    def test_search_no_results(self):
+        object_list, calls = self._search_page({'q': 'nobody'})
+        eq_(object_list, [])
+        eq_(calls, 2)
+
+    def test_location_search(self):
+        _, calls = self._search_page({'q': ''}, country='Greece')
+        eq_(calls, 2)
+
+    @patch('mozillians.phonebook.forms.is_search_available', return_value=False)
+    def test_fallback_search_when_search_unavailable(self, available_mock):
+        hidden = UserFactory.create(userprofile={'full_name': 'Foo Private',
+                                                 'privacy_full_name': MOZILLIANS})
+        visible = UserFactory.create(userprofile={'full_name': 'Foo Public',
+                                                  'privacy_full_name': PUBLIC})
+        request = RequestFactory().get('/search/', {'q': 'foo'})
+        request.user = AnonymousUser()
+        form = PhonebookSearchForm({'q': 'foo'}, request=request,
+                                   searchqueryset=SearchQuerySet(using='embedded'))
+        ok_(form.is_valid())
+        with patch.object(self.backend, 'search') as search_mock:
+            results = form.search()
+        ok_(form.degraded)
+        ok_(not search_mock.called)
+        eq_([result.object for result in results], [visible.userprofile])
+        ok_(hidden.userprofile not in [result.object for result in results])
+
+    def test_fallback_search_when_search_fails(self):
+        profile = UserFactory.create(userprofile={'full_name': 'Foo Public',
+                                                  'privacy_full_name': PUBLIC}).userprofile
+
+        def failed_search(*args, **kwargs):
+            # What a silently failing Elasticsearch backend does.
+            search._add_search_failure()
+            return {'results': [], 'hits': 0}
+
+        with patch.object(self.backend, 'search', side_effect=failed_search):
+            request = RequestFactory().get('/search/', {'q': 'foo'})
+            request.user = AnonymousUser()
+            form = PhonebookSearchForm({'q': 'foo'}, request=request,
+                                       searchqueryset=SearchQuerySet(using='embedded'))
+            ok_(form.is_valid())
+            results = form.search()
+            ok_(not form.degraded)
+            page = Paginator(results, 20).page(1)
+        ok_(form.degraded)
+        eq_(page.paginator.count, 1)
+        eq_([result.object for result in page.object_list], [profile])
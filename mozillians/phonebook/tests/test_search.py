@@ -0,0 +1,65 @@
+from haystack import connections
+from nose.tools import eq_
+
+from mozillians.common.tests import TestCase, patch_embedded_search
+from mozillians.groups.models import Group
+from mozillians.groups.tests import GroupFactory
+from mozillians.phonebook.search import StoredCardSearchQuerySet, get_search_card
+from mozillians.users.managers import MOZILLIANS, PRIVATE, PUBLIC
+from mozillians.users.models import UserProfile
+from mozillians.users.tests import UserFactory
+
+
+class StoredCardSearchQuerySetTests(TestCase):
+    def setUp(self):
+        self.connections_patch = patch_embedded_search()
+        self.connections_patch.start()
+        self.backend = connections['embedded'].get_backend()
+        self.backend.clear()
+        unified_index = connections['embedded'].get_unified_index()
+        self.profile = UserFactory.create(userprofile={'full_name': 'Joe Doe',
+                                                       'privacy_full_name': MOZILLIANS,
+                                                       'privacy_email': PRIVATE}).userprofile
+        self.group = GroupFactory.create(name='Joe fans', visible=True)
+        self.backend.update(unified_index.get_index(UserProfile), [self.profile])
+        self.backend.update(unified_index.get_index(Group), [self.group])
+
+    def tearDown(self):
+        self.backend.clear()
+        self.connections_patch.stop()
+        connections.thread_local.connections.pop('embedded', None)
+
+    def _search(self):
+        return StoredCardSearchQuerySet(using='embedded').filter(content='joe').load_all()
+
+    def test_card_is_masked_per_privacy_level(self):
+        result = StoredCardSearchQuerySet(using='embedded').models(UserProfile)[0]
+        username = self.profile.user.username
+
+        private = get_search_card(result, PRIVATE)
+        eq_(private['display_name'], 'Joe Doe')
+        eq_(private['email'], self.profile.email)
+        eq_(private['username'], username)
+        eq_(private['city'], 'Athens')
+
+        public = get_search_card(result, PUBLIC)
+        eq_(public['display_name'], '')
+        eq_(public['email'], '')
+        eq_(public['username'], username)
+
+    def test_missing_card(self):
+        result = StoredCardSearchQuerySet(using='embedded').models(UserProfile)[0]
+        result.search_card = None
+        eq_(get_search_card(result, PUBLIC), None)
+
+    def test_load_all_skips_profiles(self):
+        with self.assertNumQueries(1):
+            results = list(self._search())
+        eq_(sorted(result.model_name for result in results), ['group', 'userprofile'])
+        group_result = [result for result in results if result.model_name == 'group'][0]
+        eq_(group_result.object, self.group)
+
+    def test_load_all_without_cards(self):
+        results = list(StoredCardSearchQuerySet(using='embedded').models(Group)
+                       .filter(content='joe').load_all())
+        eq_([result.object for result in results], [self.group])
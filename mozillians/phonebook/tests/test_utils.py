@@ -1,10 +1,18 @@
-from nose.tools import eq_
+import json
+
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from mock import Mock, patch
+from nose.tools import eq_, ok_
 
 from mozillians.common.tests import TestCase
+from mozillians.common.urlresolvers import reverse
+from mozillians.users.managers import MOZILLIANS, PRIVATE, PUBLIC
 from mozillians.users.models import IdpProfile, UserProfile
 from mozillians.users.tests import UserFactory
 
-from mozillians.phonebook.utils import get_profile_link_by_email
+from mozillians.phonebook.utils import get_profile_link_by_email, get_search_suggestions
 
 
 class UtilsTests(TestCase):
@@ -26,3 +34,52 @@ class UtilsTests(TestCase):
         profile = UserProfile.objects.get(pk=user.userprofile.pk)
         link = get_profile_link_by_email(user.email)
         eq_(link, profile.get_absolute_url())
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SearchSuggestionsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _results(self, *results):
+        sqs = Mock()
+        sqs.models.return_value.filter.return_value = list(results)
+        return sqs
+
+    @patch('mozillians.phonebook.utils.SearchQuerySet')
+    def test_short_prefix(self, sqs_mock):
+        eq_(get_search_suggestions(' j ', PUBLIC), [])
+        ok_(not sqs_mock.called)
+
+    @patch('mozillians.phonebook.utils.SearchQuerySet')
+    def test_private_full_name_hidden(self, sqs_mock):
+        sqs_mock.return_value = self._results(
+            Mock(username='jdoe', full_name='Joe Doe', privacy_full_name=PUBLIC,
+                 search_card=None),
+            Mock(username='jane', full_name='Jane Private', privacy_full_name=PRIVATE,
+                 search_card=None))
+        suggestions = get_search_suggestions('Jo', MOZILLIANS)
+        eq_([suggestion['username'] for suggestion in suggestions], ['jdoe', 'jane'])
+        eq_([suggestion['full_name'] for suggestion in suggestions], ['Joe Doe', ''])
+        eq_(suggestions[0]['url'], reverse('phonebook:profile_view', args=['jdoe']))
+
+    @patch('mozillians.phonebook.utils.SearchQuerySet')
+    def test_cached_per_prefix(self, sqs_mock):
+        sqs_mock.return_value = self._results(
+            Mock(username='jdoe', full_name='Joe Doe', privacy_full_name=PUBLIC,
+                 search_card=None))
+        get_search_suggestions('jo', PUBLIC)
+        get_search_suggestions('JO ', PUBLIC)
+        eq_(sqs_mock.call_count, 1)
+        get_search_suggestions('jo', MOZILLIANS)
+        eq_(sqs_mock.call_count, 2)
+
+    @patch('mozillians.phonebook.utils.SearchQuerySet')
+    def test_photo_from_search_card(self, sqs_mock):
+        cards = {str(MOZILLIANS): {'photo_url': '/media/jdoe.jpg'},
+                 str(PUBLIC): {'photo_url': '/media/default.png'}}
+        sqs_mock.return_value = self._results(
+            Mock(username='jdoe', full_name='Joe Doe', privacy_full_name=PUBLIC,
+                 search_card=json.dumps(cards)))
+        eq_(get_search_suggestions('jo', PUBLIC)[0]['photo_url'], '/media/default.png')
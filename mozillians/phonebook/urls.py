@@ -24,6 +24,8 @@ urlpatterns = [
     # Haystack search
     url(r'^search/$', allow_public(phonebook_views.PhonebookSearchView.as_view()),
         name='haystack_search'),
+    url(r'^search/suggestions/$', phonebook_views.search_suggestions,
+        name='search_suggestions'),
     url(r'^country/(?P<country>[A-Za-z0-9 \.\,]+)/$',
         phonebook_views.PhonebookSearchView.as_view(), name='list_country'),
     url(r'^country/(?P<country>[A-Za-z0-9 \.\,]+)/city/(?P<city>.+)/$',
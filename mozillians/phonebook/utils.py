@@ -1,13 +1,63 @@
 import datetime
+import hashlib
 
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import force_bytes
+from haystack.query import SQ, SearchQuerySet
+
+from mozillians.common.urlresolvers import reverse
 from mozillians.phonebook.models import Invite
-from mozillians.users.models import IdpProfile
+from mozillians.phonebook.search import get_search_card
+from mozillians.users.models import ProfileEmail, UserProfile
 
 
 def get_profile_link_by_email(email):
-    try:
-        idp_profile = IdpProfile.objects.get(email=email, primary=True)
-    except (IdpProfile.DoesNotExist, IdpProfile.MultipleObjectsReturned):
+    emails = list(ProfileEmail.objects.filter(email=email.strip().lower(),
+                                              source=ProfileEmail.SOURCE_IDENTITY,
+                                              primary=True).select_related('profile__user')[:2])
+    if len(emails) != 1:
         return ''
-    else:
-        return idp_profile.profile.get_absolute_url()
+    return emails[0].profile.get_absolute_url()
+
+
+def get_search_suggestions(prefix, privacy_level):
+    """Return profile suggestions for a search-as-you-type prefix.
+
+    Matches are looked up on the edge n-gram fields of the profile index
+    and built from stored fields and result cards only, so no database
+    query is needed.
+    Full names are only matched and returned when the requester's
+    privacy level allows it. Results are cached for a short time per
+    prefix and privacy level.
+    """
+    prefix = prefix.strip().lower()
+    if len(prefix) < settings.SEARCH_SUGGESTIONS_MIN_LENGTH:
+        return []
+
+    cache_key = 'search-suggestions:{0}:{1}'.format(
+        privacy_level, hashlib.md5(force_bytes(prefix)).hexdigest())
+    suggestions = cache.get(cache_key)
+    if suggestions is not None:
+        return suggestions
+
+    query = SQ(full_name_auto=prefix, privacy_full_name__gte=privacy_level)
+    query.add(SQ(username_auto=prefix), SQ.OR)
+    results = (SearchQuerySet().models(UserProfile)
+               .filter(query)[:settings.SEARCH_SUGGESTIONS_LIMIT])
+
+    suggestions = []
+    for result in results:
+        full_name = ''
+        if result.privacy_full_name >= privacy_level:
+            full_name = result.full_name
+        card = get_search_card(result, privacy_level) or {}
+        suggestions.append({
+            'username': result.username,
+            'full_name': full_name,
+            'url': reverse('phonebook:profile_view', args=[result.username]),
+            'photo_url': card.get('photo_url', ''),
+        })
+
+    cache.set(cache_key, suggestions, settings.SEARCH_SUGGESTIONS_CACHE_TIMEOUT)
+    return suggestions
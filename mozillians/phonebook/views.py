@@ -13,7 +13,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.views import logout as auth_logout
 from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
-                         HttpResponseRedirect)
+                         HttpResponseRedirect, JsonResponse)
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
 from django.utils.crypto import get_random_string
@@ -32,9 +32,12 @@ from mozilla_django_oidc.views import (OIDCAuthenticationRequestView,
 from mozillians.common.decorators import allow_public, allow_unvouched
 from mozillians.common.middleware import GET_VOUCHED_MESSAGE, LOGIN_MESSAGE
 from mozillians.common.templatetags.helpers import (get_object_or_none,
+                                                    get_privacy_level,
                                                     nonprefixed_url, redirect,
                                                     urlparams)
 from mozillians.common.urlresolvers import reverse
+from mozillians.phonebook.search import StoredCardSearchQuerySet
+from mozillians.phonebook.utils import get_search_suggestions
 from mozillians.users.managers import EMPLOYEES, MOZILLIANS, PRIVATE, PUBLIC
 from mozillians.users.models import ExternalAccount, IdpProfile, UserProfile
 from raven.contrib.django.models import client
@@ -285,6 +288,7 @@ def capture_csp_violation(request):
 class PhonebookSearchView(SearchView):
     form_class = forms.PhonebookSearchForm
     template_name = 'phonebook/search.html'
+    queryset = StoredCardSearchQuerySet()
 
     def form_invalid(self, form):
         context = self.get_context_data(**{
@@ -314,9 +318,23 @@ class PhonebookSearchView(SearchView):
         context_data['country'] = self.kwargs.get('country')
         context_data['region'] = self.kwargs.get('region')
         context_data['city'] = self.kwargs.get('city')
+        context_data['viewer_privacy_level'] = get_privacy_level(self.request)
         return context_data
 
 
+@allow_public
+@never_cache
+def search_suggestions(request):
+    """Return search-as-you-type suggestions for the search box."""
+    try:
+        privacy_level = request.user.userprofile.privacy_level
+    except AttributeError:
+        # This is an AnonymousUser
+        privacy_level = PUBLIC
+    suggestions = get_search_suggestions(request.GET.get('q', ''), privacy_level)
+    return JsonResponse({'suggestions': suggestions})
+
+
 @allow_unvouched
 @never_cache
 def delete_idp_profiles(request):
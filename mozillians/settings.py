@@ -261,6 +261,8 @@ USER_AVATAR_DIR = config('USER_AVATAR_DIR', default='uploads/userprofile')
 DEFAULT_AVATAR = config('DEFAULT_AVATAR', default='img/default_avatar.png')
 DEFAULT_AVATAR_URL = config('DEFAULT_AVATAR_URL', default=urljoin(MEDIA_URL, DEFAULT_AVATAR))
 DEFAULT_AVATAR_PATH = os.path.join(MEDIA_ROOT, DEFAULT_AVATAR)
+# Photo sizes stored in the profile photo manifests
+PHOTO_MANIFEST_GEOMETRIES = ('70x70', '100x100', '150x150', '160x160', '300x300', '500x500')
 
 # Mozspace
 MOZSPACE_PHOTO_DIR = config('MOZSPACE_PHOTO_DIR', default='uploads/mozspaces')
@@ -370,28 +372,64 @@ AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default='')
 ES_DISABLED = config('ES_DISABLED', default=True)
 ES_HOST = config('ES_HOST', default='127.0.0.1:9200')
 ES_PROTOCOL = config('ES_PROTOCOL', default='http://')
+# Size of the HTTP connection pool kept open to each Elasticsearch host
+ES_CONNECTION_POOL_SIZE = config('ES_CONNECTION_POOL_SIZE', default=10, cast=int)
+# Seconds a search request on the default connection may take
+ES_TIMEOUT = config('ES_TIMEOUT', default=3, cast=int)
+# Consecutive failures after which search falls back to the database, and
+# seconds before Elasticsearch is tried again
+ES_CIRCUIT_BREAKER_FAILURES = config('ES_CIRCUIT_BREAKER_FAILURES', default=5, cast=int)
+ES_CIRCUIT_BREAKER_RESET_TIMEOUT = config('ES_CIRCUIT_BREAKER_RESET_TIMEOUT', default=30,
+                                          cast=int)
 
 
 def _lazy_haystack_setup():
     from django.conf import settings
-    from elasticsearch import RequestsHttpConnection
-    from mozillians.common.search import AWSRequestsHttpConnection
+    from mozillians.common.search import (AWSRequestsHttpConnection,
+                                          PooledRequestsHttpConnection)
 
     es_connection = config('ES_CONNECTION', default='aws')
     es_connection_class = {
         'aws': AWSRequestsHttpConnection,
-        'local': RequestsHttpConnection
+        'local': PooledRequestsHttpConnection
     }
 
-    es_url = '%s%s' % (settings.ES_PROTOCOL, settings.ES_HOST)
     es_index_name = config('ES_INDEX_NAME', default='mozillians_haystack')
+
+    # The embedded engine keeps the index in local SQLite files, so
+    # search works without an Elasticsearch cluster. The directory is
+    # created when the index is first opened.
+    if es_connection == 'embedded':
+        embedded_path = config('ES_EMBEDDED_PATH', default='search_index')
+
+        def _embedded_index(name):
+            path = embedded_path
+            if path != ':memory:':
+                path = os.path.join(embedded_path, '{}.sqlite3'.format(name))
+            return {
+                'ENGINE': 'mozillians.common.search_backends.EmbeddedSearchEngine',
+                'PATH': path,
+            }
+
+        return {
+            'default': _embedded_index(es_index_name),
+            'tmp': _embedded_index('tmp_{}'.format(es_index_name)),
+            'current': _embedded_index('current_{}'.format(es_index_name)),
+        }
+
+    es_url = '%s%s' % (settings.ES_PROTOCOL, settings.ES_HOST)
     haystack_connections = {
         'default': {
             'ENGINE': 'haystack.backends.elasticsearch_backend.ElasticsearchSearchEngine',
             'URL': es_url,
             'INDEX_NAME': es_index_name,
+            'TIMEOUT': settings.ES_TIMEOUT,
             'KWARGS': {
-                'connection_class': es_connection_class[es_connection]
+                'connection_class': es_connection_class[es_connection],
+                'pool_maxsize': settings.ES_CONNECTION_POOL_SIZE,
+                'circuit_breaker': 'default',
+                # Do not retry, a slow cluster would hold the worker even longer.
+                'max_retries': 0
             }
         },
         'tmp': {
@@ -399,7 +437,9 @@ def _lazy_haystack_setup():
             'URL': es_url,
             'INDEX_NAME': 'tmp_{}'.format(es_index_name),
             'KWARGS': {
-                'connection_class': es_connection_class[es_connection]
+                'connection_class': es_connection_class[es_connection],
+                'pool_maxsize': settings.ES_CONNECTION_POOL_SIZE,
+                'circuit_breaker': 'tmp'
             }
         },
         'current': {
@@ -407,7 +447,9 @@ def _lazy_haystack_setup():
             'URL': es_url,
             'INDEX_NAME': 'current_{}'.format(es_index_name),
             'KWARGS': {
-                'connection_class': es_connection_class[es_connection]
+                'connection_class': es_connection_class[es_connection],
+                'pool_maxsize': settings.ES_CONNECTION_POOL_SIZE,
+                'circuit_breaker': 'current'
             }
         }
     }
@@ -422,6 +464,15 @@ ES_REINDEX_WORKERS_NUM = config('ES_REINDEX_WORKERS_NUM', default=3, cast=int)
 ES_REINDEX_BATCHSIZE = config('ES_REINDEX_BATCHSIZE', default=100, cast=int)
 ES_REINDEX_TIMEOUT = config('ES_REINDEX_TIMEOUT', default=1800, cast=int)
 
+# Search-as-you-type suggestions
+SEARCH_SUGGESTIONS_LIMIT = config('SEARCH_SUGGESTIONS_LIMIT', default=8, cast=int)
+SEARCH_SUGGESTIONS_MIN_LENGTH = 2
+SEARCH_SUGGESTIONS_CACHE_TIMEOUT = config('SEARCH_SUGGESTIONS_CACHE_TIMEOUT', default=60,
+                                          cast=int)
+# Maximum number of profiles returned by the database search used while
+# Elasticsearch is unavailable
+SEARCH_FALLBACK_LIMIT = config('SEARCH_FALLBACK_LIMIT', default=50, cast=int)
+
 # Setup django-axes
 AXES_PROXY_COUNT = 1
 IPWARE_META_PRECEDENCE_ORDER = ('HTTP_X_FORWARDED_FOR', 'IPWARE_META_PRECEDENCE_ORDER',
@@ -660,6 +711,32 @@ STRONGHOLD_EXCEPTIONS = ['^%s' % MEDIA_URL, # noqa
                          '^/[\w-]+/region-autocomplete/',
                          '^/[\w-]+/timezone-autocomplete/']
 
+# Seconds API v2 responses are cached for, changes invalidate them earlier
+API_CACHE_TIMEOUT = config('API_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds validated API keys are cached in memcached and in process memory
+API_KEY_CACHE_TIMEOUT = config('API_KEY_CACHE_TIMEOUT', default=60, cast=int)
+API_KEY_LOCAL_CACHE_TIMEOUT = config('API_KEY_LOCAL_CACHE_TIMEOUT', default=5, cast=int)
+# API key usage is recorded at most once per API_KEY_USAGE_RESOLUTION seconds
+# and kept API_KEY_USAGE_TIMEOUT seconds for the flush_api_key_usage cron job
+API_KEY_USAGE_RESOLUTION = config('API_KEY_USAGE_RESOLUTION', default=60, cast=int)
+API_KEY_USAGE_TIMEOUT = config('API_KEY_USAGE_TIMEOUT', default=86400, cast=int)
+# Profiles read per query by the /api/v2/users/export/ stream
+API_EXPORT_CHUNK_SIZE = config('API_EXPORT_CHUNK_SIZE', default=500, cast=int)
+# Usernames, emails and auth0 ids accepted by one /api/v2/users/lookup/ request
+API_LOOKUP_MAX_ITEMS = config('API_LOOKUP_MAX_ITEMS', default=1000, cast=int)
+# Token bucket rate limits of API v2 keys as '<requests>/<period>', the
+# number of requests being the largest burst too. Keyed by the privacy level
+# of the app (1: Private, 3: Mozillians, 4: Public). API_THROTTLE_APP_RATES
+# overrides them for single apps, keyed by app id, a null rate disables it.
+API_THROTTLE_RATES = {
+    1: config('API_THROTTLE_RATE_PRIVATE', default='6000/min'),
+    3: config('API_THROTTLE_RATE_MOZILLIANS', default='1200/min'),
+    4: config('API_THROTTLE_RATE_PUBLIC', default='600/min'),
+}
+API_THROTTLE_APP_RATES = dict(
+    (int(app_id), rate) for app_id, rate
+    in config('API_THROTTLE_APP_RATES', cast=json.loads, default='{}').items())
+
 REST_FRAMEWORK = {
     'URL_FIELD_NAME': '_url',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
@@ -667,6 +744,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'mozillians.api.v2.permissions.MozilliansPermission',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'mozillians.api.v2.throttling.APIKeyRateThrottle',
+    ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.OrderingFilter',
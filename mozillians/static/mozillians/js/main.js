@@ -46,5 +46,37 @@
 
         $('input, textarea').placeholder();
 
+        /* Search-as-you-type suggestions for the header search box
+        ================================================== */
+        var $search = $('.navbar-search .search-query');
+        var suggestionsUrl = $search.data('suggestions-url');
+
+        if (suggestionsUrl) {
+            $search.autocomplete({
+                minLength: $search.data('suggestions-min-length'),
+                delay: 150,
+                source: function(request, response) {
+                    $.getJSON(suggestionsUrl, {q: request.term})
+                        .done(function(data) {
+                            response($.map(data.suggestions, function(suggestion) {
+                                var label = suggestion.username;
+                                if (suggestion.full_name) {
+                                    label = suggestion.full_name + ' (' + suggestion.username + ')';
+                                }
+                                return {label: label, value: suggestion.username, url: suggestion.url};
+                            }));
+                        })
+                        .fail(function() {
+                            response([]);
+                        });
+                },
+                select: function(event, ui) {
+                    // Go straight to the profile, plain Enter still submits a full search.
+                    window.location.href = ui.item.url;
+                    return false;
+                }
+            });
+        }
+
     });
 })(jQuery);
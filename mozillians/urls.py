@@ -34,6 +34,8 @@ urlpatterns = [
     url(r'^oidc/', include('mozilla_django_oidc.urls')),
     url(r'', include('mozillians.users.urls', app_name='users', namespace='users')),
     url(r'', include('mozillians.phonebook.urls', app_name='phonebook', namespace='phonebook')),
+    # API URLs.
+    url(r'^api/', include('mozillians.api.urls')),
     # Admin URLs.
     url(r'^admin/', include(admin.site.urls)),
 ]
@@ -1,16 +1,31 @@
-from django.db.models import Q
+import json
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.utils.encoding import force_text
+from django.utils.text import compress_sequence
 
 import django_filters
 from rest_framework import serializers
+from rest_framework.decorators import list_route
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
-from mozillians.api.v2.viewsets import NoCacheReadOnlyModelViewSet
-from mozillians.common.templatetags.helpers import absolutify, markdown
+from mozillians.api.v2.cache import cache_response
+from mozillians.api.v2.pagination import KeysetPagination
+from mozillians.api.v2.serializers import SparseFieldsetsMixin, get_requested_fields
+from mozillians.api.v2.viewsets import CachedReadOnlyModelViewSet
+from mozillians.common.templatetags.helpers import absolutify
 from mozillians.common.urlresolvers import reverse
 from mozillians.groups.models import Group, GroupMembership
-from mozillians.users.managers import PUBLIC
-from mozillians.users.models import ExternalAccount, IdpProfile, Language, UserProfile
+from mozillians.users.managers import PRIVACY_CHOICES_WITH_PRIVATE, PRIVATE, PUBLIC
+from mozillians.users.models import (ExternalAccount, IdpProfile, Language, ProfileEmail,
+                                     UserProfile, filter_privacy, get_primary_email,
+                                     is_visible, render_bio_html)
 
 
 # Serializers
@@ -70,7 +85,18 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('name', '_url')
 
 
-class UserProfileSerializer(serializers.HyperlinkedModelSerializer):
+def merge_alternate_emails(accounts, identities):
+    """Return email ``accounts`` followed by the ``identities`` adding new addresses."""
+    alternate_emails = list(accounts)
+    seen = set(account.identifier for account in alternate_emails)
+    for identity in identities:
+        if identity.email not in seen:
+            seen.add(identity.email)
+            alternate_emails.append(identity)
+    return alternate_emails
+
+
+class UserProfileSerializer(SparseFieldsetsMixin, serializers.HyperlinkedModelSerializer):
     username = serializers.ReadOnlyField(source='user.username')
 
     class Meta:
@@ -78,12 +104,28 @@ class UserProfileSerializer(serializers.HyperlinkedModelSerializer):
         fields = ('username', 'is_vouched', '_url')
 
 
-class UserProfileDetailedSerializer(serializers.HyperlinkedModelSerializer):
+def _privacy_transform(field):
+    display = 'get_privacy_{0}_display'.format(field)
+
+    def transform(serializer, obj, value):
+        return {
+            'value': value,
+            'privacy': getattr(obj, display)()
+        }
+    return transform
+
+
+class UserProfileDetailedSerializer(SparseFieldsetsMixin,
+                                    serializers.HyperlinkedModelSerializer):
     username = serializers.ReadOnlyField(source='user.username')
     email = serializers.ReadOnlyField()
     photo = serializers.SerializerMethodField()
-    alternate_emails = AlternateEmailSerializer(many=True, source='_api_alternate_emails')
+    alternate_emails = serializers.SerializerMethodField()
     groups = GroupSerializer(many=True, source='_groups')
+    # ircname and tshirt were removed from profiles. They are still
+    # returned, always empty, so existing clients keep working.
+    ircname = serializers.SerializerMethodField()
+    tshirt = serializers.SerializerMethodField()
     country = serializers.SerializerMethodField()
     region = serializers.SerializerMethodField()
     city = serializers.SerializerMethodField()
@@ -101,38 +143,51 @@ class UserProfileDetailedSerializer(serializers.HyperlinkedModelSerializer):
                   'external_accounts', 'websites', 'tshirt', 'is_public', 'is_vouched',
                   '_url', 'url', 'city', 'region', 'country')
 
-    def _transform_privacy_wrapper(self, field):
-
-        def _transform_privacy(obj, value):
-            return {
-                'value': value,
-                'privacy': getattr(obj, 'get_privacy_{0}_display'.format(field))()
-            }
-        return _transform_privacy
-
-    def __init__(self, *args, **kwargs):
-        super(UserProfileDetailedSerializer, self).__init__(*args, **kwargs)
-
-        # If we don't define a custom transform method and if the
-        # field has a privacy setting, set the transform privacy
-        # wrapper.
-
-        for field in self.fields.keys():
-            method_name = 'transform_{0}'.format(field)
-
-            # Exclude `country`, `region`, `city` because they collide with the
-            # field aliases for `geo_country`, `geo_city`, `geo_region`
-            if field in ['country', 'region', 'city']:
-                return None
-
-            if ((not getattr(self, method_name, None)
-                 and getattr(UserProfile, 'get_privacy_{0}_display'.format(field), None))):
-                setattr(self, method_name, self._transform_privacy_wrapper(field))
+    @classmethod
+    def get_transforms(cls):
+        """Return the (field, transform) pairs applied to serialized profiles.
+
+        Fields with a ``transform_<field>`` method use it and the other
+        privacy controlled fields are wrapped with their privacy. The plan
+        is computed once per serializer class.
+        """
+        transforms = cls.__dict__.get('_transforms')
+        if transforms is None:
+            transforms = []
+            for field in cls.Meta.fields:
+                method = getattr(cls, 'transform_{0}'.format(field), None)
+                if method is not None:
+                    transforms.append((field, method.__func__))
+                # `country`, `region` and `city` collide with the privacy
+                # aliases of `geo_country`, `geo_region` and `geo_city`.
+                elif field in ('country', 'region', 'city'):
+                    continue
+                elif getattr(UserProfile, 'get_privacy_{0}_display'.format(field), None):
+                    transforms.append((field, _privacy_transform(field)))
+            cls._transforms = transforms
+        return transforms
 
     def get_url(self, obj):
         return absolutify(reverse('phonebook:profile_view',
                                   kwargs={'username': obj.user.username}))
 
+    def get_alternate_emails(self, obj):
+        emails = merge_alternate_emails(obj.alternate_emails, obj.identity_profiles)
+        return AlternateEmailSerializer(emails, many=True).data
+
+    def get_ircname(self, obj):
+        return {
+            'value': '',
+            'privacy': force_text(dict(PRIVACY_CHOICES_WITH_PRIVATE)[PRIVATE]),
+        }
+
+    def get_tshirt(self, obj):
+        return {
+            'value': None,
+            'english': '',
+            'privacy': force_text(dict(PRIVACY_CHOICES_WITH_PRIVATE)[PRIVATE]),
+        }
+
     def transform_timezone(self, obj, value):
         return {
             'value': value,
@@ -143,7 +198,8 @@ class UserProfileDetailedSerializer(serializers.HyperlinkedModelSerializer):
     def transform_bio(self, obj, value):
         return {
             'value': value,
-            'html': unicode(markdown(value)), # noqa
+            # Profiles saved before bio_html existed are rendered on the fly.
+            'html': obj.bio_html or render_bio_html(value),
             'privacy': obj.get_privacy_bio_display(),
         }
 
@@ -160,13 +216,6 @@ class UserProfileDetailedSerializer(serializers.HyperlinkedModelSerializer):
         value.update(privacy_field)
         return value
 
-    def transform_tshirt(self, obj, value):
-        return {
-            'value': obj.tshirt,
-            'english': obj.get_tshirt_display(),
-            'privacy': obj.get_privacy_tshirt_display(),
-        }
-
     def get_country(self, obj):
         country = obj.country
         return {
@@ -192,14 +241,177 @@ class UserProfileDetailedSerializer(serializers.HyperlinkedModelSerializer):
     def to_representation(self, instance):
         result = super(UserProfileDetailedSerializer, self).to_representation(instance)
 
-        for key, value in result.items():
-            method = getattr(self, 'transform_{}'.format(key), None)
-            if method is not None:
-                result[key] = method(self.instance, value)
+        for field, transform in self.get_transforms():
+            if field in result:
+                result[field] = transform(self, instance, result[field])
 
         return result
 
 
+class UserProfileBulkDetailedSerializer(UserProfileDetailedSerializer):
+    """Detailed profile serializer for whole pages of profiles.
+
+    Related objects are read from the attributes set by
+    prefetch_profile_details() instead of being queried per profile.
+    """
+    email = serializers.ReadOnlyField(source='_api_email')
+    alternate_emails = AlternateEmailSerializer(many=True, source='_api_alternate_emails')
+    groups = GroupSerializer(many=True, source='_groups')
+    external_accounts = ExternalAccountSerializer(many=True, source='_api_accounts')
+    languages = LanguageSerializer(many=True, source='_api_languages')
+    websites = WebsiteSerializer(many=True, source='_api_websites')
+
+
+def select_profile_details(queryset, fields=None):
+    """Return ``queryset`` joined with what the detailed serializers read of ``fields``."""
+    geo = [name for name in ('country', 'region', 'city') if fields is None or name in fields]
+    return queryset.select_related('user', *geo)
+
+
+def prefetch_profile_details(profiles, privacy_level, fields=None):
+    """Attach the related objects UserProfileBulkDetailedSerializer needs.
+
+    Memberships, external accounts, languages and identities of all
+    ``profiles`` are fetched with one query each and privacy is applied
+    in memory, matching what the privacy aware UserProfile attributes
+    return one profile at a time. Geo data and users are expected to be
+    loaded with select_profile_details().
+
+    When the names of the requested ``fields`` are given, relations no
+    requested field needs are not fetched.
+    """
+    def wanted(*names):
+        return fields is None or not fields.isdisjoint(names)
+
+    ids = [profile.id for profile in profiles]
+    groups = defaultdict(list)
+    accounts = defaultdict(list)
+    languages = defaultdict(list)
+    identities = defaultdict(list)
+
+    if wanted('groups'):
+        memberships = (GroupMembership.objects.filter(userprofile_id__in=ids,
+                                                      status=GroupMembership.MEMBER)
+                       .select_related('group').order_by('group__name'))
+        for membership in memberships:
+            groups[membership.userprofile_id].append(membership.group)
+    if wanted('alternate_emails', 'external_accounts', 'websites'):
+        for account in filter_privacy(ExternalAccount.objects.filter(user_id__in=ids),
+                                      privacy_level):
+            accounts[account.user_id].append(account)
+    if wanted('languages'):
+        for language in Language.objects.filter(userprofile_id__in=ids):
+            languages[language.userprofile_id].append(language)
+    if wanted('email', 'alternate_emails'):
+        for identity in IdpProfile.objects.filter(profile_id__in=ids):
+            identities[identity.profile_id].append(identity)
+
+    for profile in profiles:
+        profile_accounts = accounts[profile.id]
+        visible_identities = filter_privacy(identities[profile.id], privacy_level)
+        profile._groups = groups[profile.id]
+        profile._api_accounts = [
+            account for account in profile_accounts
+            if account.type not in (ExternalAccount.TYPE_WEBSITE, ExternalAccount.TYPE_EMAIL)
+        ]
+        profile._api_websites = [account for account in profile_accounts
+                                 if account.type == ExternalAccount.TYPE_WEBSITE]
+        profile._api_languages = []
+        if is_visible(profile.privacy_languages, privacy_level):
+            profile._api_languages = languages[profile.id]
+
+        # Legacy alternate emails come first, identities only add new addresses.
+        profile._api_alternate_emails = merge_alternate_emails(
+            [account for account in profile_accounts
+             if account.type == ExternalAccount.TYPE_EMAIL],
+            visible_identities)
+
+        profile._api_email = get_primary_email(profile.user.email, profile.privacy_email,
+                                               identities[profile.id], privacy_level)
+    return profiles
+
+
+def iter_profile_export(queryset, privacy_level, context, chunk_size=None):
+    """Yield the details of the profiles in ``queryset`` as JSON lines.
+
+    Profiles are read in primary key ordered chunks, so memory use does
+    not grow with the size of the export and every chunk costs the same
+    handful of queries.
+    """
+    chunk_size = chunk_size or settings.API_EXPORT_CHUNK_SIZE
+    fields = get_requested_fields(context.get('request'))
+    queryset = select_profile_details(queryset, fields)
+    last_pk = 0
+    while True:
+        profiles = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+        if not profiles:
+            return
+        prefetch_profile_details(profiles, privacy_level, fields)
+        serializer = UserProfileBulkDetailedSerializer(profiles, many=True, context=context)
+        for data in serializer.data:
+            yield json.dumps(data, cls=JSONEncoder) + '\n'
+        last_pk = profiles[-1].pk
+
+
+class ProfileLookupSerializer(serializers.Serializer):
+    """Validate the body of a batch profile lookup."""
+    usernames = serializers.ListField(child=serializers.CharField(), default=list)
+    emails = serializers.ListField(child=serializers.CharField(), default=list)
+    auth0_ids = serializers.ListField(child=serializers.CharField(), default=list)
+
+    def validate(self, data):
+        count = sum(len(values) for values in data.values())
+        if not count:
+            raise serializers.ValidationError('Give at least one username, email or auth0 id.')
+        if count > settings.API_LOOKUP_MAX_ITEMS:
+            raise serializers.ValidationError(
+                'A lookup is limited to {0} items.'.format(settings.API_LOOKUP_MAX_ITEMS))
+        return data
+
+
+def lookup_profiles(queryset, privacy_level, usernames=(), emails=(), auth0_ids=()):
+    """Resolve usernames, emails and auth0 user ids to profiles of ``queryset``.
+
+    Returns a dict per kind of input mapping every input to its profile,
+    or to None, with three queries at most. Emails and identities only
+    match when their privacy is visible at ``privacy_level``. When several
+    profiles share an address, user account emails win over alternate
+    emails and identities.
+    """
+    email_profiles = {}
+    if emails:
+        rows = (ProfileEmail.objects
+                .filter(email__in=set(email.strip().lower() for email in emails),
+                        privacy__gte=privacy_level)
+                .order_by('source', 'profile_id').values_list('email', 'profile_id'))
+        for email, profile_id in rows:
+            email_profiles.setdefault(email, profile_id)
+
+    auth0_profiles = {}
+    if auth0_ids:
+        rows = (IdpProfile.objects
+                .filter(auth0_user_id__in=set(auth0_ids), privacy__gte=privacy_level)
+                .order_by('profile_id').values_list('auth0_user_id', 'profile_id'))
+        for auth0_id, profile_id in rows:
+            auth0_profiles.setdefault(auth0_id, profile_id)
+
+    query = Q(pk__in=set(email_profiles.values()) | set(auth0_profiles.values()))
+    if usernames:
+        query |= Q(user__username__in=set(usernames))
+    profiles = dict((profile.pk, profile)
+                    for profile in queryset.filter(query).select_related('user'))
+    by_username = dict((profile.user.username.lower(), profile) for profile in profiles.values())
+
+    return OrderedDict([
+        ('usernames', OrderedDict((username, by_username.get(username.lower()))
+                                  for username in usernames)),
+        ('emails', OrderedDict((email, profiles.get(email_profiles.get(email.strip().lower())))
+                               for email in emails)),
+        ('auth0_ids', OrderedDict((auth0_id, profiles.get(auth0_profiles.get(auth0_id)))
+                                  for auth0_id in auth0_ids)),
+    ])
+
+
 # Filters
 class UserProfileFilter(django_filters.FilterSet):
     city = django_filters.CharFilter(name='city__name')
@@ -211,7 +423,9 @@ class UserProfileFilter(django_filters.FilterSet):
     language = django_filters.CharFilter(name='language__code')
     account = django_filters.CharFilter(name='externalaccount__identifier', distinct=True)
     group = django_filters.CharFilter(method='filter_group')
-    skill = django_filters.CharFilter(name='skills__name')
+    # Profiles have no ircname or skills anymore, these match nothing.
+    ircname = django_filters.CharFilter(method='filter_removed_field')
+    skill = django_filters.CharFilter(method='filter_removed_field')
 
     class Meta:
         model = UserProfile
@@ -221,27 +435,20 @@ class UserProfileFilter(django_filters.FilterSet):
 
     def filter_emails(self, queryset, name, value):
         """Return users with email matching either primary or alternate email address"""
-        legacy_qs = ExternalAccount.objects.filter(
-            type=ExternalAccount.TYPE_EMAIL,
-            identifier=value
-        )
-
-        idp_qs = IdpProfile.objects.filter(
-            email=value
-        )
-
-        legacy_users = legacy_qs.values_list('user__id', flat=True)
-        idp_users = idp_qs.values_list('profile__id', flat=True)
-        query = Q(id__in=legacy_users) | Q(id__in=idp_users) | Q(user__email=value)
-        return queryset.filter(query).distinct()
+        emails = ProfileEmail.objects.filter(email=value.strip().lower())
+        return queryset.filter(id__in=emails.values('profile_id'))
 
     def filter_group(self, queryset, name, value):
         membership = GroupMembership.MEMBER
-        return queryset.filter(groups__name=value, groupmembership__status=membership)
+        return queryset.filter(groupmembership__group__name=value,
+                               groupmembership__status=membership)
+
+    def filter_removed_field(self, queryset, name, value):
+        return queryset.none()
 
 
 # Views
-class UserProfileViewSet(NoCacheReadOnlyModelViewSet):
+class UserProfileViewSet(CachedReadOnlyModelViewSet):
     """
     Returns a list of Mozillians respecting authorization levels
     and privacy settings.
@@ -250,6 +457,8 @@ class UserProfileViewSet(NoCacheReadOnlyModelViewSet):
     model = UserProfile
     filter_class = UserProfileFilter
     ordering = ('user__username',)
+    pagination_class = KeysetPagination
+    cache_namespaces = ('users',)
 
     def get_queryset(self):
         queryset = UserProfile.objects.complete()
@@ -260,10 +469,89 @@ class UserProfileViewSet(NoCacheReadOnlyModelViewSet):
         queryset = queryset.privacy_level(privacy_level)
         return queryset
 
+    def get_last_modified(self, **kwargs):
+        """Return the last update of the requested profile or of the listed ones."""
+        queryset = self.get_queryset()
+        if 'pk' in kwargs:
+            queryset = queryset.filter(pk=kwargs['pk'])
+        else:
+            queryset = self.filter_queryset(queryset)
+        return queryset.aggregate(last_modified=Max('last_updated'))['last_modified']
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """List profiles, with their details when ``expand=full`` is given.
+
+        Detailed pages cost a fixed number of queries however many
+        profiles they hold, see prefetch_profile_details().
+        """
+        if request.query_params.get('expand') != 'full':
+            return super(UserProfileViewSet, self).list(request, *args, **kwargs)
+
+        fields = get_requested_fields(request)
+        queryset = select_profile_details(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(queryset)
+        profiles = prefetch_profile_details(list(page if page is not None else queryset),
+                                            request.privacy_level, fields)
+        serializer = UserProfileBulkDetailedSerializer(profiles, many=True,
+                                                       context=self.get_serializer_context())
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    @list_route(methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """Stream the details of all matching profiles as newline delimited JSON.
+
+        The response is gzipped on the fly for clients accepting it.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        content = iter_profile_export(queryset, request.privacy_level,
+                                      self.get_serializer_context())
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = StreamingHttpResponse(compress_sequence(content),
+                                             content_type='application/x-ndjson')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @list_route(methods=['post'])
+    def lookup(self, request, *args, **kwargs):
+        """Resolve lists of usernames, emails and auth0 user ids in one request.
+
+        Results are keyed by input, inputs matching no visible profile map
+        to null. Profiles come with their details when ``expand=full`` is given.
+        """
+        lookup = ProfileLookupSerializer(data=request.data)
+        lookup.is_valid(raise_exception=True)
+        fields = get_requested_fields(request)
+        queryset = select_profile_details(self.get_queryset(), fields)
+        results = lookup_profiles(queryset, request.privacy_level, **lookup.validated_data)
+
+        profiles = dict((profile.pk, profile) for matches in results.values()
+                        for profile in matches.values() if profile)
+        profiles = sorted(profiles.values(), key=lambda profile: profile.pk)
+        serializer_class = UserProfileSerializer
+        if request.query_params.get('expand') == 'full':
+            prefetch_profile_details(profiles, request.privacy_level, fields)
+            serializer_class = UserProfileBulkDetailedSerializer
+        serializer = serializer_class(profiles, many=True, context=self.get_serializer_context())
+        data = dict((profile.pk, item) for profile, item in zip(profiles, serializer.data))
+
+        return Response(OrderedDict(
+            (kind, OrderedDict((key, data[profile.pk] if profile else None)
+                               for key, profile in matches.items()))
+            for kind, matches in results.items()))
+
+    @cache_response
     def retrieve(self, request, pk):
         user = get_object_or_404(self.get_queryset(), pk=pk)
-        group_ids = user.groupmembership_set.filter(
-            status=GroupMembership.MEMBER).values_list('group_id', flat=True)
-        user._groups = Group.objects.filter(id__in=group_ids)
+        fields = get_requested_fields(request)
+        if fields is None or 'groups' in fields:
+            group_ids = user.groupmembership_set.filter(
+                status=GroupMembership.MEMBER).values_list('group_id', flat=True)
+            user._groups = Group.objects.filter(id__in=group_ids)
         serializer = UserProfileDetailedSerializer(user, context={'request': self.request})
         return Response(serializer.data)
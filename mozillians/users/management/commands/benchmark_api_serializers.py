@@ -0,0 +1,122 @@
+import json
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework import serializers
+
+from mozillians.groups.models import Group
+from mozillians.users.api.v2 import UserProfileBulkDetailedSerializer, _privacy_transform
+from mozillians.users.managers import MOZILLIANS, PUBLIC
+from mozillians.users.models import Language, UserProfile, render_bio_html
+
+
+BIO = u'Contributor to **Firefox** and [Rust](https://www.rust-lang.org/), based in *Athens*.'
+
+
+def serialize_with_lookups(profile, context):
+    """Serialize ``profile`` the way the serializer did before transform plans.
+
+    Privacy wrappers are installed on every instantiation and transforms
+    are looked up by name for every key of the result.
+    """
+    serializer = UserProfileBulkDetailedSerializer(profile, context=context)
+    for field in serializer.fields.keys():
+        name = 'transform_{0}'.format(field)
+        if (field not in ('country', 'region', 'city')
+                and not getattr(serializer, name, None)
+                and getattr(UserProfile, 'get_privacy_{0}_display'.format(field), None)):
+            setattr(serializer, name, partial(_privacy_transform(field), serializer))
+    result = serializers.HyperlinkedModelSerializer.to_representation(serializer, profile)
+    for key, value in result.items():
+        method = getattr(serializer, 'transform_{}'.format(key), None)
+        if method is not None:
+            result[key] = method(profile, value)
+    return result
+
+
+class Command(BaseCommand):
+    help = ('Serialize in memory profiles with the API v2 detailed profile serializer and '
+            'report the time spent per profile.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=1000,
+                            help='Number of profiles to serialize.')
+        parser.add_argument('--rounds', type=int, default=5,
+                            help='Number of rounds, the fastest one is reported.')
+
+    def handle(self, *args, **options):
+        profiles = self._create_profiles(options['profiles'])
+        host = settings.ALLOWED_HOSTS[0].lstrip('.*') or 'localhost'
+        context = {'request': RequestFactory().get('/api/v2/users/', SERVER_NAME=host)}
+        bare = serializers.HyperlinkedModelSerializer.to_representation
+
+        def bare_fields():
+            serializer = UserProfileBulkDetailedSerializer(context=context)
+            for profile in profiles:
+                bare(serializer, profile)
+
+        def many():
+            UserProfileBulkDetailedSerializer(profiles, many=True, context=context).data
+
+        def one_per_profile():
+            for profile in profiles:
+                UserProfileBulkDetailedSerializer(profile, context=context).data
+
+        def lookups_per_profile():
+            for profile in profiles:
+                serialize_with_lookups(profile, context)
+
+        self.stdout.write('{0:>24} {1:>10} {2:>14} {3:>14}'.format(
+            'mode', 'total ms', 'us/profile', 'overhead us'))
+        baseline = None
+        for name, func in (('fields only', bare_fields),
+                           ('many=True', many),
+                           ('one serializer each', one_per_profile),
+                           ('per-instance lookups', lookups_per_profile)):
+            elapsed = self._time(func, options['rounds'])
+            per_profile = elapsed / len(profiles) * 10 ** 6
+            if baseline is None:
+                baseline = per_profile
+            self.stdout.write('{0:>24} {1:>10.1f} {2:>14.1f} {3:>14.1f}'.format(
+                name, elapsed * 1000, per_profile, per_profile - baseline))
+
+    def _time(self, func, rounds):
+        timings = []
+        for i in range(rounds):
+            start = time.time()
+            func()
+            timings.append(time.time() - start)
+        return min(timings)
+
+    def _create_profiles(self, num_profiles):
+        """Return unsaved profiles carrying what prefetch_profile_details() attaches."""
+        groups = [Group(id=i, name=u'group {0}'.format(i)) for i in range(1, 4)]
+        bio_html = render_bio_html(BIO)
+        profiles = []
+        for i in range(1, num_profiles + 1):
+            user = User(id=i, username=u'bench-{0}'.format(i),
+                        email=u'bench-{0}@example.com'.format(i))
+            photo = u'uploads/userprofile/bench-{0}.jpg'.format(i)
+            profile = UserProfile(
+                id=i, user=user, full_name=u'Bench Profile {0}'.format(i), bio=BIO,
+                bio_html=bio_html, timezone='Europe/Athens', title=u'Engineer', is_vouched=True,
+                photo=photo,
+                photo_manifest=json.dumps({
+                    'source': u'photo:{0}'.format(photo),
+                    'urls': dict((geometry, u'https://cdn.example.com/{0}/{1}'.format(
+                        geometry, photo)) for geometry in settings.PHOTO_MANIFEST_GEOMETRIES)
+                }),
+                privacy_full_name=PUBLIC, privacy_bio=MOZILLIANS)
+            profile.set_instance_privacy_level(MOZILLIANS)
+            profile._groups = groups
+            profile._api_email = user.email
+            profile._api_alternate_emails = []
+            profile._api_accounts = []
+            profile._api_websites = []
+            profile._api_languages = [Language(code='fr')]
+            profiles.append(profile)
+        return profiles
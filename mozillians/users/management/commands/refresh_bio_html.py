@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mozillians.users.models import UserProfile, render_bio_html
+
+
+class Command(BaseCommand):
+    help = 'Render the bio HTML of profiles missing or with an outdated one.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of profiles rendered and updated per transaction.')
+
+    def handle(self, *args, **options):
+        refreshed = 0
+        last_pk = 0
+        while True:
+            rows = list(UserProfile.objects.filter(pk__gt=last_pk).order_by('pk')
+                        .values_list('pk', 'bio', 'bio_html')[:options['batch_size']])
+            if not rows:
+                break
+            with transaction.atomic():
+                for pk, bio, bio_html in rows:
+                    html = render_bio_html(bio)
+                    if html != bio_html:
+                        UserProfile.objects.filter(pk=pk).update(bio_html=html)
+                        refreshed += 1
+            last_pk = rows[-1][0]
+        self.stdout.write('Refreshed {0} bios.'.format(refreshed))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from mozillians.users.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Build the photo manifests of profiles missing or with an outdated one.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', default=False,
+                            help='Rebuild every manifest, e.g. after changing the geometries.')
+
+    def handle(self, *args, **options):
+        refreshed = 0
+        for profile in UserProfile.objects.select_related('user').iterator():
+            if profile.refresh_photo_manifest(force=options['force']):
+                refreshed += 1
+        self.stdout.write('Refreshed {0} photo manifests.'.format(refreshed))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SOURCE_USER = 10
+SOURCE_ALTERNATE = 20
+SOURCE_IDENTITY = 30
+
+
+def _row(ProfileEmail, source, source_id, profile_id, email, privacy, primary=False):
+    email = (email or '').strip().lower()
+    if not email:
+        return None
+    return ProfileEmail(source=source, source_id=source_id, profile_id=profile_id, email=email,
+                        domain=email.rpartition('@')[2], privacy=privacy, primary=primary)
+
+
+def populate_profile_emails(apps, schema_editor):
+    UserProfile = apps.get_model('users', 'UserProfile')
+    ExternalAccount = apps.get_model('users', 'ExternalAccount')
+    IdpProfile = apps.get_model('users', 'IdpProfile')
+    ProfileEmail = apps.get_model('users', 'ProfileEmail')
+
+    rows = []
+    profiles = UserProfile.objects.values_list('id', 'user_id', 'user__email', 'privacy_email')
+    for profile_id, user_id, email, privacy in profiles.iterator():
+        rows.append(_row(ProfileEmail, SOURCE_USER, user_id, profile_id, email, privacy, True))
+    accounts = (ExternalAccount.objects.filter(type='EMAIL')
+                .values_list('id', 'user_id', 'identifier', 'privacy'))
+    for account_id, profile_id, email, privacy in accounts.iterator():
+        rows.append(_row(ProfileEmail, SOURCE_ALTERNATE, account_id, profile_id, email, privacy))
+    identities = IdpProfile.objects.values_list('id', 'profile_id', 'email', 'privacy', 'primary')
+    for idp_id, profile_id, email, privacy, primary in identities.iterator():
+        rows.append(_row(ProfileEmail, SOURCE_IDENTITY, idp_id, profile_id, email, privacy,
+                         primary))
+    ProfileEmail.objects.bulk_create([row for row in rows if row], batch_size=1000)
+
+
+def backwards(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0047_userprofile_photo_manifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileEmail',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('email', models.CharField(max_length=254, db_index=True)),
+                ('domain', models.CharField(max_length=254, db_index=True)),
+                ('source', models.PositiveSmallIntegerField(choices=[(10, b'User account'), (20, b'Alternate email address'), (30, b'Identity')])),
+                ('source_id', models.PositiveIntegerField()),
+                ('privacy', models.PositiveIntegerField(default=3, choices=[(3, 'Mozillians'), (4, 'Public'), (1, 'Private')])),
+                ('primary', models.BooleanField(default=False)),
+                ('profile', models.ForeignKey(related_name='profile_emails', to='users.UserProfile', on_delete=django.db.models.deletion.CASCADE)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='profileemail',
+            unique_together=set([('source', 'source_id')]),
+        ),
+        migrations.RunPython(populate_profile_emails, backwards),
+    ]
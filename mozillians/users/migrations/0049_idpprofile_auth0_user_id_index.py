@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# auth0_user_id is too long for a full index, MySQL indexes its first
+# 191 characters, enough to tell identities apart.
+INDEX_NAME = 'users_idpprofile_auth0_user_id_prefix'
+
+
+def add_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('CREATE INDEX {0} ON users_idpprofile (auth0_user_id(191))'
+                              .format(INDEX_NAME))
+
+
+def remove_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX {0} ON users_idpprofile'.format(INDEX_NAME))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0048_profileemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
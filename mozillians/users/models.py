@@ -1,6 +1,8 @@
+import json
 import logging
 import os
 import uuid
+from hashlib import md5
 from itertools import chain
 
 from pytz import common_timezones
@@ -11,14 +13,16 @@ from django.core.files.storage import default_storage
 from django.core.mail import send_mail
 from django.db import models
 from django.db.models import Manager, ManyToManyField, Q
+from django.db.models.query import QuerySet
 from django.template.loader import get_template
-from django.utils.encoding import iri_to_uri
+from django.utils import six
+from django.utils.encoding import force_bytes, iri_to_uri
 from django.utils.http import urlquote
 from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy as _lazy
 from mozillians.common import utils
-from mozillians.common.templatetags.helpers import (absolutify, gravatar,
+from mozillians.common.templatetags.helpers import (absolutify, gravatar, markdown,
                                                     offset_of_timezone)
 from mozillians.common.urlresolvers import reverse
 from mozillians.phonebook.validators import (validate_discord, validate_email,
@@ -42,6 +46,47 @@ logger = logging.getLogger(__name__)
 ProfileManager = Manager.from_queryset(UserProfileQuerySet)
 
 
+def render_bio_html(bio):
+    """Return the sanitized HTML of ``bio`` stored in UserProfile.bio_html."""
+    return six.text_type(markdown(bio)) if bio else u''
+
+
+def is_visible(privacy, privacy_level):
+    """Return whether a value with ``privacy`` is shown at ``privacy_level``."""
+    return not privacy_level or privacy >= privacy_level
+
+
+def filter_privacy(items, privacy_level):
+    """Return the ``items`` with a privacy shown at ``privacy_level``.
+
+    ``items`` is a queryset, filtered in the database, or a list.
+    """
+    if not privacy_level:
+        return items
+    if isinstance(items, QuerySet):
+        return items.filter(privacy__gte=privacy_level)
+    return [item for item in items if is_visible(item.privacy, privacy_level)]
+
+
+def get_primary_email(user_email, privacy_email, identities, privacy_level):
+    """Return the email a profile shows at ``privacy_level``.
+
+    ``identities`` are all the IdpProfiles of the profile. Their primary
+    contact comes first. With a privacy level, profiles with identities
+    only show a visible primary contact.
+    """
+    if privacy_level:
+        if identities:
+            contacts = [identity.email for identity in filter_privacy(identities, privacy_level)
+                        if identity.primary_contact_identity]
+            return contacts[0] if contacts else ''
+        if not is_visible(privacy_email, privacy_level):
+            return UserProfile.privacy_fields()['email']
+
+    contacts = [identity.email for identity in identities if identity.primary_contact_identity]
+    return contacts[0] if contacts else user_email
+
+
 def _calculate_photo_filename(instance, filename):
     """Generate a unique filename for uploaded photo."""
     return os.path.join(settings.USER_AVATAR_DIR, str(uuid.uuid4()) + '.jpg')
@@ -144,7 +189,11 @@ class UserProfile(UserProfilePrivacyModel):
         help_text='You can edit can_vouch status by editing invidual vouches')
     last_updated = models.DateTimeField(auto_now=True)
     bio = models.TextField(verbose_name=_lazy(u'Bio'), default='', blank=True)
+    # Sanitized HTML of the bio, see refresh_bio_html()
+    bio_html = models.TextField(default='', blank=True, editable=False)
     photo = ImageField(default='', blank=True, upload_to=_calculate_photo_filename)
+    # JSON photo URLs by geometry, see refresh_photo_manifest()
+    photo_manifest = models.TextField(default='', blank=True, editable=False)
 
     # validated geo data (validated that it's valid geo data, not that the
     # mozillian is there :-) )
@@ -211,6 +260,7 @@ class UserProfile(UserProfilePrivacyModel):
         special_functions = {
             'accounts': '_accounts',
             'alternate_emails': '_alternate_emails',
+            'bio_html': '_bio_html',
             'email': '_primary_email',
             'is_public_indexable': '_is_public_indexable',
             'languages': '_languages',
@@ -234,9 +284,7 @@ class UserProfile(UserProfilePrivacyModel):
         return _getattr(attrname)
 
     def _filter_accounts_privacy(self, accounts):
-        if self._privacy_level:
-            return accounts.filter(privacy__gte=self._privacy_level)
-        return accounts
+        return filter_privacy(accounts, self._privacy_level)
 
     @property
     def _accounts(self):
@@ -251,6 +299,13 @@ class UserProfile(UserProfilePrivacyModel):
         accounts = _getattr('externalaccount_set').filter(type=ExternalAccount.TYPE_EMAIL)
         return self._filter_accounts_privacy(accounts)
 
+    @property
+    def _bio_html(self):
+        _getattr = (lambda x: super(UserProfile, self).__getattribute__(x))
+        if self._privacy_level > _getattr('privacy_bio'):
+            return u''
+        return _getattr('bio_html')
+
     @property
     def _identity_profiles(self):
         _getattr = (lambda x: super(UserProfile, self).__getattribute__(x))
@@ -267,32 +322,15 @@ class UserProfile(UserProfilePrivacyModel):
     @property
     def _languages(self):
         _getattr = (lambda x: super(UserProfile, self).__getattribute__(x))
-        if self._privacy_level > _getattr('privacy_languages'):
+        if not is_visible(_getattr('privacy_languages'), self._privacy_level):
             return _getattr('language_set').none()
         return _getattr('language_set').all()
 
     @property
     def _primary_email(self):
         _getattr = (lambda x: super(UserProfile, self).__getattribute__(x))
-
-        privacy_fields = UserProfile.privacy_fields()
-
-        if self._privacy_level:
-            # Try IDP contact first
-            if self.idp_profiles.exists():
-                contact_ids = self.identity_profiles.filter(primary_contact_identity=True)
-                if contact_ids.exists():
-                    return contact_ids[0].email
-                return ''
-
-            # Fallback to user.email
-            if _getattr('privacy_email') < self._privacy_level:
-                return privacy_fields['email']
-
-        # In case we don't have a privacy aware attribute access
-        if self.idp_profiles.filter(primary_contact_identity=True).exists():
-            return self.idp_profiles.filter(primary_contact_identity=True)[0].email
-        return _getattr('user').email
+        return get_primary_email(_getattr('user').email, _getattr('privacy_email'),
+                                 list(_getattr('idp_profiles').all()), self._privacy_level)
 
     @property
     def _vouched_by(self):
@@ -354,7 +392,7 @@ class UserProfile(UserProfilePrivacyModel):
         """Return user privacy clearance."""
         if self.user.is_superuser:
             return PRIVATE
-        if self.groups.filter(name='staff').exists():
+        if self.groupmembership_set.filter(group__name='staff').exists():
             return EMPLOYEES
         if self.is_vouched:
             return MOZILLIANS
@@ -422,6 +460,60 @@ class UserProfile(UserProfilePrivacyModel):
             return get_thumbnail(self.photo, geometry, **kwargs)
         return get_thumbnail(settings.DEFAULT_AVATAR_PATH.format(), geometry, **kwargs)
 
+    def _photo_manifest_source(self):
+        if self.photo:
+            return u'photo:{0}'.format(self.photo.name)
+        return u'gravatar:{0}'.format(md5(force_bytes(self.email)).hexdigest())
+
+    def _photo_changed(self):
+        """Return whether the photo differs from the one the manifest was built from.
+
+        Gravatar manifests follow email changes, see the users signals.
+        """
+        source = json.loads(self.photo_manifest)['source'] if self.photo_manifest else u''
+        if self.photo:
+            return source != u'photo:{0}'.format(self.photo.name)
+        return not source.startswith(u'gravatar:')
+
+    def refresh_photo_manifest(self, force=False):
+        """Store the photo URLs of the PHOTO_MANIFEST_GEOMETRIES.
+
+        The manifest is only rebuilt when the photo or the email it was
+        built from changed, unless ``force`` is true. Returns whether it
+        was rebuilt.
+        """
+        source = self._photo_manifest_source()
+        manifest = json.loads(self.photo_manifest) if self.photo_manifest else None
+        if not force and manifest and manifest['source'] == source:
+            return False
+
+        urls = {}
+        for geometry in settings.PHOTO_MANIFEST_GEOMETRIES:
+            if self.photo:
+                urls[geometry] = self.get_photo_thumbnail(geometry).url
+            else:
+                urls[geometry] = gravatar(self.email, size=geometry)
+        self.photo_manifest = json.dumps({'source': source, 'urls': urls})
+        UserProfile.objects.filter(pk=self.pk).update(photo_manifest=self.photo_manifest)
+        return True
+
+    def get_manifest_photo_url(self, geometry):
+        """Return the stored photo URL for ``geometry``, or None.
+
+        None is returned when there is no up to date URL for the photo in
+        the manifest. Gravatar URLs are only returned for profiles without
+        a privacy level, as they embed a hash of the email.
+        """
+        if not self.photo_manifest:
+            return None
+        manifest = json.loads(self.photo_manifest)
+        if self.photo:
+            if manifest['source'] != u'photo:{0}'.format(self.photo.name):
+                return None
+        elif self._privacy_level or not manifest['source'].startswith(u'gravatar:'):
+            return None
+        return manifest['urls'].get(geometry)
+
     def get_photo_url(self, geometry='160x160', **kwargs):
         """Return photo url.
 
@@ -429,11 +521,13 @@ class UserProfile(UserProfilePrivacyModel):
         If privacy allows and photo set return local photo link.
         If privacy doesn't allow return default local link.
         """
-        privacy_level = getattr(self, '_privacy_level', MOZILLIANS)
-        if (not self.photo and self.privacy_photo >= privacy_level):
-            return gravatar(self.email, size=geometry)
+        photo_url = None if kwargs else self.get_manifest_photo_url(geometry)
+        if photo_url is None:
+            privacy_level = getattr(self, '_privacy_level', MOZILLIANS)
+            if (not self.photo and self.privacy_photo >= privacy_level):
+                return gravatar(self.email, size=geometry)
+            photo_url = self.get_photo_thumbnail(geometry, **kwargs).url
 
-        photo_url = self.get_photo_thumbnail(geometry, **kwargs).url
         if photo_url.startswith('https://') or photo_url.startswith('http://'):
             return photo_url
         return absolutify(photo_url)
@@ -465,11 +559,23 @@ class UserProfile(UserProfilePrivacyModel):
         if self.timezone:
             return offset_of_timezone(self.timezone)
 
+    def refresh_bio_html(self):
+        """Render the bio as the markdown filter does into bio_html."""
+        self.bio_html = render_bio_html(self.bio)
+
     def save(self, *args, **kwargs):
         self._privacy_level = None
         autovouch = kwargs.pop('autovouch', False)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'bio' in update_fields:
+            self.refresh_bio_html()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(['bio_html'])
 
         super(UserProfile, self).save(*args, **kwargs)
+        # The photo file is only stored by the save above.
+        if (update_fields is None or 'photo' in update_fields) and self._photo_changed():
+            self.refresh_photo_manifest()
         # Auto_vouch follows the first save, because you can't
         # create foreign keys without a database id.
 
@@ -770,3 +876,76 @@ class Language(models.Model):
         if (model_class == type(self) and unique_check == ('code', 'userprofile')):
             return _('This language has already been selected.')
         return super(Language, self).unique_error_message(model_class, unique_check)
+
+
+class ProfileEmail(models.Model):
+    """Email addresses of a profile, gathered from every place they are stored.
+
+    Rows mirror the email of the user account, the alternate email accounts
+    and the identities of a profile and are kept in sync by signals, so
+    profiles can be looked up by address or domain with one indexed query.
+    Addresses are stored lowercased.
+    """
+    SOURCE_USER = 10
+    SOURCE_ALTERNATE = 20
+    SOURCE_IDENTITY = 30
+
+    SOURCE_TYPES = (
+        (SOURCE_USER, 'User account',),
+        (SOURCE_ALTERNATE, 'Alternate email address',),
+        (SOURCE_IDENTITY, 'Identity',),
+    )
+
+    profile = models.ForeignKey(UserProfile, related_name='profile_emails')
+    email = models.CharField(max_length=254, db_index=True)
+    domain = models.CharField(max_length=254, db_index=True)
+    source = models.PositiveSmallIntegerField(choices=SOURCE_TYPES)
+    source_id = models.PositiveIntegerField()
+    privacy = models.PositiveIntegerField(default=MOZILLIANS, choices=PRIVACY_CHOICES_WITH_PRIVATE)
+    primary = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('source', 'source_id')
+
+    def __unicode__(self):
+        return self.email
+
+    @classmethod
+    def sync(cls, source, source_id, profile_id, email, privacy, primary=False):
+        """Create, update or remove the row of an address."""
+        email = (email or '').strip().lower()
+        if not email:
+            cls.remove(source, source_id)
+            return
+        values = {
+            'profile_id': profile_id,
+            'email': email,
+            'domain': email.rpartition('@')[2],
+            'privacy': privacy,
+            'primary': primary,
+        }
+        # Rows almost always exist already, so try the UPDATE first.
+        if not cls.objects.filter(source=source, source_id=source_id).update(**values):
+            cls.objects.create(source=source, source_id=source_id, **values)
+
+    @classmethod
+    def remove(cls, source, source_id):
+        cls.objects.filter(source=source, source_id=source_id).delete()
+
+    @classmethod
+    def sync_user(cls, profile):
+        cls.sync(cls.SOURCE_USER, profile.user_id, profile.id, profile.user.email,
+                 profile.privacy_email, primary=True)
+
+    @classmethod
+    def sync_alternate(cls, account):
+        if account.type != ExternalAccount.TYPE_EMAIL:
+            cls.remove(cls.SOURCE_ALTERNATE, account.id)
+            return
+        cls.sync(cls.SOURCE_ALTERNATE, account.id, account.user_id, account.identifier,
+                 account.privacy)
+
+    @classmethod
+    def sync_identity(cls, idp):
+        cls.sync(cls.SOURCE_IDENTITY, idp.id, idp.profile_id, idp.email, idp.privacy,
+                 primary=idp.primary)
@@ -1,8 +1,18 @@
+import copy
+import json
+
 from haystack import indexes
+from mozillians.common.search_indexes import HashedSearchIndex
+from mozillians.common.templatetags.helpers import get_privacy_aware_photo_url
+from mozillians.common.urlresolvers import reverse
+from mozillians.users.managers import EMPLOYEES, MOZILLIANS, PRIVATE, PUBLIC
 from mozillians.users.models import IdpProfile, UserProfile
 
 
-class UserProfileIndex(indexes.SearchIndex, indexes.Indexable):
+SEARCH_CARD_PHOTO_GEOMETRY = '70x70'
+
+
+class UserProfileIndex(HashedSearchIndex, indexes.Indexable):
     """User Profile Search Index."""
     # Primary field of the index
     text = indexes.CharField(document=True, use_template=True)
@@ -26,9 +36,37 @@ class UserProfileIndex(indexes.SearchIndex, indexes.Indexable):
     # Django's username does not have privacy level
     username = indexes.CharField(model_attr='user__username')
 
+    # Edge n-grams used for search-as-you-type suggestions
+    full_name_auto = indexes.EdgeNgramField(model_attr='full_name')
+    username_auto = indexes.EdgeNgramField(model_attr='user__username')
+
+    # Search result card for every privacy level, already masked
+    search_card = indexes.CharField(indexed=False)
+
     def get_model(self):
         return UserProfile
 
+    def prepare_search_card(self, obj):
+        """Return the JSON encoded result card for every privacy level."""
+        username = obj.user.username
+        url = reverse('phonebook:profile_view', args=[username])
+        cards = {}
+        for level in (PRIVATE, EMPLOYEES, MOZILLIANS, PUBLIC):
+            # get_privacy_aware_photo_url() clears the photo of hidden avatars.
+            photo_url = get_privacy_aware_photo_url(copy.copy(obj), level,
+                                                    SEARCH_CARD_PHOTO_GEOMETRY)
+            cards[level] = {
+                'display_name': obj.display_name if obj.privacy_full_name >= level else '',
+                'username': username,
+                'url': url,
+                'photo_url': photo_url,
+                'email': obj.email if obj.privacy_email >= level else '',
+                'city': obj.city.name if obj.city and obj.privacy_city >= level else '',
+                'country': (obj.country.name if obj.country and obj.privacy_country >= level
+                            else ''),
+            }
+        return json.dumps(cards, sort_keys=True)
+
     def prepare_email(self, obj):
         # Do not index the email if it's already in the IdpProfiles
         if not obj.idp_profiles.exists():
@@ -40,7 +78,7 @@ class UserProfileIndex(indexes.SearchIndex, indexes.Indexable):
         return self.get_model().objects.complete()
 
 
-class IdpProfileIndex(indexes.SearchIndex, indexes.Indexable):
+class IdpProfileIndex(HashedSearchIndex, indexes.Indexable):
     """IdpProfile Profile Search Index."""
     # Primary field of the index
     text = indexes.CharField(document=True, use_template=True)
@@ -6,7 +6,7 @@ from django.contrib.auth.models import User
 from django.db import transaction
 from django.db.models import signals
 from django.dispatch import receiver
-from mozillians.users.models import UserProfile
+from mozillians.users.models import ExternalAccount, IdpProfile, ProfileEmail, UserProfile
 from raven.contrib.django.raven_compat.models import client as sentry_client
 
 
@@ -16,3 +16,60 @@ def delete_user_obj_sig(sender, instance, **kwargs):
     with transaction.atomic():
         if instance.user:
             instance.user.delete()
+
+
+# Signals to rebuild the photo manifest of a profile when the email changes
+@receiver(signals.pre_save, sender=User, dispatch_uid='user_email_saving_sig')
+def user_email_saving_sig(sender, instance, raw, update_fields, **kwargs):
+    instance._stored_email = None
+    if instance.pk and not raw and (update_fields is None or 'email' in update_fields):
+        instance._stored_email = (User.objects.filter(pk=instance.pk)
+                                  .values_list('email', flat=True).first())
+
+
+@receiver(signals.post_save, sender=User, dispatch_uid='refresh_photo_manifest_sig')
+def refresh_photo_manifest_sig(sender, instance, created, raw, **kwargs):
+    stored_email = getattr(instance, '_stored_email', None)
+    if created or raw or stored_email is None or stored_email == instance.email:
+        return
+    profile = UserProfile.objects.filter(user=instance).first()
+    if profile:
+        profile.refresh_photo_manifest()
+
+
+# Signals to keep the email lookup table in sync with the addresses of a profile
+@receiver(signals.post_save, sender=UserProfile, dispatch_uid='sync_profile_email_sig')
+def sync_profile_email_sig(sender, instance, raw, **kwargs):
+    if not raw:
+        ProfileEmail.sync_user(instance)
+
+
+@receiver(signals.post_save, sender=User, dispatch_uid='sync_user_email_sig')
+def sync_user_email_sig(sender, instance, created, raw, update_fields, **kwargs):
+    if created or raw or (update_fields and 'email' not in update_fields):
+        return
+    profile = UserProfile.objects.filter(user=instance).first()
+    if profile:
+        ProfileEmail.sync_user(profile)
+
+
+@receiver(signals.post_save, sender=ExternalAccount, dispatch_uid='sync_alternate_email_sig')
+def sync_alternate_email_sig(sender, instance, raw, **kwargs):
+    if not raw:
+        ProfileEmail.sync_alternate(instance)
+
+
+@receiver(signals.post_delete, sender=ExternalAccount, dispatch_uid='delete_alternate_email_sig')
+def delete_alternate_email_sig(sender, instance, **kwargs):
+    ProfileEmail.remove(ProfileEmail.SOURCE_ALTERNATE, instance.id)
+
+
+@receiver(signals.post_save, sender=IdpProfile, dispatch_uid='sync_identity_email_sig')
+def sync_identity_email_sig(sender, instance, raw, **kwargs):
+    if not raw:
+        ProfileEmail.sync_identity(instance)
+
+
+@receiver(signals.post_delete, sender=IdpProfile, dispatch_uid='delete_identity_email_sig')
+def delete_identity_email_sig(sender, instance, **kwargs):
+    ProfileEmail.remove(ProfileEmail.SOURCE_IDENTITY, instance.id)
@@ -6,7 +6,7 @@ import factory
 from cities_light.models import City, Country, Region
 from factory import fuzzy
 
-from mozillians.users.models import Language
+from mozillians.users.models import Language, UserProfile
 
 
 class UserFactory(factory.DjangoModelFactory):
@@ -22,6 +22,8 @@ class UserFactory(factory.DjangoModelFactory):
 
     @factory.post_generation
     def userprofile(self, create, extracted, **kwargs):
+        # Profiles are not created by a User signal anymore.
+        UserProfile.objects.get_or_create(user=self)
         self.userprofile.full_name = ' '.join([self.first_name, self.last_name])
         self.userprofile.country = Country.objects.get_or_create(
             name='Greece', code2='gr'
@@ -1,24 +1,31 @@
 # -*- coding: utf-8 -*-
+import json
+
 from django.http import Http404
 from django.test import RequestFactory
+from django.test.utils import override_settings
 
 from mock import ANY, Mock, patch
 from nose.tools import eq_, ok_
 
 from mozillians.common.tests import TestCase
-from mozillians.groups.models import Group
+from mozillians.groups.models import Group, GroupMembership
 from mozillians.groups.tests import GroupFactory
-from mozillians.users.managers import MOZILLIANS, PUBLIC
-from mozillians.users.models import (GroupMembership, ExternalAccount, IdpProfile,
-                                     Language, UserProfile)
+from mozillians.users.managers import MOZILLIANS, PRIVATE, PUBLIC
+from mozillians.users.models import ExternalAccount, IdpProfile, Language, UserProfile
 from mozillians.users.tests import CityFactory, CountryFactory, RegionFactory, UserFactory
 from mozillians.users.api.v2 import (ExternalAccountSerializer,
                                      LanguageSerializer,
+                                     ProfileLookupSerializer,
+                                     UserProfileBulkDetailedSerializer,
                                      UserProfileDetailedSerializer,
                                      UserProfileFilter,
                                      UserProfileSerializer,
                                      UserProfileViewSet,
-                                     WebsiteSerializer)
+                                     WebsiteSerializer,
+                                     iter_profile_export,
+                                     lookup_profiles,
+                                     prefetch_profile_details)
 
 
 class ExternalAccountSerializerTests(TestCase):
@@ -68,6 +75,11 @@ class UserProfileSerializerTests(TestCase):
         eq_(data['is_vouched'], True)
         ok_(data['_url'])
 
+    def test_fields(self):
+        profile = UserFactory.create(username='foo').userprofile
+        context = {'request': self.factory.get('/?fields=username,unknown')}
+        eq_(UserProfileSerializer(profile, context=context).data, {'username': 'foo'})
+
 
 class UserProfileDetailedSerializerTests(TestCase):
     def setUp(self):
@@ -145,13 +157,14 @@ class UserProfileDetailedSerializerTests(TestCase):
                 'privacy': 'Mozillians'}
         eq_(serializer.data['city'], city)
 
-    def test_transform_tshirt(self):
-        user = UserFactory.create(userprofile={'tshirt': 9})
+    def test_removed_fields(self):
+        user = UserFactory.create()
         user.userprofile._groups = Group.objects.none()
         context = {'request': self.factory.get('/')}
         serializer = UserProfileDetailedSerializer(user.userprofile, context=context)
-        tshirt = {'value': 9,
-                  'english': 'Straight-cut Large',
+        eq_(serializer.data['ircname'], {'value': '', 'privacy': 'Private'})
+        tshirt = {'value': None,
+                  'english': '',
                   'privacy': 'Private'}
         eq_(serializer.data['tshirt'], tshirt)
 
@@ -242,6 +255,16 @@ class UserProfileDetailedSerializerTests(TestCase):
         eq_(serializer.data['alternate_emails'][0]['email'], 'foo@bar.com')
         eq_(serializer.data['alternate_emails'][0]['privacy'], 'Mozillians')
 
+    def test_transforms_computed_once(self):
+        transforms = UserProfileDetailedSerializer.get_transforms()
+        ok_(UserProfileDetailedSerializer.get_transforms() is transforms)
+        fields = [field for field, transform in transforms]
+        eq_(fields, ['full_name', 'email', 'bio', 'photo', 'date_mozillian', 'timezone',
+                     'title', 'story_link', 'languages'])
+        bulk_transforms = UserProfileBulkDetailedSerializer.get_transforms()
+        ok_(bulk_transforms is not transforms)
+        eq_([field for field, transform in bulk_transforms], fields)
+
 
 class UserProfileViewSetTests(TestCase):
     def test_get_queryset_public(self):
@@ -282,6 +305,66 @@ class UserProfileViewSetTests(TestCase):
         self.assertRaises(Http404, viewset.retrieve, viewset.request, -1)
 
 
+class PrefetchProfileDetailsTests(TestCase):
+    def _create_profile(self, **kwargs):
+        profile = UserFactory.create(userprofile=kwargs).userprofile
+        GroupFactory.create().add_member(profile)
+        ExternalAccount.objects.create(user=profile, type=ExternalAccount.TYPE_AMO,
+                                       identifier='amo', privacy=PUBLIC)
+        ExternalAccount.objects.create(user=profile, type=ExternalAccount.TYPE_WEBSITE,
+                                       identifier='http://example.com', privacy=MOZILLIANS)
+        ExternalAccount.objects.create(user=profile, type=ExternalAccount.TYPE_EMAIL,
+                                       identifier='alt@example.com', privacy=PUBLIC)
+        IdpProfile.objects.create(profile=profile, email='idp@example.com', privacy=PRIVATE,
+                                  primary_contact_identity=True)
+        Language.objects.create(userprofile=profile, code='fr')
+        return profile
+
+    def _profiles(self, level):
+        return list(UserProfile.objects.privacy_level(level).select_related(
+            'user', 'country', 'region', 'city').order_by('pk'))
+
+    def test_fixed_number_of_queries(self):
+        for i in range(3):
+            self._create_profile()
+        profiles = self._profiles(MOZILLIANS)
+        with self.assertNumQueries(4):
+            prefetch_profile_details(profiles, MOZILLIANS)
+            for profile in profiles:
+                eq_(len(profile._groups), 1)
+                eq_([account.identifier for account in profile._api_accounts], ['amo'])
+                eq_([account.identifier for account in profile._api_websites],
+                    ['http://example.com'])
+                eq_([language.code for language in profile._api_languages], ['fr'])
+
+    def test_matches_privacy_aware_profile(self):
+        self._create_profile(privacy_languages=MOZILLIANS)
+        for level in (PRIVATE, MOZILLIANS, PUBLIC):
+            profile = prefetch_profile_details(self._profiles(level), level)[0]
+            eq_(profile._api_email, profile.email)
+            eq_(profile._api_accounts, list(profile.accounts))
+            eq_(profile._api_websites, list(profile.websites))
+            eq_(profile._api_languages, list(profile.languages))
+
+    def test_alternate_emails(self):
+        self._create_profile()
+        profile = prefetch_profile_details(self._profiles(PRIVATE), PRIVATE)[0]
+        eq_([getattr(email, 'identifier', None) or email.email
+             for email in profile._api_alternate_emails],
+            ['alt@example.com', 'idp@example.com'])
+        profile = prefetch_profile_details(self._profiles(PUBLIC), PUBLIC)[0]
+        eq_(len(profile._api_alternate_emails), 1)
+
+    def test_fields(self):
+        for i in range(3):
+            self._create_profile()
+        profiles = self._profiles(MOZILLIANS)
+        with self.assertNumQueries(1):
+            prefetch_profile_details(profiles, MOZILLIANS, fields=set(['username', 'languages']))
+        eq_([language.code for language in profiles[0]._api_languages], ['fr'])
+        eq_(profiles[0]._groups, [])
+
+
 class UserProfileFilterTest(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
@@ -319,6 +402,14 @@ class UserProfileFilterTest(TestCase):
         eq_(f.qs.count(), 1)
         eq_(f.qs[0], user.userprofile)
 
+    def test_filter_emails_case_insensitive(self):
+        request = self.factory.get('/', {'email': 'Foo@Bar.com'})
+        user = UserFactory.create(email='foo@bar.com')
+        IdpProfile.objects.create(profile=user.userprofile, auth0_user_id='ad|foo@bar.com',
+                                  email='foo@bar.com')
+        f = UserProfileFilter(request.GET, queryset=UserProfile.objects.all())
+        eq_(list(f.qs), [user.userprofile])
+
     def test_filter_group_member(self):
         request = self.factory.get('/', {'group': 'bar'})
         user = UserFactory.create()
@@ -337,3 +428,76 @@ class UserProfileFilterTest(TestCase):
 
         f = UserProfileFilter(request.GET, queryset=UserProfile.objects.all())
         eq_(f.qs.count(), 0)
+
+    def test_filter_removed_fields(self):
+        UserFactory.create()
+        for field in ('ircname', 'skill'):
+            request = self.factory.get('/', {field: 'foo'})
+            f = UserProfileFilter(request.GET, queryset=UserProfile.objects.all())
+            eq_(f.qs.count(), 0)
+
+
+class IterProfileExportTests(TestCase):
+    def _export(self, privacy_level, chunk_size):
+        queryset = UserProfile.objects.privacy_level(privacy_level)
+        context = {'request': RequestFactory().get('/')}
+        return [json.loads(line) for line in
+                iter_profile_export(queryset, privacy_level, context, chunk_size)]
+
+    def test_chunks(self):
+        profiles = [UserFactory.create().userprofile for i in range(5)]
+        with patch('mozillians.users.api.v2.prefetch_profile_details',
+                   wraps=prefetch_profile_details) as prefetch_mock:
+            data = self._export(MOZILLIANS, chunk_size=2)
+        eq_([row['username'] for row in data], [profile.user.username for profile in profiles])
+        eq_(prefetch_mock.call_count, 3)
+
+    def test_privacy(self):
+        UserFactory.create(userprofile={'full_name': 'Foo Bar', 'privacy_full_name': MOZILLIANS})
+        eq_(self._export(MOZILLIANS, chunk_size=10)[0]['full_name']['value'], 'Foo Bar')
+        eq_(self._export(PUBLIC, chunk_size=10)[0]['full_name']['value'], '')
+
+
+class LookupProfilesTests(TestCase):
+    def test_lookup(self):
+        user = UserFactory.create(username='foo', email='foo@example.com')
+        IdpProfile.objects.create(profile=user.userprofile, auth0_user_id='ad|foo',
+                                  email='foo@mozilla.com', privacy=PUBLIC)
+        other = UserFactory.create(username='bar')
+
+        with self.assertNumQueries(3):
+            results = lookup_profiles(UserProfile.objects.all(), MOZILLIANS,
+                                      usernames=['Foo', 'bar', 'missing'],
+                                      emails=['FOO@example.com', 'foo@mozilla.com', 'no@pe.com'],
+                                      auth0_ids=['ad|foo', 'ad|missing'])
+
+        eq_(results['usernames'], {'Foo': user.userprofile, 'bar': other.userprofile,
+                                   'missing': None})
+        eq_(results['emails'], {'FOO@example.com': user.userprofile,
+                                'foo@mozilla.com': user.userprofile, 'no@pe.com': None})
+        eq_(results['auth0_ids'], {'ad|foo': user.userprofile, 'ad|missing': None})
+
+    def test_privacy(self):
+        user = UserFactory.create(email='foo@example.com',
+                                  userprofile={'privacy_email': MOZILLIANS})
+        IdpProfile.objects.create(profile=user.userprofile, auth0_user_id='ad|foo',
+                                  email='foo@mozilla.com', privacy=MOZILLIANS)
+
+        results = lookup_profiles(UserProfile.objects.all(), PUBLIC,
+                                  emails=['foo@example.com'], auth0_ids=['ad|foo'])
+        eq_(results['emails'], {'foo@example.com': None})
+        eq_(results['auth0_ids'], {'ad|foo': None})
+
+    def test_queryset(self):
+        user = UserFactory.create(username='foo')
+        results = lookup_profiles(UserProfile.objects.exclude(pk=user.userprofile.pk), PUBLIC,
+                                  usernames=['foo'])
+        eq_(results['usernames'], {'foo': None})
+
+    @override_settings(API_LOOKUP_MAX_ITEMS=2)
+    def test_max_items(self):
+        serializer = ProfileLookupSerializer(data={'usernames': ['foo', 'bar'],
+                                                   'emails': ['foo@example.com']})
+        ok_(not serializer.is_valid())
+        ok_(ProfileLookupSerializer(data={'usernames': ['foo', 'bar']}).is_valid())
+        ok_(not ProfileLookupSerializer(data={}).is_valid())
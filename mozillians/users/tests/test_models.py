@@ -17,8 +17,9 @@ from mozillians.groups.tests import (GroupAliasFactory, GroupFactory,
                                      SkillAliasFactory, SkillFactory)
 from mozillians.users.managers import (EMPLOYEES, MOZILLIANS, PUBLIC,
                                        PUBLIC_INDEXABLE_FIELDS)
-from mozillians.users.models import (ExternalAccount, IdpProfile, UserProfile,
-                                     Vouch, _calculate_photo_filename)
+from mozillians.users.models import (ExternalAccount, IdpProfile, ProfileEmail, UserProfile,
+                                     Vouch, _calculate_photo_filename, filter_privacy,
+                                     get_primary_email)
 from mozillians.users.tests import UserFactory
 from nose.tools import eq_, ok_
 
@@ -381,6 +382,7 @@ class UserProfileTests(TestCase):
         mock_image_obj.mode = 'RGB'
         mock_image.open.return_value = mock_image_obj
         mock_storage.exists.return_value = True
+        get_thumbnail_mock.return_value.url = '/media/foo.jpg'
         user = UserFactory.create(userprofile={'photo': 'foo'})
         user.userprofile.get_photo_thumbnail(geometry='geo', crop='crop')
         get_thumbnail_mock.assert_called_with('foo', 'geo', crop='crop')
@@ -394,6 +396,7 @@ class UserProfileTests(TestCase):
 
     @patch('mozillians.users.models.UserProfile.get_photo_thumbnail')
     def test_get_photo_url_with_photo(self, get_photo_thumbnail_mock):
+        get_photo_thumbnail_mock.return_value.url = '/media/foo.jpg'
         user = UserFactory.create(userprofile={'photo': 'foo'})
         user.userprofile.get_photo_url('80x80', firefox='rocks')
         get_photo_thumbnail_mock.assert_called_with('80x80', firefox='rocks')
@@ -404,6 +407,80 @@ class UserProfileTests(TestCase):
         user.userprofile.get_photo_url('80x80', firefox='rocks')
         gravatar_mock.assert_called_with(user.email, size='80x80')
 
+    @patch('mozillians.users.models.UserProfile.get_photo_thumbnail')
+    def test_get_photo_url_from_manifest(self, get_photo_thumbnail_mock):
+        get_photo_thumbnail_mock.return_value.url = 'https://example.com/foo.jpg'
+        user = UserFactory.create(userprofile={'photo': 'foo'})
+        get_photo_thumbnail_mock.reset_mock()
+        eq_(user.userprofile.get_photo_url('300x300'), 'https://example.com/foo.jpg')
+        ok_(not get_photo_thumbnail_mock.called)
+
+    @patch('mozillians.users.models.UserProfile.get_photo_thumbnail')
+    def test_get_photo_url_outdated_manifest(self, get_photo_thumbnail_mock):
+        get_photo_thumbnail_mock.return_value.url = 'https://example.com/foo.jpg'
+        user = UserFactory.create(userprofile={'photo': 'foo'})
+        user.userprofile.photo = 'bar'
+        user.userprofile.get_photo_url('300x300')
+        get_photo_thumbnail_mock.assert_called_with('300x300')
+
+    @patch('mozillians.users.models.gravatar')
+    def test_get_photo_url_gravatar_from_manifest(self, gravatar_mock):
+        gravatar_mock.return_value = 'https://gravatar.example.com/'
+        user = UserFactory.create(userprofile={'privacy_photo': PUBLIC})
+        gravatar_mock.reset_mock()
+        eq_(user.userprofile.get_photo_url('150x150'), 'https://gravatar.example.com/')
+        ok_(not gravatar_mock.called)
+
+        # Gravatar URLs are not used from the manifest with privacy applied.
+        user.userprofile.set_instance_privacy_level(PUBLIC)
+        user.userprofile.get_photo_url('150x150')
+        ok_(gravatar_mock.called)
+
+    @patch('mozillians.users.models.gravatar')
+    def test_refresh_photo_manifest_on_email_change(self, gravatar_mock):
+        gravatar_mock.return_value = 'https://gravatar.example.com/'
+        user = UserFactory.create()
+        ok_(not user.userprofile.refresh_photo_manifest())
+
+        user.email = 'new@example.com'
+        user.save()
+        gravatar_mock.assert_called_with('new@example.com', size='500x500')
+        ok_(not UserProfile.objects.get(pk=user.userprofile.pk).refresh_photo_manifest())
+
+    def test_refresh_photo_manifest_only_on_changes(self):
+        user = UserFactory.create()
+        profile = UserProfile.objects.get(pk=user.userprofile.pk)
+        user = User.objects.get(pk=user.pk)
+
+        with patch.object(UserProfile, 'refresh_photo_manifest') as refresh_mock:
+            profile.full_name = 'Foo Bar'
+            profile.save()
+            user.first_name = 'Foo'
+            user.save()
+            ok_(not refresh_mock.called)
+
+            profile.photo = 'foo'
+            profile.save(update_fields=['full_name'])
+            ok_(not refresh_mock.called)
+            profile.save()
+            eq_(refresh_mock.call_count, 1)
+
+    def test_bio_html_on_save(self):
+        profile = UserFactory.create(userprofile={'bio': u'**foo**'}).userprofile
+        eq_(UserProfile.objects.get(pk=profile.pk).bio_html, u'<p><strong>foo</strong></p>')
+
+        profile.bio = u'*bar*'
+        profile.save(update_fields=['bio'])
+        eq_(UserProfile.objects.get(pk=profile.pk).bio_html, u'<p><em>bar</em></p>')
+
+    def test_bio_html_privacy(self):
+        profile = UserFactory.create(userprofile={'bio': u'foo',
+                                                  'privacy_bio': MOZILLIANS}).userprofile
+        profile.set_instance_privacy_level(PUBLIC)
+        eq_(profile.bio_html, u'')
+        profile.set_instance_privacy_level(MOZILLIANS)
+        eq_(profile.bio_html, u'<p>foo</p>')
+
     def test_is_not_public_indexable(self):
         user = UserFactory.create()
         ok_(not user.userprofile.is_public_indexable)
@@ -634,6 +711,60 @@ class EmailAttributeTests(TestCase):
         eq_(profile.email, '')
 
 
+class ProfileEmailTests(TestCase):
+    def _emails(self, profile):
+        return set(profile.profile_emails.values_list('source', 'email', 'domain', 'primary'))
+
+    def test_user_email(self):
+        profile = UserFactory.create(email='Foo@Example.com').userprofile
+        eq_(self._emails(profile),
+            set([(ProfileEmail.SOURCE_USER, 'foo@example.com', 'example.com', True)]))
+
+        profile.user.email = 'bar@example.org'
+        profile.user.save()
+        eq_(self._emails(profile),
+            set([(ProfileEmail.SOURCE_USER, 'bar@example.org', 'example.org', True)]))
+
+    def test_user_email_privacy(self):
+        profile = UserFactory.create(email='foo@example.com').userprofile
+        profile.privacy_email = PUBLIC
+        profile.save()
+        eq_(profile.profile_emails.get().privacy, PUBLIC)
+
+    def test_alternate_email(self):
+        profile = UserFactory.create(email='foo@example.com').userprofile
+        account = ExternalAccount.objects.create(user=profile, type=ExternalAccount.TYPE_EMAIL,
+                                                 identifier='bar@example.org')
+        profile.externalaccount_set.create(type=ExternalAccount.TYPE_MDN, identifier='bar')
+        ok_((ProfileEmail.SOURCE_ALTERNATE, 'bar@example.org', 'example.org', False)
+            in self._emails(profile))
+        eq_(profile.profile_emails.count(), 2)
+
+        account.delete()
+        eq_(profile.profile_emails.count(), 1)
+
+    def test_identity_email(self):
+        profile = UserFactory.create(email='foo@example.com').userprofile
+        idp = IdpProfile.objects.create(profile=profile, auth0_user_id='ad|bar@mozilla.com',
+                                        email='bar@mozilla.com', primary=True)
+        ok_((ProfileEmail.SOURCE_IDENTITY, 'bar@mozilla.com', 'mozilla.com', True)
+            in self._emails(profile))
+
+        idp.email = ''
+        idp.save()
+        ok_(not profile.profile_emails.filter(source=ProfileEmail.SOURCE_IDENTITY).exists())
+
+        idp.email = 'bar@mozilla.com'
+        idp.save()
+        idp.delete()
+        ok_(not profile.profile_emails.filter(source=ProfileEmail.SOURCE_IDENTITY).exists())
+
+    def test_profile_delete(self):
+        profile = UserFactory.create(email='foo@example.com').userprofile
+        profile.delete()
+        ok_(not ProfileEmail.objects.exists())
+
+
 class PrivacyModelTests(unittest.TestCase):
     def setUp(self):
         UserProfile.clear_privacy_fields_cache()
@@ -829,3 +960,24 @@ class CISHelperMethodsTests(unittest.TestCase):
         ]
 
         eq_(user.userprofile.get_cis_uris(), expected_result)
+
+
+class PrivacyHelperTests(TestCase):
+    def test_filter_privacy(self):
+        public = IdpProfile(privacy=PUBLIC)
+        mozillians = IdpProfile(privacy=MOZILLIANS)
+        eq_(filter_privacy([public, mozillians], PUBLIC), [public])
+        eq_(filter_privacy([public, mozillians], None), [public, mozillians])
+
+    def test_primary_email(self):
+        contact = IdpProfile(email='contact@example.com', privacy=MOZILLIANS,
+                             primary_contact_identity=True)
+        other = IdpProfile(email='other@example.com', privacy=PUBLIC)
+        eq_(get_primary_email('foo@example.com', PUBLIC, [other, contact], None),
+            'contact@example.com')
+        eq_(get_primary_email('foo@example.com', PUBLIC, [other, contact], MOZILLIANS),
+            'contact@example.com')
+        eq_(get_primary_email('foo@example.com', PUBLIC, [other, contact], PUBLIC), '')
+        eq_(get_primary_email('foo@example.com', PUBLIC, [], PUBLIC), 'foo@example.com')
+        eq_(get_primary_email('foo@example.com', MOZILLIANS, [], PUBLIC),
+            UserProfile.privacy_fields()['email'])
@@ -1,6 +1,3 @@
-from functools import reduce
-from operator import or_
-
 from pytz import country_timezones
 
 from cities_light.models import City, Country, Region
@@ -11,7 +8,7 @@ from django.db.models import Q
 from django.http import JsonResponse
 from mozillians.common.templatetags.helpers import get_object_or_none
 from mozillians.phonebook.forms import get_timezones_list
-from mozillians.users.models import IdpProfile, UserProfile
+from mozillians.users.models import IdpProfile, ProfileEmail, UserProfile
 
 
 class BaseProfileAdminAutocomplete(autocomplete.Select2QuerySetView):
@@ -134,17 +131,12 @@ class StaffProfilesAutocomplete(autocomplete.Select2QuerySetView):
         if not self.request.user.userprofile.is_vouched:
             return UserProfile.objects.none()
 
-        queries = []
-
         # Query staff profiles
-        for domain in settings.AUTO_VOUCH_DOMAINS:
-            pks = IdpProfile.objects.filter(
-                email__endswith='@' + domain).values_list('profile__pk', flat=True)
-            queries.append(Q(pk__in=pks))
-
-        query = reduce(or_, queries)
+        domains = [domain.lower() for domain in settings.AUTO_VOUCH_DOMAINS]
+        emails = ProfileEmail.objects.filter(source=ProfileEmail.SOURCE_IDENTITY,
+                                             domain__in=domains)
 
-        qs = UserProfile.objects.filter(query).distinct()
+        qs = UserProfile.objects.filter(pk__in=emails.values('profile_id'))
         if self.q:
             qs = qs.filter(Q(full_name__icontains=self.q)
                            | Q(user__email__icontains=self.q)